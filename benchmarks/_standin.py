@@ -0,0 +1,225 @@
+"""
+Local stand-in for the ECS api used by the benchmarks.
+
+It serves the payload shapes of ``tests/store.py`` for every endpoint used by
+``Api``, with the list endpoints scaled up to the requested number of items, from a
+threaded HTTP server. The list payloads can be replaced, for example with the ones
+of ``benchmarks.payloads``. An optional artificial latency per request emulates
+the network and ``compression`` serves the bodies with that ``Content-Encoding``
+when the client accepts it. ``handle`` answers the same routes in process, as the
+handler of an ``InMemoryTransport``.
+"""
+
+import gzip
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+from src.ecsapi import Api
+from tests import store
+
+PREFIX = "/ecs/v2"
+
+
+def scale(payload: str, key: str, count: int, **fields) -> str:
+    """
+    Repeats the items of the ``key`` list of ``payload`` up to ``count`` items.
+
+    Every item gets a unique ``id`` (or ``name`` for servers) and the ``fields``.
+    """
+    data = json.loads(payload)
+    items = data[key]
+    scaled = []
+    for i in range(count):
+        item = dict(items[i % len(items)], **fields)
+        if "id" in item:
+            item["id"] = i + 1
+        if key == "server":
+            item["name"] = f"ec{i:06d}"
+        scaled.append(item)
+    data[key] = scaled
+    if "count" in data:
+        data["count"] = count
+    if "total_actions" in data:
+        data["total_actions"] = count
+    return json.dumps(data)
+
+
+def make_servers(count: int, group: str = None) -> str:
+    return scale(store.SERVERS_FETCH_RESPONSE, "server", count, group=group)
+
+
+def make_plans_available(images: int) -> str:
+    data = json.loads(store.PLANS_AVAILABLE_FETCH_RESPONSE)
+    for plan in data["plans"]:
+        os_availables = plan["os_availables"]
+        plan["os_availables"] = [
+            dict(os_availables[i % len(os_availables)], id=i + 1) for i in range(images)
+        ]
+    return json.dumps(data)
+
+
+def compress(payload: bytes, encoding: str, level: int = None) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(payload, 6 if level is None else level)
+    if encoding == "br":
+        import brotli
+
+        return brotli.compress(payload, quality=5 if level is None else level)
+    if encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(
+            payload
+        )
+    raise ValueError(f"Unsupported encoding {encoding}")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class StandIn:
+    def __init__(
+        self,
+        servers: int = 1,
+        actions: int = 50,
+        images: int = 14,
+        latency: float = 0,
+        group: str = None,
+        payloads: Dict[str, str] = None,
+        compression: str = None,
+    ):
+        self.latency = latency
+        self.compression = compression
+        self._compressed: Dict[int, bytes] = {}
+        payloads = payloads or {}
+        self.payloads = {
+            "servers": payloads.get("servers") or make_servers(servers, group),
+            "actions": payloads.get("actions")
+            or scale(store.ACTIONS_FETCH_RESPONSE, "actions", actions),
+            "images": payloads.get("images")
+            or scale(store.IMAGES_FETCH_RESPONSE, "images", images),
+            "plans_available": payloads.get("plans_available")
+            or make_plans_available(images),
+        }
+        name, number = r"[^/]+", r"\d+"
+        self.routes = [
+            ("GET", "/servers", self.payloads["servers"]),
+            ("POST", "/servers", store.SERVER_CREATE_RESPONSE),
+            ("GET", f"/servers/{name}/status", store.SERVER_STATUS_FETCH_RESPONSE),
+            ("POST", f"/servers/{name}/actions", store.SINGLE_ACTION_RESPONSE),
+            ("GET", f"/servers/{name}", store.SERVER_FETCH_RESPONSE),
+            ("PUT", f"/servers/{name}", store.SERVER_UPDATE_RESPONSE),
+            ("DELETE", f"/servers/{name}", store.SERVER_DELETE_RESPONSE),
+            ("GET", "/actions", self.payloads["actions"]),
+            ("GET", f"/actions/{number}", store.ACTION_FETCH_RESPONSE),
+            ("GET", "/plans", store.PLANS_FETCH_RESPONSE),
+            ("GET", "/plans/availables", self.payloads["plans_available"]),
+            ("GET", "/regions", store.REGIONS_FETCH_RESPONSE),
+            ("POST", "/regions/availables", store.REGIONS_AVAILABLE_FETCH_RESPONSE),
+            ("GET", "/images/basics", self.payloads["images"]),
+            ("GET", "/images/cloud-images", self.payloads["images"]),
+            ("GET", "/templates", store.TEMPLATES_FETCH_RESPONSE),
+            ("POST", "/templates", store.TEMPLATE_CREATE_RESPONSE),
+            ("GET", f"/templates/{number}", store.TEMPLATE_FETCH_RESPONSE),
+            ("PATCH", f"/templates/{number}", store.TEMPLATE_UPDATE_RESPONSE),
+            ("DELETE", f"/templates/{number}", store.TEMPLATE_DELETE_RESPONSE),
+            ("GET", "/scripts", store.CLOUDSCRIPTS_FETCH_RESPONSE),
+            ("POST", "/scripts", store.CLOUDSCRIPT_CREATE_RESPONSE),
+            ("GET", f"/scripts/{number}", store.CLOUDSCRIPT_FETCH_RESPONSE),
+            ("PATCH", f"/scripts/{number}", store.CLOUDSCRIPT_UPDATE_RESPONSE),
+            ("DELETE", f"/scripts/{number}", '{"status": "ok"}'),
+            ("GET", "/sshkeys", store.SSH_KEYS_FETCH_RESPONSE),
+            ("POST", "/sshkeys", store.SSH_KEY_CREATE_RESPONSE),
+            ("GET", f"/sshkeys/{number}", store.SSH_KEY_FETCH_RESPONSE),
+            ("DELETE", f"/sshkeys/{number}", store.SSH_KEY_DELETE_RESPONSE),
+        ]
+        self.routes = [
+            (method, re.compile(rf"^{PREFIX}{path}$"), payload.encode())
+            for method, path, payload in self.routes
+        ]
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                status, headers, body = standin.handle(
+                    self.command, self.path.split("?", 1)[0], headers=self.headers
+                )
+                self.send_response(status)
+                for header, value in headers.items():
+                    self.send_header(header, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _serve
+
+        return Handler
+
+    def handle(self, method: str, path: str, params=None, body=None, headers=None):
+        """
+        Answers a request, usable as ``InMemoryTransport`` handler.
+        """
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        for route_method, pattern, payload in self.routes:
+            if route_method == method and pattern.match(path):
+                response_headers = {"Content-Type": "application/json"}
+                accepted = (headers or {}).get("Accept-Encoding") or ""
+                if self.compression and self.compression in accepted:
+                    payload = self._compress(payload)
+                    response_headers["Content-Encoding"] = self.compression
+                return 200, response_headers, payload
+        return 404, {}, b""
+
+    def _compress(self, payload: bytes) -> bytes:
+        compressed = self._compressed.get(id(payload))
+        if compressed is None:
+            compressed = compress(payload, self.compression)
+            self._compressed[id(payload)] = compressed
+        return compressed
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def api(self, **kwargs) -> Api:
+        return Api(
+            token="benchmark",
+            host="127.0.0.1",
+            port=self.port,
+            prefix="ecs",
+            version=2,
+            protocol="http",
+            **kwargs,
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
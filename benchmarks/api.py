@@ -0,0 +1,230 @@
+"""
+Throughput and latency of every ``Api`` method against the local stand-in.
+
+Each method is called sequentially and then from a thread pool; calls/sec, p50 and
+p99 are reported for both, together with the parse cost of the list payloads at
+growing sizes. Results are written as JSON so that releases can be compared.
+
+``--transport`` selects how requests are sent: ``requests`` (the default
+transport), ``pooled`` (keep-alive session) or ``memory`` (no network, to isolate
+the client side cost of building requests and parsing responses).
+
+Run from the repository root::
+
+    python -m benchmarks.api --servers 2000 --actions 2000 --images 500 \
+        --transport pooled --output benchmarks/results/api.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from benchmarks._standin import StandIn, scale, make_plans_available
+from src.ecsapi._transport import InMemoryTransport, PooledTransport, RequestsTransport
+from src.ecsapi._action import _ActionListResponse
+from src.ecsapi._image import _ImageListResponse
+from src.ecsapi._plan import _PlanAvailableListResponse
+from src.ecsapi._server import ServerCreateRequest, _ServerListResponse
+from tests import store
+
+METHODS: Dict[str, Callable] = {
+    "fetch_servers": lambda api: api.fetch_servers(),
+    "fetch_server": lambda api: api.fetch_server("ec000001"),
+    "fetch_server_status": lambda api: api.fetch_server_status("ec000001"),
+    "create_server": lambda api: api.create_server(
+        ServerCreateRequest(plan="eCS1", location="it-fr2", image="almalinux-9")
+    ),
+    "update_server": lambda api: api.update_server("ec000001", notes="benchmark"),
+    "turn_on_server": lambda api: api.turn_on_server("ec000001"),
+    "turn_off_server": lambda api: api.turn_off_server("ec000001"),
+    "rollback_server": lambda api: api.rollback_server("ec000001", 107),
+    "delete_server": lambda api: api.delete_server("ec000001"),
+    "fetch_actions": lambda api: api.fetch_actions(),
+    "fetch_action": lambda api: api.fetch_action(1),
+    "fetch_plans": lambda api: api.fetch_plans(),
+    "fetch_plans_available": lambda api: api.fetch_plans_available(),
+    "can_create_plan": lambda api: api.can_create_plan("eCS1", "it-fr2"),
+    "fetch_regions": lambda api: api.fetch_regions(),
+    "fetch_regions_available": lambda api: api.fetch_regions_available("eCS1"),
+    "fetch_images_basics": lambda api: api.fetch_images_basics(),
+    "fetch_images_cloud": lambda api: api.fetch_images_cloud(),
+    "fetch_templates": lambda api: api.fetch_templates(),
+    "fetch_template": lambda api: api.fetch_template(1),
+    "create_template": lambda api: api.create_template(server="ec000001"),
+    "update_template": lambda api: api.update_template(1, "description", "notes"),
+    "delete_template": lambda api: api.delete_template(1),
+    "fetch_scripts": lambda api: api.fetch_scripts(),
+    "fetch_script": lambda api: api.fetch_script(1),
+    "create_script": lambda api: api.create_script("title", "content"),
+    "update_script": lambda api: api.update_script(1, "title", "content", False),
+    "delete_script": lambda api: api.delete_script(1),
+    "fetch_ssh_keys": lambda api: api.fetch_ssh_keys(),
+    "fetch_ssh_key": lambda api: api.fetch_ssh_key(1),
+    "create_ssh_key": lambda api: api.create_ssh_key("ssh-ed25519 AAAA", "alex"),
+    "delete_ssh_key": lambda api: api.delete_ssh_key(1),
+}
+
+TRANSPORTS: Dict[str, Callable] = {
+    "requests": lambda standin, concurrency: RequestsTransport(),
+    "pooled": lambda standin, concurrency: PooledTransport(pool_maxsize=concurrency),
+    "memory": lambda standin, concurrency: InMemoryTransport(standin.handle),
+}
+
+PARSE_PAYLOADS = {
+    "servers": (
+        _ServerListResponse,
+        lambda n: scale(store.SERVERS_FETCH_RESPONSE, "server", n),
+    ),
+    "actions": (
+        _ActionListResponse,
+        lambda n: scale(store.ACTIONS_FETCH_RESPONSE, "actions", n),
+    ),
+    "images": (
+        _ImageListResponse,
+        lambda n: scale(store.IMAGES_FETCH_RESPONSE, "images", n),
+    ),
+    "plans_available": (_PlanAvailableListResponse, make_plans_available),
+}
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict:
+    return {
+        "calls": len(latencies),
+        "calls_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def timed(func: Callable, api) -> float:
+    started = time.perf_counter()
+    func(api)
+    return time.perf_counter() - started
+
+
+def bench_method(api, func: Callable, iterations: int, concurrency: int) -> Dict:
+    func(api)
+    started = time.perf_counter()
+    sequential = [timed(func, api) for _ in range(iterations)]
+    sequential_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        concurrent = list(
+            pool.map(lambda _: timed(func, api), range(iterations * concurrency))
+        )
+    concurrent_elapsed = time.perf_counter() - started
+    return {
+        "sequential": summarize(sequential, sequential_elapsed),
+        "concurrent": dict(
+            summarize(concurrent, concurrent_elapsed), concurrency=concurrency
+        ),
+    }
+
+
+def bench_parse(sizes: List[int], repeat: int) -> Dict:
+    results = {}
+    for name, (model, make) in PARSE_PAYLOADS.items():
+        results[name] = []
+        for size in sizes:
+            payload = make(size).encode()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                model.model_validate_json(payload)
+                timings.append(time.perf_counter() - started)
+            best = min(timings)
+            results[name].append(
+                {
+                    "items": size,
+                    "bytes": len(payload),
+                    "parse_ms": best * 1000,
+                    "us_per_item": best / size * 1e6,
+                    "mb_per_sec": len(payload) / best / 1e6,
+                }
+            )
+    return results
+
+
+def metadata(args) -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "arguments": vars(args),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--servers", type=int, default=2000)
+    parser.add_argument("--actions", type=int, default=2000)
+    parser.add_argument("--images", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--parse-sizes", default="10,100,1000,5000")
+    parser.add_argument("--methods", default=",".join(METHODS))
+    parser.add_argument("--transport", choices=list(TRANSPORTS), default="requests")
+    parser.add_argument("--output", default="benchmarks/results/api.json")
+    args = parser.parse_args()
+
+    results = {"metadata": metadata(args), "methods": {}}
+    with StandIn(
+        servers=args.servers,
+        actions=args.actions,
+        images=args.images,
+        latency=args.latency,
+    ) as standin:
+        transport = TRANSPORTS[args.transport](standin, args.concurrency)
+        api = standin.api(transport=transport)
+        for name in args.methods.split(","):
+            result = bench_method(api, METHODS[name], args.iterations, args.concurrency)
+            results["methods"][name] = result
+            print(
+                f"{name:<24} "
+                f"seq {result['sequential']['calls_per_sec']:8.1f}/s "
+                f"p50 {result['sequential']['p50_ms']:7.2f}ms "
+                f"p99 {result['sequential']['p99_ms']:7.2f}ms | "
+                f"x{args.concurrency} "
+                f"{result['concurrent']['calls_per_sec']:8.1f}/s "
+                f"p99 {result['concurrent']['p99_ms']:7.2f}ms"
+            )
+
+    sizes = [int(size) for size in args.parse_sizes.split(",")]
+    results["parse"] = bench_parse(sizes, repeat=5)
+    for name, rows in results["parse"].items():
+        for row in rows:
+            print(
+                f"parse {name:<16} {row['items']:>6} items "
+                f"{row['bytes'] / 1024:9.1f}KiB {row['parse_ms']:9.2f}ms "
+                f"{row['us_per_item']:7.2f}us/item"
+            )
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Serial loop of ``turn_off_server`` against ``turn_off_servers``.
+
+Run from the repository root::
+
+    python -m benchmarks.bulk_power --servers 500 --latency 0.02
+"""
+
+import argparse
+import time
+
+from benchmarks._standin import StandIn
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--servers", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--max-workers", type=int, default=32)
+    args = parser.parse_args()
+
+    with StandIn(servers=args.servers, latency=args.latency, group="bench") as s:
+        api = s.api()
+        names = [server.name for server in api.fetch_servers()]
+
+        started = time.perf_counter()
+        for name in names:
+            api.turn_off_server(name)
+        serial = time.perf_counter() - started
+
+        started = time.perf_counter()
+        actions, errors = api.turn_off_servers(
+            group="bench", max_workers=args.max_workers
+        )
+        bulk = time.perf_counter() - started
+
+    assert len(actions) == len(names) and not errors
+    print(f"servers:            {len(names)}")
+    print(f"serial loop:        {serial:.2f}s")
+    print(f"turn_off_servers:   {bulk:.2f}s (max_workers={args.max_workers})")
+    print(f"speedup:            {serial / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Compares two result files of ``benchmarks.api`` and flags the regressions.
+
+Run from the repository root::
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    regressions = 0
+    for name, result in current["methods"].items():
+        if name not in baseline["methods"]:
+            continue
+        for mode in ("sequential", "concurrent"):
+            for metric in ("p50_ms", "p99_ms"):
+                before = baseline["methods"][name][mode][metric]
+                after = result[mode][metric]
+                change = (after - before) / before if before else 0
+                flag = ""
+                if change > args.threshold:
+                    flag = "  REGRESSION"
+                    regressions += 1
+                print(
+                    f"{name:<24} {mode:<10} {metric:<6} "
+                    f"{before:8.2f} -> {after:8.2f} ({change:+.0%}){flag}"
+                )
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
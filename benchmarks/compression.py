@@ -0,0 +1,118 @@
+"""
+Bytes saved and CPU traded by compressed responses on the large list endpoints.
+
+For ``fetch_servers``, ``fetch_plans_available`` and ``fetch_actions`` at each size,
+the synthetic payload of ``benchmarks.payloads`` is encoded with every encoding the
+client negotiates (identity and gzip, brotli and zstd when installed) and the
+benchmark reports:
+
+- wire bytes and the share saved;
+- the client side streaming decompression time (``ecsapi._compression.decode``);
+- the bandwidth below which compression pays off, bytes saved per second of
+  decompression;
+- the end to end time of the ``Api`` call against the stand-in serving the
+  encoding, on loopback where the network is free.
+
+Run from the repository root::
+
+    python -m benchmarks.compression --sizes 1000,10000 \
+        --output benchmarks/results/compression.json
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Callable, Dict
+
+from benchmarks import payloads
+from benchmarks._standin import StandIn, compress
+from src.ecsapi._compression import CHUNK_SIZE, accept_encoding, decode
+
+ENDPOINTS: Dict[str, tuple] = {
+    "fetch_servers": ("servers", payloads.servers_response),
+    "fetch_plans_available": ("plans_available", payloads.plans_available_response),
+    "fetch_actions": ("actions", payloads.actions_response),
+}
+
+
+def best_of(func: Callable, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def chunks(data: bytes):
+    return [data[i : i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+
+
+def measure(endpoint: str, size: int, encoding: str, repeat: int) -> Dict:
+    key, make = ENDPOINTS[endpoint]
+    body = make(size)
+    raw = body.encode()
+    wire = raw if encoding == "identity" else compress(raw, encoding)
+    split = chunks(wire)
+    decoding = "" if encoding == "identity" else encoding
+    decode_s = best_of(lambda: decode(split, decoding), repeat)
+    compress_s = (
+        0 if encoding == "identity" else best_of(lambda: compress(raw, encoding), 1)
+    )
+    compression = None if encoding == "identity" else encoding
+    with StandIn(payloads={key: body}, compression=compression) as standin:
+        api = standin.api(timeout=600)
+        call = getattr(api, endpoint)
+        call()
+        total_s = best_of(call, repeat)
+    saved = len(raw) - len(wire)
+    return {
+        "endpoint": endpoint,
+        "items": size,
+        "encoding": encoding,
+        "bytes": len(raw),
+        "wire_bytes": len(wire),
+        "saved_ratio": saved / len(raw),
+        "server_compress_s": compress_s,
+        "decode_s": decode_s,
+        "break_even_mbit_s": (saved * 8 / decode_s / 1e6) if decode_s else None,
+        "total_s": total_s,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmarks/results/compression.json")
+    args = parser.parse_args()
+
+    encodings = ["identity"] + [
+        e.strip() for e in accept_encoding().split(",") if e.strip() != "deflate"
+    ]
+    results = {"arguments": vars(args), "encodings": encodings, "rows": []}
+    for endpoint in args.endpoints.split(","):
+        for size in [int(size) for size in args.sizes.split(",")]:
+            for encoding in encodings:
+                row = measure(endpoint, size, encoding, args.repeat)
+                results["rows"].append(row)
+                break_even = row["break_even_mbit_s"]
+                print(
+                    f"{endpoint:<22} {size:>6} {encoding:<8} "
+                    f"{row['wire_bytes'] / 2**20:8.2f}MiB "
+                    f"saved {row['saved_ratio'] * 100:5.1f}% "
+                    f"decode {row['decode_s'] * 1000:7.1f}ms "
+                    f"total {row['total_s'] * 1000:8.1f}ms"
+                    + (f" pays off below {break_even:8.0f}Mbit/s" if break_even else "")
+                )
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
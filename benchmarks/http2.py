@@ -0,0 +1,183 @@
+"""
+Connections and latency of concurrent ``fetch_server_status`` calls over HTTP/1.1
+and HTTP/2.
+
+The routes of the stand-in are served as an ASGI app by hypercorn, which speaks
+HTTP/1.1 and HTTP/2 (h2c with prior knowledge) on the same port. Each transport
+sends ``--calls`` concurrent requests from as many threads, and the number of
+connections seen by the server (distinct client addresses), p50, p99 and wall time
+are reported.
+
+Needs the optional ``httpx[http2]`` and ``hypercorn`` packages. Run from the
+repository root::
+
+    python -m benchmarks.http2 --calls 200 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Set
+
+from benchmarks._standin import StandIn
+from benchmarks.api import percentile
+from src.ecsapi import Api
+from src.ecsapi._transport import HttpxTransport, PooledTransport, RequestsTransport
+
+TRANSPORTS: Dict[str, Callable] = {
+    "requests": lambda calls: RequestsTransport(),
+    "pooled": lambda calls: PooledTransport(pool_maxsize=calls),
+    "httpx-http1": lambda calls: HttpxTransport(http2=False, max_connections=calls),
+    "httpx-http2": lambda calls: HttpxTransport(
+        prior_knowledge=True, max_connections=calls
+    ),
+}
+
+
+class H2StandIn:
+    """
+    Serves ``StandIn.handle`` with hypercorn from a background event loop.
+    """
+
+    def __init__(self, standin: StandIn, latency: float = 0):
+        self.standin = standin
+        self.latency = latency
+        self.clients: Set = set()
+        self.port = None
+        self._loop = None
+        self._stop = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    async def app(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                else:
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        self.clients.add(tuple(scope["client"]))
+        more_body = True
+        while more_body:
+            more_body = (await receive()).get("more_body", False)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        status, headers, body = self.standin.handle(scope["method"], scope["path"])
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(k.encode(), v.encode()) for k, v in headers.items()]
+                + [(b"content-length", str(len(body)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def _run(self):
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+
+        config = Config()
+        config.bind = [f"127.0.0.1:{self.port}"]
+        config.loglevel = "ERROR"
+        config.h2_max_concurrent_streams = 1000
+        config.backlog = 1024
+
+        async def main():
+            self._stop = asyncio.Event()
+            await serve(self.app, config, shutdown_trigger=self._stop.wait)
+
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(main())
+
+    def __enter__(self):
+        # hypercorn does not report the port it bound, so a free one is picked here
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError("h2 stand-in did not start")
+
+    def api(self, **kwargs) -> Api:
+        return Api(
+            token="benchmark",
+            host="127.0.0.1",
+            port=self.port,
+            prefix="ecs",
+            version=2,
+            protocol="http",
+            **kwargs,
+        )
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join()
+
+
+def run(server: H2StandIn, name: str, calls: int) -> Dict:
+    server.clients.clear()
+    transport = TRANSPORTS[name](calls)
+    api = server.api(transport=transport)
+    api.fetch_server_status("ec000001")
+    server.clients.clear()
+
+    def timed(_):
+        started = time.perf_counter()
+        api.fetch_server_status("ec000001")
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=calls) as pool:
+        latencies = list(pool.map(timed, range(calls)))
+    elapsed = time.perf_counter() - started
+    transport.close()
+    return {
+        "transport": name,
+        "calls": calls,
+        "connections": len(server.clients),
+        "elapsed_s": elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--transports", default=",".join(TRANSPORTS))
+    parser.add_argument("--output", default="benchmarks/results/http2.json")
+    args = parser.parse_args()
+
+    results = {"arguments": vars(args), "transports": []}
+    with H2StandIn(StandIn(), latency=args.latency) as server:
+        for name in args.transports.split(","):
+            row = run(server, name, args.calls)
+            results["transports"].append(row)
+            print(
+                f"{name:<12} {row['connections']:>4} connections "
+                f"wall {row['elapsed_s'] * 1000:8.1f}ms "
+                f"p50 {row['p50_ms']:8.2f}ms p99 {row['p99_ms']:8.2f}ms"
+            )
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Reload cost of an ``InventorySnapshot`` against a live ``fetch_servers``.
+
+For each size a synthetic ``/servers`` payload (``benchmarks.payloads``) is served
+by the local stand-in and the benchmark reports:
+
+- end to end time of ``fetch_servers``;
+- time to write the snapshot, its size against the JSON payload;
+- time to open the snapshot (index only), to read one server and to decode all;
+- time and bytes appended by ``update`` when 1% of the servers changed.
+
+Run from the repository root::
+
+    python -m benchmarks.inventory_snapshot --sizes 1000,10000,50000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict
+
+from benchmarks import payloads
+from benchmarks._standin import StandIn
+from src.ecsapi import InventorySnapshot
+
+
+def best_of(func: Callable, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def measure(size: int, repeat: int, directory: str) -> Dict:
+    body = payloads.servers_response(size)
+    with StandIn(payloads={"servers": body}) as standin:
+        api = standin.api(timeout=600)
+        servers = api.fetch_servers()
+        fetch_s = best_of(api.fetch_servers, repeat)
+
+    path = os.path.join(directory, f"inventory-{size}.ecsi")
+    write_s = best_of(lambda: InventorySnapshot.write(path, servers).close(), repeat)
+
+    def open_close():
+        InventorySnapshot(path).close()
+
+    def read_one():
+        with InventorySnapshot(path) as snapshot:
+            snapshot[servers[size // 2].name]
+
+    def read_all():
+        with InventorySnapshot(path) as snapshot:
+            snapshot.servers()
+
+    open_s = best_of(open_close, repeat)
+    one_s = best_of(read_one, repeat)
+    all_s = best_of(read_all, repeat)
+
+    changed = [
+        server.model_copy(update={"notes": "changed"}) if i % 100 == 0 else server
+        for i, server in enumerate(servers)
+    ]
+    before = os.path.getsize(path)
+    with InventorySnapshot(path) as snapshot:
+        started = time.perf_counter()
+        delta = snapshot.update(changed)
+        update_s = time.perf_counter() - started
+    return {
+        "items": size,
+        "json_bytes": len(body),
+        "snapshot_bytes": before,
+        "fetch_servers_s": fetch_s,
+        "write_s": write_s,
+        "open_s": open_s,
+        "read_one_s": one_s,
+        "read_all_s": all_s,
+        "update_s": update_s,
+        "update_changed": len(delta.changed),
+        "update_appended_bytes": os.path.getsize(path) - before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--output", default="benchmarks/results/inventory_snapshot.json"
+    )
+    args = parser.parse_args()
+
+    results = {"arguments": vars(args), "rows": []}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in [int(size) for size in args.sizes.split(",")]:
+            row = measure(size, args.repeat, directory)
+            results["rows"].append(row)
+            print(
+                f"{size:>6} servers "
+                f"fetch {row['fetch_servers_s'] * 1000:8.1f}ms "
+                f"open {row['open_s'] * 1000:7.2f}ms "
+                f"one {row['read_one_s'] * 1000:7.2f}ms "
+                f"all {row['read_all_s'] * 1000:8.1f}ms "
+                f"size {row['snapshot_bytes'] / row['json_bytes'] * 100:5.1f}% "
+                f"delta {row['update_appended_bytes'] / 1024:7.1f}KiB "
+                f"in {row['update_s'] * 1000:7.1f}ms"
+            )
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Synthetic payloads modeled on the ``Server``, ``_PlanAvailable`` and ``Action``
+schemas, for large-account benchmarks.
+
+The generators are deterministic for a given ``seed`` and vary the optional and
+nested parts (snapshots with ``snapshot_parent`` chains, support, reserved plans,
+host servers) so that parsing exercises every branch of the models.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+LOCATIONS = ["it-fr2", "it-mi2", "ch-lug1", "bg-sof1"]
+STATUSES = ["Booted", "Booting", "Deleting", "Customizing", "Fail"]
+ACTION_STATUSES = ["completed", "in-progress", "failed"]
+
+
+def _date(rng: random.Random) -> str:
+    return (EPOCH + timedelta(seconds=rng.randrange(365 * 24 * 3600))).isoformat()
+
+
+def snapshot(rng: random.Random, server: str, depth: int = 1) -> Optional[Dict]:
+    """
+    Builds a ``Snapshot`` whose ``snapshot_parent`` chain is ``depth`` long.
+    """
+    parent = None
+    for level in range(depth):
+        parent = {
+            "id": rng.randrange(1, 10**6),
+            "name": f"{server}-SNP-{level}",
+            "user": "admin",
+            "snapshot_parent": parent,
+            "snapshot_parent_name": parent["name"] if parent else None,
+            "is_last_restored": level == depth - 1,
+            "protected": rng.random() < 0.5,
+            "restoring": False,
+            "source_server": server,
+            "status": "CD",
+            "status_label": "Created",
+            "uid": f"{rng.getrandbits(128):032x}",
+            "description": "benchmark",
+            "notes": "benchmark",
+            "active_flag": True,
+            "size_on_disk": rng.randrange(10**6, 10**9),
+            "created_at": _date(rng),
+            "updated_at": _date(rng),
+            "deleted_at": None,
+            "api_version_value": 5,
+            "api_version": "v5",
+        }
+    return parent
+
+
+def server(rng: random.Random, index: int, snapshot_depth: int = 1) -> Dict:
+    name = f"ec{index:06d}"
+    reserved = rng.random() < 0.2
+    return {
+        "name": name,
+        "ipv4": f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}",
+        "ipv6": f"fe80::{index:x}",
+        "group": f"eg{rng.randrange(100):05d}" if rng.random() < 0.5 else None,
+        "plan": f"ECS{rng.randrange(1, 8)}",
+        "plan_size": {
+            "core": str(rng.choice([1, 2, 4, 8])),
+            "ram": str(rng.choice([1024, 2048, 4096, 8192])),
+            "disk": str(rng.choice([20, 40, 80, 160])),
+            "gpu": "0",
+            "gpu_label": None,
+            "host_type": "ECS",
+        },
+        "reserved_plans": (
+            [
+                {
+                    "reserved_plan": rng.randrange(1, 100),
+                    "reserved_months": 12,
+                    "plan": rng.randrange(1, 8),
+                    "discount": 20,
+                    "start_date": _date(rng),
+                    "end_date": _date(rng),
+                    "server": name,
+                }
+            ]
+            if reserved
+            else []
+        ),
+        "last_restored_snapshot": (
+            snapshot(rng, name, snapshot_depth) if snapshot_depth else None
+        ),
+        "is_reserved": reserved,
+        "reserved_until": _date(rng) if reserved else "",
+        "support": (
+            {
+                "server__name": name,
+                "server_notes": "benchmark",
+                "support_title": "Global",
+                "support_code": "global",
+                "immutable": False,
+                "start": _date(rng),
+                "end": None,
+                "may_downgrade": True,
+                "weigth": 1,
+                "days": 30,
+                "cancelled": False,
+                "cancelled_at": None,
+            }
+            if rng.random() < 0.3
+            else None
+        ),
+        "location": rng.choice(LOCATIONS),
+        "location_label": "Frosinone",
+        "notes": f"server {index}",
+        "so": "ubuntu-2404",
+        "so_label": "Ubuntu 24.04",
+        "creation_date": _date(rng),
+        "deletion_date": None,
+        "active_flag": True,
+        "status": rng.choice(STATUSES),
+        "progress": rng.randrange(101),
+        "api_version": "v5",
+        "api_version_value": 5,
+        "user": "admin",
+        "virttype": "KVM",
+    }
+
+
+def image(rng: random.Random, index: int) -> Dict:
+    return {
+        "id": index,
+        "name": f"image-{index}",
+        "creation_date": _date(rng),
+        "deletion_date": None,
+        "active_flag": True,
+        "status": "CD",
+        "uuid": f"{rng.getrandbits(128):032x}",
+        "description": f"Image {index}",
+        "notes": "",
+        "public": True,
+        "cloud_image": rng.random() < 0.5,
+        "so_base": "Debian",
+        "required_disk": 20,
+        "api_version": "v4",
+        "api_version_value": 4,
+        "version": str(index),
+    }
+
+
+def plan_available(
+    rng: random.Random, index: int, images: int = 20, hosts: int = 4
+) -> Dict:
+    return {
+        "id": index,
+        "name": f"eCS{index}",
+        "cpu": "1",
+        "ram": "1024",
+        "disk": "20",
+        "gpu": "0",
+        "gpu_label": None,
+        "hourly_price": 0.019,
+        "montly_price": 14,
+        "windows": False,
+        "host_type": "ECS",
+        "available": True,
+        "default_image": None,
+        "os_availables": [image(rng, i) for i in range(images)],
+        "region_availables": [
+            {
+                "region": location,
+                "hosts": [
+                    {
+                        "host": f"ecs{h}.host.seeweb.it",
+                        "servers": [
+                            {"name": f"ec{rng.randrange(10**6):06d}", "notes": ""}
+                            for _ in range(rng.randrange(4))
+                        ],
+                    }
+                    for h in range(hosts)
+                ],
+            }
+            for location in LOCATIONS
+        ],
+    }
+
+
+def action(rng: random.Random, index: int) -> Dict:
+    status = rng.choice(ACTION_STATUSES)
+    return {
+        "id": index,
+        "status": status,
+        "user": "admin",
+        "created_at": _date(rng),
+        "started_at": _date(rng),
+        "completed_at": _date(rng) if status != "in-progress" else None,
+        "resource": f"ec{rng.randrange(10**6):06d}",
+        "resource_type": "ECS",
+        "type": rng.choice(["power_on", "power_off", "create", "delete"]),
+        "progress": 100 if status != "in-progress" else rng.randrange(100),
+    }
+
+
+def servers_response(count: int, seed: int = 0, snapshot_depth: int = 1) -> str:
+    rng = random.Random(seed)
+    items: List[Dict] = [server(rng, i, snapshot_depth) for i in range(count)]
+    return json.dumps({"status": "ok", "count": count, "server": items})
+
+
+def plans_available_response(count: int, seed: int = 0, images: int = 20) -> str:
+    rng = random.Random(seed)
+    items = [plan_available(rng, i, images) for i in range(count)]
+    return json.dumps({"status": "ok", "plans": items})
+
+
+def actions_response(count: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    items = [action(rng, i) for i in range(count)]
+    return json.dumps({"status": "ok", "actions": items, "total_actions": count})
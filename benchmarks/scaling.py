@@ -0,0 +1,284 @@
+"""
+Time and memory curves of the large list endpoints at growing account sizes.
+
+For each of ``fetch_servers``, ``fetch_plans_available`` and ``fetch_actions`` and
+each size, a fresh process serves a synthetic payload (``benchmarks.payloads``)
+from the local stand-in and reports:
+
+- end to end time of the ``Api`` call and time of the parse step alone;
+- the share of the parse spent on datetimes and on nested models, measured by
+  parsing the same payload with models where datetimes are plain strings or
+  nested models are plain dicts;
+- peak RSS growth, peak traced memory and allocated blocks per item.
+
+A growth exponent is fitted on the log-log curve of each metric and flagged when it
+is super-linear. The same is done on the depth of the ``snapshot_parent`` chain of
+``Snapshot``, which is parsed recursively.
+
+Run from the repository root::
+
+    python -m benchmarks.scaling --sizes 1000,10000,50000 \
+        --output benchmarks/results/scaling.json
+"""
+
+import argparse
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List, Union, get_args, get_origin
+
+from pydantic import BaseModel, Field, create_model
+
+from benchmarks import payloads
+from benchmarks._standin import StandIn
+from src.ecsapi._action import _ActionListResponse
+from src.ecsapi._plan import _PlanAvailableListResponse
+from src.ecsapi._server import _ServerListResponse
+
+# timings below this are too noisy to fit a growth exponent
+NOISE_FLOOR = 0.001
+
+ENDPOINTS = {
+    "fetch_servers": (
+        "servers",
+        _ServerListResponse,
+        lambda n, depth: payloads.servers_response(n, snapshot_depth=depth),
+    ),
+    "fetch_plans_available": (
+        "plans_available",
+        _PlanAvailableListResponse,
+        lambda n, depth: payloads.plans_available_response(n),
+    ),
+    "fetch_actions": (
+        "actions",
+        _ActionListResponse,
+        lambda n, depth: payloads.actions_response(n),
+    ),
+}
+
+
+# region ablated models
+
+
+def ablate(model, datetimes: bool, nested: bool, seen=None):
+    """
+    Copies ``model`` replacing datetimes with ``str`` and/or nested models with
+    ``dict``. Recursive references stop at ``dict``.
+    """
+    seen = set() if seen is None else seen
+    seen = seen | {model}
+    fields = {}
+    for name, info in model.model_fields.items():
+        annotation = _ablate_type(info.annotation, datetimes, nested, seen)
+        default = ... if info.is_required() else info.get_default()
+        fields[name] = (annotation, Field(default, alias=info.alias))
+    return create_model(f"{model.__name__}Ablated", **fields)
+
+
+def _ablate_type(tp, datetimes: bool, nested: bool, seen):
+    if tp is datetime and datetimes:
+        return str
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        if nested or tp in seen:
+            return Dict[str, Any]
+        return ablate(tp, datetimes, nested, seen)
+    origin, args = get_origin(tp), get_args(tp)
+    if origin in (list, List):
+        return List[_ablate_type(args[0], datetimes, nested, seen)]
+    if origin is Union:
+        return Union[tuple(_ablate_type(a, datetimes, nested, seen) for a in args)]
+    return tp
+
+
+# endregion
+# region child process
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure(endpoint: str, size: int, depth: int, repeat: int) -> Dict:
+    key, model, make = ENDPOINTS[endpoint]
+    body = make(size, depth).encode()
+    without_datetimes = ablate(model, datetimes=True, nested=False)
+    without_nested = ablate(model, datetimes=False, nested=True)
+
+    with StandIn(payloads={key: body.decode()}) as standin:
+        api = standin.api(timeout=600)
+        call = getattr(api, endpoint)
+
+        rss_before = current_rss()
+        maxrss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        call()
+        rss_peak = (
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - maxrss_before
+        ) * 1024
+
+        total = best_of(call, repeat)
+        parse = best_of(lambda: model.model_validate_json(body), repeat)
+        parse_without_datetimes = best_of(
+            lambda: without_datetimes.model_validate_json(body), repeat
+        )
+        parse_without_nested = best_of(
+            lambda: without_nested.model_validate_json(body), repeat
+        )
+
+        tracemalloc.start()
+        result = call()
+        snapshot = tracemalloc.take_snapshot()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+        del result
+
+    return {
+        "endpoint": endpoint,
+        "items": size,
+        "snapshot_depth": depth,
+        "bytes": len(body),
+        "total_s": total,
+        "parse_s": parse,
+        "datetime_s": max(parse - parse_without_datetimes, 0),
+        "nested_s": max(parse - parse_without_nested, 0),
+        "rss_growth_bytes": max(rss_peak, 0),
+        "rss_before_bytes": rss_before,
+        "traced_peak_bytes": traced_peak,
+        "blocks_per_item": blocks / size,
+        "bytes_per_item": traced_peak / size,
+    }
+
+
+# endregion
+# region parent process
+
+
+def run_child(endpoint: str, size: int, depth: int, repeat: int) -> Dict:
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.scaling",
+            "--child",
+            endpoint,
+            str(size),
+            str(depth),
+            str(repeat),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def exponent(xs: List[float], ys: List[float]) -> float:
+    """
+    Slope of the least squares fit of log(y) on log(x).
+    """
+    points = [(math.log(x), math.log(y)) for x, y in zip(xs, ys) if x > 0 and y > 0]
+    if len(points) < 2:
+        return float("nan")
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    num = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    den = sum((x - mean_x) ** 2 for x, _ in points)
+    return num / den if den else float("nan")
+
+
+def curves(rows: List[Dict], variable: str, threshold: float) -> Dict:
+    result = {}
+    for metric in ("total_s", "parse_s", "datetime_s", "nested_s", "traced_peak_bytes"):
+        values = [r[metric] for r in rows]
+        if metric.endswith("_s") and min(values) < NOISE_FLOOR:
+            slope = float("nan")
+        else:
+            slope = exponent([r[variable] for r in rows], values)
+        result[metric] = {
+            "exponent": None if math.isnan(slope) else slope,
+            "super_linear": slope > threshold,
+        }
+    return result
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        endpoint, size, depth, repeat = sys.argv[2:6]
+        print(json.dumps(measure(endpoint, int(size), int(depth), int(repeat))))
+        return
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--depths", default="1,4,16,64")
+    parser.add_argument("--depth-items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=1.15)
+    parser.add_argument("--output", default="benchmarks/results/scaling.json")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    depths = [int(depth) for depth in args.depths.split(",")]
+    results = {"arguments": vars(args), "sizes": {}, "depths": {}}
+    flagged = []
+
+    for endpoint in args.endpoints.split(","):
+        rows = []
+        for size in sizes:
+            row = run_child(endpoint, size, 1, args.repeat)
+            rows.append(row)
+            print(
+                f"{endpoint:<22} {size:>7} items {row['bytes'] / 2**20:8.1f}MiB "
+                f"total {row['total_s']:7.3f}s parse {row['parse_s']:7.3f}s "
+                f"datetime {row['datetime_s']:6.3f}s nested {row['nested_s']:6.3f}s "
+                f"rss +{row['rss_growth_bytes'] / 2**20:7.1f}MiB "
+                f"{row['blocks_per_item']:6.1f} blocks/item"
+            )
+        fit = curves(rows, "items", args.threshold)
+        results["sizes"][endpoint] = {"rows": rows, "curves": fit}
+        flagged += [f"{endpoint} {m}" for m, c in fit.items() if c["super_linear"]]
+
+    rows = []
+    for depth in depths:
+        row = run_child("fetch_servers", args.depth_items, depth, args.repeat)
+        rows.append(row)
+        print(
+            f"snapshot depth {depth:>4} ({args.depth_items} servers) "
+            f"parse {row['parse_s']:7.3f}s "
+            f"{row['bytes_per_item'] / 1024:8.1f}KiB/item"
+        )
+    fit = curves(rows, "snapshot_depth", args.threshold)
+    results["depths"]["fetch_servers"] = {"rows": rows, "curves": fit}
+    flagged += [f"snapshot depth {m}" for m, c in fit.items() if c["super_linear"]]
+
+    for name in flagged:
+        print(f"SUPER-LINEAR: {name}")
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+# endregion
+
+if __name__ == "__main__":
+    main()
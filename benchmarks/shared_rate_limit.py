@@ -0,0 +1,92 @@
+"""
+Cost of drawing from a ``SharedTokenBucket`` against an in process ``TokenBucket``.
+
+The rate is high enough that no call ever waits, so only the overhead of taking a
+token is measured: for each number of processes hammering the same bucket file the
+benchmark reports the aggregate calls/sec and the p50 and p99 latency of a single
+``try_acquire``.
+
+Run from the repository root::
+
+    python -m benchmarks.shared_rate_limit --processes 1,2,4,8 --calls 2000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from src.ecsapi import SharedTokenBucket, TokenBucket
+
+UNLIMITED = 1e12
+
+
+def percentile(values: List[float], q: float) -> float:
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def hammer(path: str, calls: int, start_at: float) -> List[float]:
+    if path:
+        bucket = SharedTokenBucket(UNLIMITED, key="benchmark", path=path)
+    else:
+        bucket = TokenBucket(UNLIMITED)
+    # start together so that the processes really contend
+    time.sleep(max(start_at - time.time(), 0))
+    timings = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        bucket.try_acquire()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def measure(path: str, processes: int, calls: int) -> Dict:
+    start_at = time.time() + 0.5
+    with multiprocessing.Pool(processes) as pool:
+        started = time.time()
+        results = pool.starmap(hammer, [(path, calls, start_at)] * processes)
+        elapsed = time.time() - max(started, start_at)
+    timings = [t for result in results for t in result]
+    return {
+        "backend": "sqlite" if path else "memory",
+        "processes": processes,
+        "calls": len(timings),
+        "calls_per_s": len(timings) / elapsed,
+        "p50_s": percentile(timings, 50),
+        "p99_s": percentile(timings, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", default="1,2,4,8")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--output", default="benchmarks/results/shared_rate_limit.json")
+    args = parser.parse_args()
+
+    results = {"arguments": vars(args), "rows": []}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "limits.sqlite3")
+        for processes in [int(p) for p in args.processes.split(",")]:
+            for backend in ("", path):
+                row = measure(backend, processes, args.calls)
+                results["rows"].append(row)
+                print(
+                    f"{row['backend']:>6} {processes:>3} processes "
+                    f"{row['calls_per_s']:>12,.0f} calls/s "
+                    f"p50 {row['p50_s'] * 1e6:8.1f}us "
+                    f"p99 {row['p99_s'] * 1e6:8.1f}us"
+                )
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
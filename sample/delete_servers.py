@@ -0,0 +1,10 @@
+from ecsapi import Api
+
+api = Api()
+
+targets = api.delete_servers(server_filter=lambda s: s.notes == "test", dry_run=True)
+print(f"deleting {[server.name for server in targets]}...")
+actions, errors = api.delete_servers(server_filter=lambda s: s.notes == "test")
+for name, error in errors.items():
+    print(f"server {name} not deleted: {error}")
+print(f"{len(actions)} servers deleted")
@@ -0,0 +1,13 @@
+from ecsapi import ServerCreateRequest
+from ecsapi.testing import FakeEcsServer, FakeEcsConfig
+
+config = FakeEcsConfig(boot_time=3, latency=0.05, jitter=0.05, error_rate=0.01)
+
+with FakeEcsServer(config=config) as server:
+    api = server.api()
+    created, action_id = api.create_server(
+        ServerCreateRequest(plan="eCS1", location="it-fr2", image="ubuntu-2404")
+    )
+    print(f"{created.name}: {created.status}")
+    api.watch_action(action_id, fetch_every=0.5)
+    print(f"{created.name}: {api.fetch_server(created.name).status}")
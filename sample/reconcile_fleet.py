@@ -0,0 +1,22 @@
+import yaml  # pip install pyyaml
+
+from ecsapi import Api, FleetReconciler, FleetSpec
+
+# fleet.yaml:
+# group: eg12345
+# prune: true
+# servers:
+#   - notes: web-1
+#     plan: eCS1
+#     location: it-fr2
+#     image: ubuntu-2404
+with open("fleet.yaml") as f:
+    spec = FleetSpec.model_validate(yaml.safe_load(f))
+
+reconciler = FleetReconciler(Api())
+plan = reconciler.plan(spec)
+for change in plan.changes:
+    print(f"{change.action.value} {change.key} {change.fields}")
+results, errors = reconciler.apply(plan, max_workers=20)
+for key, error in errors.items():
+    print(f"{key} failed: {error}")
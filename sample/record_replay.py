@@ -0,0 +1,17 @@
+import cProfile
+
+from ecsapi import Api, RecordingTransport, ReplayTransport
+
+
+def session(api: Api):
+    for server in api.fetch_servers():
+        api.fetch_server_status(server.name)
+
+
+# record against the live api
+with RecordingTransport("session.cassette") as transport:
+    session(Api(transport=transport))
+
+# replay offline, as fast as possible, to profile the client side
+api = Api(token="replay", transport=ReplayTransport("session.cassette", speed=None))
+cProfile.run("session(api)", sort="cumulative")
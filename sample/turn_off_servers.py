@@ -0,0 +1,9 @@
+from ecsapi import Api
+
+api = Api()
+
+actions, errors = api.turn_off_servers(group="eg12345", max_workers=20, wait=True)
+for name, action in actions.items():
+    print(f"server {name} turned off by action {action.id}")
+for name, error in errors.items():
+    print(f"server {name} failed: {error}")
@@ -0,0 +1,12 @@
+from ecsapi import Api, ServerStatusEnum
+
+api = Api()
+
+names = [server.name for server in api.fetch_servers()]
+for server in api.wait_for_servers(
+    names,
+    status=ServerStatusEnum.booted,
+    max_wait=600,
+    on_fetch=lambda pending, i: print(f"still waiting for {len(pending)} servers"),
+):
+    print(f"server {server.name} is {server.status}")
@@ -0,0 +1,9 @@
+from ecsapi import Api, InventoryWatcher, InventoryEventEnum
+
+api = Api()
+
+with InventoryWatcher(api, interval=10) as watcher:
+    watcher.subscribe(callback=lambda e: print(f"{e.type.value}: {e.name} {e.fields}"))
+    for event in watcher.subscribe():
+        if event.type == InventoryEventEnum.status_changed:
+            print(f"{event.name}: {event.previous.status} -> {event.server.status}")
@@ -10,12 +10,46 @@ from ._server import (
     ServerCreateRequest,
     ServerStatusEnum,
 )
+from ._server_ref import ServerRef
 from ._cloud_script import CloudScript, CloudScriptListAdapter
 from ._discount_record import DiscountRecord, DiscountRecordListAdapter
 from ._snapshot import Snapshot, SnapshotListAdapter
 from ._server_support import ServerSupport, ServerSupportListAdapter
 from ._action import Action, ActionListAdapter, ActionStatusEnum
 from ._ssh_key import SshKey, SshKeyListAdapter
+from ._reconcile import (
+    FleetReconciler,
+    FleetSpec,
+    FleetServerSpec,
+    ReconcilePlan,
+    ReconcileChange,
+    ReconcileActionEnum,
+)
+from ._inventory import (
+    InventoryWatcher,
+    InventorySubscription,
+    InventoryEvent,
+    InventoryEventEnum,
+)
+from ._inventory_snapshot import InventorySnapshot, InventoryDelta
+from ._hooks import RequestEvent, RequestObserver
+from ._metrics import ApiMetrics
+from ._transport import (
+    Transport,
+    RequestsTransport,
+    PooledTransport,
+    InMemoryTransport,
+    HttpxTransport,
+    LimitedTransport,
+    RecordingTransport,
+    ReplayTransport,
+)
+from ._cache import DiskCache
+from ._limits import TokenBucket, SharedTokenBucket, AdaptiveConcurrencyLimiter
+from ._failover import FailoverTransport
+from ._hedging import HedgingTransport
+from ._multi_account import MultiAccountApi
+from ._scheduler import PriorityScheduler
 from dotenv import load_dotenv
 import os
 
@@ -36,12 +70,37 @@ __all__ = (
         "Image",
         "Region",
         "Server",
+        "ServerRef",
         "CloudScript",
         "DiscountRecord",
         "Snapshot",
         "ServerSupport",
         "Action",
         "SshKey",
+        "FleetReconciler",
+        "InventoryWatcher",
+        "InventorySubscription",
+        "InventoryEvent",
+        "InventorySnapshot",
+        "RequestEvent",
+        "RequestObserver",
+        "ApiMetrics",
+        "Transport",
+        "RequestsTransport",
+        "PooledTransport",
+        "InMemoryTransport",
+        "HttpxTransport",
+        "LimitedTransport",
+        "FailoverTransport",
+        "HedgingTransport",
+        "RecordingTransport",
+        "ReplayTransport",
+        "DiskCache",
+        "TokenBucket",
+        "SharedTokenBucket",
+        "AdaptiveConcurrencyLimiter",
+        "PriorityScheduler",
+        "MultiAccountApi",
     ]
     + [
         "PlanListAdapter",
@@ -59,10 +118,17 @@ __all__ = (
         "ServerCreateRequestNetworkVlan",
         "ServerCreateRequestNetwork",
         "ServerCreateRequest",
+        "FleetSpec",
+        "FleetServerSpec",
+        "ReconcilePlan",
+        "ReconcileChange",
+        "InventoryDelta",
     ]
     + [
         "ServerStatusEnum",
         "ImageStatusEnum",
         "ActionStatusEnum",
+        "ReconcileActionEnum",
+        "InventoryEventEnum",
     ]
 )
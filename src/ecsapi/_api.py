@@ -1,8 +1,22 @@
 import os
-from time import sleep
+from functools import partial
+from time import sleep, monotonic, perf_counter, time
+from typing import (
+    Optional,
+    Literal,
+    Any,
+    get_args,
+    Dict,
+    Union,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+)
+from urllib.parse import urlencode
 
 import requests
-from typing import Optional, Literal, Any, get_args, Dict, Union, Callable
 
 from ._action import Action, _ActionListResponse, _ActionRetrieveResponse
 from ._cloud_script import (
@@ -37,13 +51,36 @@ from ._server import (
     ServerCreateRequest,
     _ServerCreateRequestResponse,
     _ServerUpdateRequest,
+    _patch_server,
     _ServerActionRequest,
     _ServerDeleteResponse,
+    Server,
+    ServerStatusEnum,
 )
 from ._ssh_key import (
     _SshKeyListResponse,
     _SshKeyRetrieveResponse,
     _SshKeyCreateRequest,
+    _local_ssh_key,
+    _ssh_keys_by_label,
+    SshKey,
+)
+from ._server_ref import ServerRef, DEFAULT_SERVER_REF_TTL
+from ._inventory_snapshot import InventorySnapshot
+from ._hooks import RequestEvent, RequestObserver
+from ._metrics import ApiMetrics
+from ._transport import Transport, RequestsTransport, _build_response, sending
+from ._cache import DiskCache
+from ._failover import FailoverTransport
+from ._deadline import Timeout, Deadline, deadline, current_deadline, budget_of
+from .utils import run_bulk, DEFAULT_MAX_WORKERS
+from ._limits import AdaptiveConcurrencyLimiter
+from ._scheduler import (
+    PriorityScheduler,
+    Priority,
+    priority,
+    current_priority,
+    DEFAULT_ENDPOINT_PRIORITIES,
 )
 from .errors import (
     UnauthorizedError,
@@ -53,6 +90,9 @@ from .errors import (
     ActionMaxRetriesExceededError,
     ServerError,
     PlanNotAvailableError,
+    ServersWaitTimeoutError,
+    DeadlineExceededError,
+    InventorySnapshotError,
 )
 
 AllowedVersions = Literal[2]
@@ -64,6 +104,7 @@ PORT_ENV_VAR = "ECSAPI_PORT"
 PREFIX_ENV_VAR = "ECSAPI_PREFIX"
 VERSION_ENV_VAR = "ECSAPI_VERSION"
 PROTOCOL_ENV_VAR = "ECSAPI_PROTOCOL"
+ENDPOINTS_ENV_VAR = "ECSAPI_ENDPOINTS"
 
 DEFAULT_HOST = "api.seeweb.it"
 DEFAULT_PORT = 80
@@ -71,6 +112,7 @@ DEFAULT_PORT_SSL = 443
 DEFAULT_PREFIX = "ecs"
 DEFAULT_VERSION = 2
 DEFAULT_PROTOCOL = "https"
+DEFAULT_PER_SERVER_THRESHOLD = 5
 
 # region private init vars
 
@@ -118,6 +160,15 @@ def __initialize_protocol__(
     return protocol
 
 
+def __initialize_endpoints__(
+    endpoints: Optional[List[str]] = None,
+) -> Optional[List[str]]:
+    endpoints = __initialize_env__(endpoints, None, ENDPOINTS_ENV_VAR)
+    if isinstance(endpoints, str):
+        endpoints = [e.strip() for e in endpoints.split(",") if e.strip()]
+    return endpoints or None
+
+
 def __initialize_port__(
     port: Optional[int] = None, protocol: Optional[AllowedProtocols] = "https"
 ):
@@ -145,7 +196,14 @@ class Api:
         prefix: Optional[str] = None,
         version: Optional[AllowedVersions] = None,
         protocol: Optional[AllowedProtocols] = None,
-        timeout: Optional[int] = 10,
+        timeout: Optional[Timeout] = 10,
+        metrics: bool = False,
+        transport: Optional[Transport] = None,
+        connect_timeout: Optional[float] = None,
+        cache: Optional[DiskCache] = None,
+        endpoints: Optional[List[str]] = None,
+        adaptive_concurrency: Union[bool, AdaptiveConcurrencyLimiter] = False,
+        scheduler: Optional[PriorityScheduler] = None,
     ):
         self.token = __initialize_token__(token)
         self._host = __initialize_host__(host)
@@ -154,6 +212,52 @@ class Api:
         self._protocol: AllowedProtocols = __initialize_protocol__(protocol)
         self._port = __initialize_port__(port, self._protocol)
         self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.cache = cache
+        self.transport: Transport = transport or RequestsTransport()
+        endpoints = __initialize_endpoints__(endpoints)
+        if endpoints is not None:
+            self.transport = FailoverTransport(endpoints, self.transport)
+        self.concurrency: Optional[AdaptiveConcurrencyLimiter] = None
+        if isinstance(adaptive_concurrency, AdaptiveConcurrencyLimiter):
+            self.concurrency = adaptive_concurrency
+        elif adaptive_concurrency:
+            self.concurrency = AdaptiveConcurrencyLimiter()
+        self.scheduler = scheduler
+        self._observers: List[RequestObserver] = []
+        self.metrics: Optional[ApiMetrics] = None
+        if metrics:
+            self.metrics = ApiMetrics()
+            self.add_observer(self.metrics)
+
+    def add_observer(self, observer: RequestObserver):
+        """
+        Registers a ``RequestObserver`` notified around every request.
+
+        Without observers no event is built, so the hooks cost a single check per
+        request.
+        """
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: RequestObserver):
+        self._observers.remove(observer)
+
+    def deadline(self, seconds: Optional[float]):
+        """
+        Context manager sharing a budget of ``seconds`` among every request sent in
+        its block, by this or any other ``Api``: each timeout is cut to the time
+        left and ``DeadlineExceededError`` is raised once the budget is spent.
+        """
+        return deadline(seconds)
+
+    def priority(self, name: Optional[Priority]):
+        """
+        Context manager tagging every request sent in its block, also by the bulk
+        workers, with the priority class ``name`` used by ``Api(scheduler=...)``.
+        Outside of it the priority depends on the endpoint (see
+        ``DEFAULT_ENDPOINT_PRIORITIES``).
+        """
+        return priority(name)
 
     # region private utility
 
@@ -173,30 +277,224 @@ class Api:
         params: Optional[Dict] = None,
         body: Optional[Dict] = None,
         headers: Optional[Dict] = None,
-        timeout: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        endpoint: Optional[str] = None,
     ):
+        if self.cache is None:
+            return self.__send_request(
+                url, method, params, body, headers, timeout, endpoint
+            )
+        if method == "GET" and self.cache.ttl(endpoint) is not None:
+            return self.__cached_get(url, params, headers, timeout, endpoint)
+        response = self.__send_request(
+            url, method, params, body, headers, timeout, endpoint
+        )
+        if method != "GET" and endpoint and response.status_code < 400:
+            self.cache.invalidate_write(self.__cache_namespace(), endpoint)
+        return response
+
+    def __cache_namespace(self) -> str:
+        return DiskCache.namespace(self.__generate_base_url(), self.token)
+
+    def __cached_get(self, url, params, headers, timeout, endpoint):
+        namespace = self.__cache_namespace()
+        key = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+        entry = self.cache.get(namespace, key)
+        if entry is not None and entry.fresh(self.cache.ttl(endpoint)):
+            self.cache.count(hit=True)
+            return _build_response("GET", url, params, None, 200, {}, entry.content)
+        self.cache.count(hit=False)
+        if entry is not None:
+            headers = dict(headers or {}, **entry.validators())
+        response = self.__send_request(
+            url, "GET", params, None, headers, timeout, endpoint
+        )
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(namespace, key)
+            cached = _build_response(
+                "GET", url, params, None, 200, response.headers, entry.content
+            )
+            if hasattr(response, "ecsapi_event"):
+                cached.ecsapi_event = response.ecsapi_event
+            return cached
+        if response.status_code == 200:
+            self.cache.put(
+                namespace,
+                key,
+                endpoint,
+                response.content,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return response
+
+    def __send_request(self, url, method, params, body, headers, timeout, endpoint):
+        timeout = self.__timeout(timeout)
+        budget = current_deadline()
+        if budget is not None:
+            timeout = budget.clamp(timeout)
+        if not self._observers:
+            return self.__send(
+                method, url, params, body, headers, timeout, budget, endpoint
+            )
+        event = RequestEvent(endpoint=endpoint or url, method=method, url=url)
+        self.__notify("on_request_start", event)
+        started = perf_counter()
+        try:
+            response = self.__send(
+                method, url, params, body, headers, timeout, budget, endpoint
+            )
+        except Exception as e:
+            event.network_time = perf_counter() - started
+            event.error = e
+            self.__notify("on_error", event)
+            raise
+        event.network_time = perf_counter() - started
+        event.status = response.status_code
+        event.bytes_sent = len(response.request.body or b"")
+        event.bytes_received = getattr(
+            response, "ecsapi_wire_bytes", len(response.content or b"")
+        )
+        response.ecsapi_event = event
+        self.__notify("on_response", event)
+        return response
+
+    def __timeout(self, timeout: Optional[Timeout]) -> Optional[Timeout]:
         if timeout is None:
             timeout = self.timeout
-        return requests.request(
-            method, url, json=body, params=params, headers=headers, timeout=timeout
-        )
+        if self.connect_timeout is not None and not isinstance(timeout, tuple):
+            timeout = (self.connect_timeout, timeout)
+        return timeout
+
+    def __budget(self, timeout: Optional[Timeout]) -> Optional[float]:
+        # overall budget of a public call sending more than one request
+        return budget_of(timeout if timeout is not None else self.timeout)
+
+    @staticmethod
+    def __sleep_time(
+        fetch_every: float, started: float, max_wait: Optional[float]
+    ) -> float:
+        # polling never sleeps past max_wait
+        if max_wait is None:
+            return fetch_every
+        return max(min(fetch_every, max_wait - (monotonic() - started)), 0)
+
+    def __send(self, method, url, params, body, headers, timeout, budget, endpoint):
+        scheduler = self.scheduler
+        if scheduler is not None:
+            name = current_priority() or DEFAULT_ENDPOINT_PRIORITIES.get(
+                (method, endpoint), "default"
+            )
+            wait = budget.remaining() if budget is not None else None
+            if not scheduler.acquire(name, timeout=wait):
+                raise DeadlineExceededError(budget.seconds)
+        try:
+            return self.__send_limited(
+                method, url, params, body, headers, timeout, budget, endpoint
+            )
+        finally:
+            if scheduler is not None:
+                scheduler.release()
+
+    def __send_limited(
+        self, method, url, params, body, headers, timeout, budget, endpoint
+    ):
+        limiter = self.concurrency
+        if limiter is not None:
+            wait = budget.remaining() if budget is not None else None
+            if not limiter.acquire(timeout=wait):
+                raise DeadlineExceededError(budget.seconds)
+        sample, overloaded = False, False
+        on_resend = None
+        if self._observers:
+            on_resend = partial(self.__notify_retry, method, endpoint or url)
+        started = perf_counter()
+        try:
+            with sending(endpoint, on_resend):
+                response = self.transport.send(
+                    method,
+                    url,
+                    params=params,
+                    body=body,
+                    headers=headers,
+                    timeout=timeout,
+                )
+            sample = True
+            overloaded = response.status_code == 429 or response.status_code >= 500
+            return response
+        except requests.exceptions.Timeout as e:
+            overloaded = True
+            # the timeout was cut to the time left: report the spent budget
+            if budget is not None and budget.expired:
+                raise DeadlineExceededError(budget.seconds) from e
+            raise
+        finally:
+            if limiter is not None:
+                limiter.release(
+                    perf_counter() - started,
+                    overloaded,
+                    key=f"{method} {endpoint or url}",
+                    sample=sample,
+                )
+
+    def __max_workers(self, max_workers: Optional[int]) -> int:
+        # the adaptive limit, not the worker count, bounds the requests in flight
+        if max_workers is not None:
+            return max_workers
+        if self.concurrency is not None:
+            return int(self.concurrency.max_limit)
+        return DEFAULT_MAX_WORKERS
+
+    def __notify(self, hook: str, event: RequestEvent):
+        for observer in self._observers:
+            getattr(observer, hook)(event)
+
+    def __notify_retry(self, method: str, endpoint: str):
+        if self._observers:
+            self.__notify(
+                "on_retry", RequestEvent(endpoint=endpoint, method=method, url="")
+            )
 
     def __check_response(self, response):
         if response.status_code == 401:
-            raise UnauthorizedError(response)
-        if response.status_code == 404:
-            raise NotFoundError(response)
-        if 400 <= response.status_code <= 499:
-            raise ClientError(response)
-        if 500 <= response.status_code <= 599:
-            raise ServerError(response)
+            error = UnauthorizedError(response)
+        elif response.status_code == 404:
+            error = NotFoundError(response)
+        elif 400 <= response.status_code <= 499:
+            error = ClientError(response)
+        elif 500 <= response.status_code <= 599:
+            error = ServerError(response)
+        else:
+            return
+        event = getattr(response, "ecsapi_event", None)
+        if event is not None:
+            event.error = error
+            self.__notify("on_error", event)
+        raise error
+
+    def __parse(self, model, response):
+        event = getattr(response, "ecsapi_event", None)
+        if event is None:
+            return model.model_validate_json(response.content)
+        started = perf_counter()
+        try:
+            parsed = model.model_validate_json(response.content)
+        except Exception as e:
+            event.parse_time = perf_counter() - started
+            event.error = e
+            self.__notify("on_error", event)
+            raise
+        event.parse_time = perf_counter() - started
+        self.__notify("on_parsed", event)
+        return parsed
 
     def __get(
         self,
         url: str,
         params: Optional[Dict] = None,
         headers: Optional[Dict] = None,
-        timeout: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        endpoint: Optional[str] = None,
     ):
         return self.__request(
             url,
@@ -204,6 +502,7 @@ class Api:
             params=params,
             timeout=timeout,
             headers=headers,
+            endpoint=endpoint,
         )
 
     def __post(
@@ -212,7 +511,8 @@ class Api:
         params: Optional[Dict] = None,
         body: Optional[Dict] = None,
         headers: Optional[Dict] = None,
-        timeout: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        endpoint: Optional[str] = None,
     ):
         return self.__request(
             url,
@@ -221,6 +521,7 @@ class Api:
             body=body,
             timeout=timeout,
             headers=headers,
+            endpoint=endpoint,
         )
 
     def __put(
@@ -229,7 +530,8 @@ class Api:
         params: Optional[Dict] = None,
         body: Optional[Dict] = None,
         headers: Optional[Dict] = None,
-        timeout: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        endpoint: Optional[str] = None,
     ):
         return self.__request(
             url,
@@ -238,6 +540,7 @@ class Api:
             body=body,
             timeout=timeout,
             headers=headers,
+            endpoint=endpoint,
         )
 
     def __patch(
@@ -246,7 +549,8 @@ class Api:
         params: Optional[Dict] = None,
         body: Optional[Dict] = None,
         headers: Optional[Dict] = None,
-        timeout: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        endpoint: Optional[str] = None,
     ):
         return self.__request(
             url,
@@ -255,6 +559,7 @@ class Api:
             body=body,
             timeout=timeout,
             headers=headers,
+            endpoint=endpoint,
         )
 
     def __delete(
@@ -262,7 +567,8 @@ class Api:
         url: str,
         params: Optional[Dict] = None,
         headers: Optional[Dict] = None,
-        timeout: Optional[int] = None,
+        timeout: Optional[Timeout] = None,
+        endpoint: Optional[str] = None,
     ):
         return self.__request(
             url,
@@ -270,43 +576,238 @@ class Api:
             params=params,
             timeout=timeout,
             headers=headers,
+            endpoint=endpoint,
         )
 
+    def __select_servers(
+        self,
+        names: Optional[Iterable[str]] = None,
+        group: Optional[str] = None,
+        server_filter: Optional[Callable[[Server], bool]] = None,
+        timeout: Timeout = None,
+    ) -> List[Server]:
+        selectors = [x for x in (names, group, server_filter) if x is not None]
+        if not selectors:
+            raise ValueError("names, group or server_filter must be provided")
+        if len(selectors) > 1:
+            raise ValueError(
+                "names, group and server_filter cannot be provided at the same time"
+            )
+        if names is not None:
+            names = set(names)
+            server_filter = lambda s: s.name in names  # noqa: E731
+        elif group is not None:
+            server_filter = lambda s: s.group == group  # noqa: E731
+        return [s for s in self.fetch_servers(timeout=timeout) if server_filter(s)]
+
+    def __resolve_server_names(
+        self,
+        names: Optional[Iterable[str]] = None,
+        group: Optional[str] = None,
+        server_filter: Optional[Callable[[Server], bool]] = None,
+        timeout: Timeout = None,
+    ) -> List[str]:
+        if names is not None and group is None and server_filter is None:
+            return list(names)
+        return [
+            s.name
+            for s in self.__select_servers(names, group, server_filter, timeout=timeout)
+        ]
+
     # endregion
     # region servers
-    def fetch_servers(self, timeout: int = None):
+    def fetch_servers(self, timeout: Timeout = None):
         response = self.__get(
             f"{self.__generate_base_url()}/servers",
+            endpoint="/servers",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        servers_response = _ServerListResponse.model_validate_json(response.text)
+        servers_response = self.__parse(_ServerListResponse, response)
         return servers_response.server
 
-    def fetch_server(self, name: str, timeout: int = None):
+    def fetch_server(self, name: str, timeout: Timeout = None):
         response = self.__get(
             f"{self.__generate_base_url()}/servers/{name}",
+            endpoint="/servers/{name}",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        server_response = _ServerRetrieveResponse.model_validate_json(response.text)
+        server_response = self.__parse(_ServerRetrieveResponse, response)
         return server_response.server
 
-    def fetch_server_status(self, name: str, timeout: int = None):
+    def fetch_server_status(self, name: str, timeout: Timeout = None):
         response = self.__get(
             f"{self.__generate_base_url()}/servers/{name}/status",
+            endpoint="/servers/{name}/status",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        server_status_response = _ServerRetrieveStatusResponse.model_validate_json(
-            response.text
-        )
+        server_status_response = self.__parse(_ServerRetrieveStatusResponse, response)
         return server_status_response.server.current_status
 
-    def can_create_plan(self, plan: str, region: str, timeout: int = None):
+    def export_inventory(self, path: str, timeout: Timeout = None) -> InventorySnapshot:
+        """
+        Fetches the servers and saves them as an ``InventorySnapshot`` at ``path``,
+        written as a delta of the snapshot already there, if any.
+        """
+        fetched_at = time()
+        servers = self.fetch_servers(timeout=timeout)
+        try:
+            snapshot = InventorySnapshot(path)
+        except (FileNotFoundError, InventorySnapshotError):
+            return InventorySnapshot.write(path, servers, created_at=fetched_at)
+        snapshot.update(servers, created_at=fetched_at)
+        return snapshot
+
+    def load_inventory(
+        self, path: str, max_age: Optional[float] = None, timeout: Timeout = None
+    ) -> InventorySnapshot:
+        """
+        Opens the ``InventorySnapshot`` at ``path`` without any request when its data
+        is at most ``max_age`` seconds old (any age if ``None``), otherwise updates
+        it first from a live ``fetch_servers`` as ``export_inventory`` does.
+        """
+        try:
+            snapshot = InventorySnapshot(path)
+        except (FileNotFoundError, InventorySnapshotError):
+            return self.export_inventory(path, timeout=timeout)
+        if max_age is not None and snapshot.age > max_age:
+            fetched_at = time()
+            snapshot.update(self.fetch_servers(timeout=timeout), created_at=fetched_at)
+        return snapshot
+
+    def server(
+        self, name: str, ttl: Optional[float] = DEFAULT_SERVER_REF_TTL
+    ) -> ServerRef:
+        """
+        Returns a ``ServerRef`` handle to the server ``name``: nothing is fetched
+        until one of its attributes is read.
+        """
+        return ServerRef(self, name, ttl=ttl)
+
+    def server_refs(
+        self,
+        names: Optional[Iterable[str]] = None,
+        group: Optional[str] = None,
+        server_filter: Optional[Callable[[Server], bool]] = None,
+        ttl: Optional[float] = DEFAULT_SERVER_REF_TTL,
+        timeout: Timeout = None,
+    ) -> List[ServerRef]:
+        """
+        Returns handles to the servers selected by ``names``, by ``group`` or by
+        ``server_filter``, already loaded with a single ``fetch_servers`` call.
+        """
+        return [
+            ServerRef(self, server.name, ttl=ttl, server=server)
+            for server in self.__select_servers(
+                names, group, server_filter, timeout=timeout
+            )
+        ]
+
+    def refresh_servers(
+        self,
+        refs: Iterable[ServerRef],
+        stale_only: bool = False,
+        timeout: Timeout = None,
+    ) -> List[ServerRef]:
+        """
+        Refreshes many ``ServerRef`` handles, or only the stale ones, with a single
+        ``fetch_servers`` call. It returns the handles whose server no longer exists.
+        """
+        refs = [ref for ref in refs if ref.stale or not stale_only]
+        if not refs:
+            return []
+        servers = {s.name: s for s in self.fetch_servers(timeout=timeout)}
+        missing = []
+        for ref in refs:
+            if ref.name in servers:
+                ref._set(servers[ref.name])
+            else:
+                ref.invalidate()
+                missing.append(ref)
+        return missing
+
+    def wait_for_servers(
+        self,
+        names: Iterable[str],
+        status: Union[str, ServerStatusEnum] = ServerStatusEnum.booted,
+        fetch_every: float = 1,
+        max_wait: float = None,
+        per_server_threshold: int = DEFAULT_PER_SERVER_THRESHOLD,
+        on_fetch: Callable[[Dict[str, Optional[Server]], int], None] = None,
+        timeout: Timeout = None,
+    ) -> Iterator[Server]:
+        """
+        Waits until every server in ``names`` reports ``status``.
+
+        Each tick refreshes all pending servers with a single ``fetch_servers`` call;
+        once ``per_server_threshold`` or fewer servers are still pending it switches to
+        one ``fetch_server`` call per server, which is cheaper than downloading the
+        whole list for a handful of stragglers.
+        Servers are yielded as soon as they reach ``status``. ``on_fetch`` receives the
+        still pending servers (last known state, ``None`` if never seen) and the retry
+        counter after every tick. ``max_wait`` bounds the total wall time in seconds,
+        when it is exceeded ``ServersWaitTimeoutError`` is raised with the stragglers.
+        """
+        pending: Dict[str, Optional[Server]] = dict.fromkeys(names)
+        budget = Deadline(max_wait) if max_wait is not None else None
+        retry = 0
+        while pending:
+            if retry:
+                self.__notify_retry("GET", "/servers")
+            try:
+                servers = self.__fetch_pending(
+                    pending, per_server_threshold, timeout, budget
+                )
+            except (DeadlineExceededError, requests.exceptions.Timeout):
+                if budget is None or not budget.expired:
+                    raise
+                raise ServersWaitTimeoutError(status=status, pending=pending)
+            for server in servers:
+                if server.name not in pending:
+                    continue
+                if server.status == status:
+                    del pending[server.name]
+                    yield server
+                else:
+                    pending[server.name] = server
+            if not pending:
+                return
+            if on_fetch is not None:
+                on_fetch(dict(pending), retry)
+            if budget is not None and budget.expired:
+                raise ServersWaitTimeoutError(status=status, pending=pending)
+            retry += 1
+            sleep(
+                fetch_every if budget is None else min(fetch_every, budget.remaining())
+            )
+
+    def __fetch_pending(
+        self,
+        pending: Dict[str, Optional[Server]],
+        per_server_threshold: int,
+        timeout: Optional[Timeout],
+        budget: Optional[Deadline],
+    ) -> List[Server]:
+        # the budget of a generator is not set as the current deadline, which would
+        # leak into the caller between two yields, the timeouts are cut here instead
+        if budget is not None:
+            timeout = budget.clamp(self.__timeout(timeout))
+        if len(pending) > per_server_threshold:
+            return self.fetch_servers(timeout=timeout)
+        servers = []
+        for name in pending:
+            try:
+                servers.append(self.fetch_server(name, timeout=timeout))
+            except NotFoundError:
+                continue
+        return servers
+
+    def can_create_plan(self, plan: str, region: str, timeout: Timeout = None):
         plans_available_response = self.fetch_plans_available(timeout=timeout)
         for plan_available in plans_available_response:
             if plan_available.name == plan:
@@ -320,46 +821,97 @@ class Api:
         self,
         request: ServerCreateRequest,
         check_if_can_create: bool = True,
-        timeout: int = None,
+        timeout: Timeout = None,
     ):
-        if check_if_can_create:
-            if not self.can_create_plan(request.plan, request.location):
-                raise PlanNotAvailableError(plan=request.plan, region=request.location)
-        response = self.__post(
-            f"{self.__generate_base_url()}/servers",
-            body=request.model_dump(exclude_none=True),
-            headers=self.__generate_authentication_headers(),
-            timeout=timeout,
-        )
+        with deadline(self.__budget(timeout)):
+            if check_if_can_create:
+                if not self.can_create_plan(
+                    request.plan, request.location, timeout=timeout
+                ):
+                    raise PlanNotAvailableError(
+                        plan=request.plan, region=request.location
+                    )
+            response = self.__post(
+                f"{self.__generate_base_url()}/servers",
+                endpoint="/servers",
+                body=request.model_dump(exclude_none=True),
+                headers=self.__generate_authentication_headers(),
+                timeout=timeout,
+            )
         self.__check_response(response)
-        server_response = _ServerCreateRequestResponse.model_validate_json(
-            response.text
-        )
+        server_response = self.__parse(_ServerCreateRequestResponse, response)
         return server_response.server, server_response.action_id
 
     def update_server(
         self,
-        server_name: str,
+        server_name: Union[str, Server],
         notes: str = None,
         group: Union[str, Literal["nogroup"]] = None,
-        timeout: int = None,
-    ):
+        timeout: Timeout = None,
+        refetch: bool = True,
+    ) -> Union[Server, ServerRef]:
+        """
+        Updates the notes and/or the group of a server, then fetches it again.
+
+        Without ``refetch`` the second request is skipped: a ``Server`` passed in
+        place of its name is returned patched locally with the new values, a name
+        returns a ``ServerRef`` that fetches the server only when read.
+        """
+        name = server_name.name if isinstance(server_name, Server) else server_name
         body = _ServerUpdateRequest(notes=notes, group=group)
-        response = self.__put(
-            f"{self.__generate_base_url()}/servers/{server_name}",
-            body=body.model_dump(exclude_none=True),
-            headers=self.__generate_authentication_headers(),
-            timeout=timeout,
+        with deadline(self.__budget(timeout) if refetch else None):
+            response = self.__put(
+                f"{self.__generate_base_url()}/servers/{name}",
+                endpoint="/servers/{name}",
+                body=body.model_dump(exclude_none=True),
+                headers=self.__generate_authentication_headers(),
+                timeout=timeout,
+            )
+            self.__check_response(response)
+            if refetch:
+                return self.fetch_server(name, timeout=timeout)
+        if isinstance(server_name, Server):
+            return _patch_server(server_name, body)
+        return self.server(name)
+
+    def update_servers(
+        self,
+        servers: Iterable[Union[str, Server]],
+        notes: str = None,
+        group: Union[str, Literal["nogroup"]] = None,
+        max_workers: Optional[int] = None,
+        refetch: bool = True,
+        timeout: Timeout = None,
+    ) -> Tuple[Dict[str, Union[Server, ServerRef]], Dict[str, Exception]]:
+        """
+        Sets the same notes and/or group on many servers, given by name or as
+        ``Server``, with at most ``max_workers`` concurrent requests.
+
+        The updated servers are refreshed with a single ``fetch_servers`` call at the
+        end instead of one ``fetch_server`` each; without ``refetch`` they are patched
+        locally as in ``update_server``. It returns the servers and the errors of the
+        ones that failed, keyed by server name.
+        """
+        servers = {(s.name if isinstance(s, Server) else s): s for s in servers}
+        updated, errors = run_bulk(
+            lambda name: self.update_server(
+                servers[name], notes=notes, group=group, timeout=timeout, refetch=False
+            ),
+            servers,
+            max_workers=self.__max_workers(max_workers),
         )
-        self.__check_response(response)
-        return self.fetch_server(server_name)
+        if refetch and updated:
+            fetched = {s.name: s for s in self.fetch_servers(timeout=timeout)}
+            for name in updated:
+                updated[name] = fetched.get(name, updated[name])
+        return updated, errors
 
     def __send_server_action(
         self,
         server_name: str,
         action: Literal["rollback", "console", "power_on", "power_off"],
         add_body: dict = None,
-        timeout: int = None,
+        timeout: Timeout = None,
     ):
         body = {"type": action}
         if add_body is not None:
@@ -367,61 +919,236 @@ class Api:
         body = _ServerActionRequest.model_validate(body)
         response = self.__post(
             f"{self.__generate_base_url()}/servers/{server_name}/actions",
+            endpoint="/servers/{name}/actions",
             body=body.model_dump(exclude_none=True),
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
-        action_response = Action.model_validate_json(response.text)
+        self.__check_response(response)
+        action_response = self.__parse(Action, response)
         return action_response
 
-    def turn_on_server(self, server_name: str, timeout: int = None):
+    def turn_on_server(self, server_name: str, timeout: Timeout = None):
         return self.__send_server_action(server_name, "power_on", timeout=timeout)
 
-    def turn_off_server(self, server_name: str, timeout: int = None):
+    def turn_off_server(self, server_name: str, timeout: Timeout = None):
         return self.__send_server_action(server_name, "power_off", timeout=timeout)
 
-    def rollback_server(self, server_name: str, snapshot_id: int, timeout: int = None):
+    def rollback_server(
+        self, server_name: str, snapshot_id: int, timeout: Timeout = None
+    ):
         return self.__send_server_action(
             server_name, "rollback", {"snapshot": snapshot_id}, timeout=timeout
         )
 
-    def delete_server(self, server_name: str, timeout: int = None):
+    def __send_servers_action(
+        self,
+        send: Callable[[str], Action],
+        names: List[str],
+        max_workers: Optional[int] = None,
+        wait: bool = False,
+        fetch_every: float = 1,
+        max_wait: float = None,
+        timeout: Timeout = None,
+    ) -> Tuple[Dict[str, Action], Dict[str, Exception]]:
+        actions, errors = run_bulk(
+            send, names, max_workers=self.__max_workers(max_workers)
+        )
+        if not wait:
+            return actions, errors
+        names_by_action = {action.id: name for name, action in actions.items()}
+        completed, failed = self.watch_actions(
+            actions.values(),
+            fetch_every=fetch_every,
+            max_wait=max_wait,
+            max_workers=max_workers,
+            timeout=timeout,
+        )
+        actions = {names_by_action[i]: action for i, action in completed.items()}
+        errors.update({names_by_action[i]: e for i, e in failed.items()})
+        return actions, errors
+
+    def turn_on_servers(
+        self,
+        names: Optional[Iterable[str]] = None,
+        group: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        wait: bool = False,
+        fetch_every: float = 1,
+        max_wait: float = None,
+        timeout: Timeout = None,
+    ) -> Tuple[Dict[str, Action], Dict[str, Exception]]:
+        """
+        Turns on many servers, selected by ``names`` or by ``group``.
+
+        A ``group`` is resolved with a single ``fetch_servers`` call, then the actions
+        are sent with at most ``max_workers`` concurrent requests. It returns the
+        ``Action`` of each server and the errors of the servers that failed, keyed by
+        server name, so one failure does not stop the batch.
+        With ``wait`` every action is tracked until completion (see ``watch_actions``)
+        and the returned actions are the final ones.
+        """
+        return self.__send_servers_action(
+            lambda name: self.turn_on_server(name, timeout=timeout),
+            self.__resolve_server_names(names, group, timeout=timeout),
+            max_workers=max_workers,
+            wait=wait,
+            fetch_every=fetch_every,
+            max_wait=max_wait,
+            timeout=timeout,
+        )
+
+    def turn_off_servers(
+        self,
+        names: Optional[Iterable[str]] = None,
+        group: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        wait: bool = False,
+        fetch_every: float = 1,
+        max_wait: float = None,
+        timeout: Timeout = None,
+    ) -> Tuple[Dict[str, Action], Dict[str, Exception]]:
+        """
+        Turns off many servers, selected by ``names`` or by ``group``.
+
+        Same behaviour as ``turn_on_servers``.
+        """
+        return self.__send_servers_action(
+            lambda name: self.turn_off_server(name, timeout=timeout),
+            self.__resolve_server_names(names, group, timeout=timeout),
+            max_workers=max_workers,
+            wait=wait,
+            fetch_every=fetch_every,
+            max_wait=max_wait,
+            timeout=timeout,
+        )
+
+    def rollback_servers(
+        self,
+        snapshot_ids: Optional[Dict[str, int]] = None,
+        group: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        wait: bool = False,
+        fetch_every: float = 1,
+        max_wait: float = None,
+        timeout: Timeout = None,
+    ) -> Tuple[Dict[str, Action], Dict[str, Exception]]:
+        """
+        Rolls back many servers, each one to its own snapshot.
+
+        ``snapshot_ids`` maps each server name to the snapshot to restore. With
+        ``group`` every server of the group is rolled back to its
+        ``last_restored_snapshot``, servers without one are reported as errors.
+        Same behaviour as ``turn_on_servers`` otherwise.
+        """
+        if snapshot_ids is None and group is None:
+            raise ValueError("snapshot_ids or group must be provided")
+        if snapshot_ids is not None and group is not None:
+            raise ValueError(
+                "snapshot_ids and group cannot be provided at the same time"
+            )
+        if group is not None:
+            snapshot_ids = {
+                server.name: (
+                    server.last_restored_snapshot.id
+                    if server.last_restored_snapshot is not None
+                    else None
+                )
+                for server in self.__select_servers(group=group, timeout=timeout)
+            }
+
+        def rollback(name: str):
+            if snapshot_ids[name] is None:
+                raise ValueError(f"server `{name}` has no snapshot to restore")
+            return self.rollback_server(name, snapshot_ids[name], timeout=timeout)
+
+        return self.__send_servers_action(
+            rollback,
+            list(snapshot_ids),
+            max_workers=max_workers,
+            wait=wait,
+            fetch_every=fetch_every,
+            max_wait=max_wait,
+            timeout=timeout,
+        )
+
+    def delete_server(self, server_name: str, timeout: Timeout = None):
         response = self.__delete(
             f"{self.__generate_base_url()}/servers/{server_name}",
+            endpoint="/servers/{name}",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
-        action_response = _ServerDeleteResponse.model_validate_json(response.text)
+        self.__check_response(response)
+        action_response = self.__parse(_ServerDeleteResponse, response)
         return action_response.action
 
+    def delete_servers(
+        self,
+        names: Optional[Iterable[str]] = None,
+        group: Optional[str] = None,
+        server_filter: Optional[Callable[[Server], bool]] = None,
+        max_workers: Optional[int] = None,
+        wait: bool = True,
+        dry_run: bool = False,
+        fetch_every: float = 1,
+        max_wait: float = None,
+        timeout: Timeout = None,
+    ) -> Union[Tuple[Dict[str, Action], Dict[str, Exception]], List[Server]]:
+        """
+        Deletes many servers, selected by ``names``, by ``group`` or by
+        ``server_filter`` (a predicate on ``Server``).
+
+        The deletions are submitted with at most ``max_workers`` concurrent requests
+        and, with ``wait``, all the delete actions are tracked together until each one
+        reaches a final status (see ``watch_actions``). It returns the ``Action`` of
+        each deleted server and the errors of the servers that failed, keyed by server
+        name: a failure never stops the rest of the batch.
+        With ``dry_run`` nothing is deleted and it returns the target servers, resolved
+        with a single ``fetch_servers`` call.
+        """
+        if dry_run:
+            return self.__select_servers(names, group, server_filter, timeout=timeout)
+        return self.__send_servers_action(
+            lambda name: self.delete_server(name, timeout=timeout),
+            self.__resolve_server_names(names, group, server_filter, timeout=timeout),
+            max_workers=max_workers,
+            wait=wait,
+            fetch_every=fetch_every,
+            max_wait=max_wait,
+            timeout=timeout,
+        )
+
     # endregion
     # region actions
     def fetch_actions(
-        self, start=0, length=50, resource: str = None, timeout: int = None
+        self, start=0, length=50, resource: str = None, timeout: Timeout = None
     ):
         params = {"start": start, "length": length}
         if resource is not None:
             params.update({"resource": resource})
         response = self.__get(
             f"{self.__generate_base_url()}/actions",
+            endpoint="/actions",
             params=params,
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        actions_response = _ActionListResponse.model_validate_json(response.text)
+        actions_response = self.__parse(_ActionListResponse, response)
         return actions_response.actions, actions_response.total_actions
 
-    def fetch_action(self, action_id: Union[int, Action], timeout: int = None):
+    def fetch_action(self, action_id: Union[int, Action], timeout: Timeout = None):
         if isinstance(action_id, Action):
             action_id = action_id.id
         response = self.__get(
             f"{self.__generate_base_url()}/actions/{action_id}",
+            endpoint="/actions/{id}",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        actions_response = _ActionRetrieveResponse.model_validate_json(response.text)
+        actions_response = self.__parse(_ActionRetrieveResponse, response)
         return actions_response.action
 
     def watch_action(
@@ -432,30 +1159,127 @@ class Api:
         fetch_every: float = 1,
         max_retry: int = None,
         on_fetch: Callable[[Action, int], None] = None,
-        timeout: int = None,
+        timeout: Timeout = None,
+        max_wait: float = None,
     ):
+        """
+        Polls an action every ``fetch_every`` seconds until it reaches
+        ``desired_status``, raising ``ActionExitStatusError`` on ``exit_on_status``.
+
+        ``ActionMaxRetriesExceededError`` is raised after ``max_retry`` polls or
+        ``max_wait`` seconds of total wall time, whichever comes first; the requests
+        still in flight at that point are cut to the time left.
+        """
+        started = monotonic()
         retry = 0
-        while True:
-            action = self.fetch_action(action_id, timeout=timeout)
-            if on_fetch is not None:
-                on_fetch(action, retry)
-            if action.status == desired_status:
-                return action
-            elif action.status == exit_on_status:
-                raise ActionExitStatusError(
-                    action_id=action_id, last_status=action.status, retry=retry
-                )
-            elif max_retry is not None and retry >= max_retry:
-                raise ActionMaxRetriesExceededError(
-                    action_id=action_id, last_status=action.status, retry=retry
+        action = None
+        with deadline(max_wait):
+            while True:
+                if retry:
+                    self.__notify_retry("GET", "/actions/{id}")
+                try:
+                    action = self.fetch_action(action_id, timeout=timeout)
+                except (DeadlineExceededError, requests.exceptions.Timeout):
+                    if max_wait is None or monotonic() - started < max_wait:
+                        raise
+                    raise ActionMaxRetriesExceededError(
+                        action_id=action_id,
+                        last_status=action.status if action else None,
+                        retry=retry,
+                    )
+                if on_fetch is not None:
+                    on_fetch(action, retry)
+                if action.status == desired_status:
+                    return action
+                elif action.status == exit_on_status:
+                    raise ActionExitStatusError(
+                        action_id=action_id, last_status=action.status, retry=retry
+                    )
+                elif (max_retry is not None and retry >= max_retry) or (
+                    max_wait is not None and monotonic() - started >= max_wait
+                ):
+                    raise ActionMaxRetriesExceededError(
+                        action_id=action_id, last_status=action.status, retry=retry
+                    )
+                else:
+                    retry += 1
+                    sleep(self.__sleep_time(fetch_every, started, max_wait))
+
+    def watch_actions(
+        self,
+        action_ids: Iterable[Union[int, Action]],
+        desired_status="completed",
+        exit_on_status="failed",
+        fetch_every: float = 1,
+        max_wait: float = None,
+        max_workers: Optional[int] = None,
+        on_fetch: Callable[[Dict[int, Action], int], None] = None,
+        timeout: Timeout = None,
+    ) -> Tuple[Dict[int, Action], Dict[int, Exception]]:
+        """
+        Watches many actions together until each one reaches a final status.
+
+        Every tick refreshes all pending actions with at most ``max_workers``
+        concurrent requests. It returns the actions that reached ``desired_status``
+        and the errors of the others, keyed by action id: ``ActionExitStatusError``
+        for the ones that reached ``exit_on_status``, ``ActionMaxRetriesExceededError``
+        for the ones still pending after ``max_wait`` seconds, or the request error.
+        ``on_fetch`` receives the still pending actions and the retry counter.
+        """
+        pending = {(a.id if isinstance(a, Action) else a): None for a in action_ids}
+        completed, errors = {}, {}
+        started = monotonic()
+        retry = 0
+        while pending:
+            if retry:
+                self.__notify_retry("GET", "/actions/{id}")
+            left = None if max_wait is None else max_wait - (monotonic() - started)
+            with deadline(left):
+                actions, failed = run_bulk(
+                    lambda i: self.fetch_action(i, timeout=timeout),
+                    pending,
+                    max_workers=self.__max_workers(max_workers),
                 )
-            else:
-                retry += 1
-                sleep(fetch_every)
+            expired = max_wait is not None and monotonic() - started >= max_wait
+            for action_id, e in failed.items():
+                last = pending.pop(action_id)
+                if expired and isinstance(
+                    e, (DeadlineExceededError, requests.exceptions.Timeout)
+                ):
+                    e = ActionMaxRetriesExceededError(
+                        action_id=action_id,
+                        last_status=last.status if last else None,
+                        retry=retry,
+                    )
+                errors[action_id] = e
+            for action_id, action in actions.items():
+                if action.status == desired_status:
+                    del pending[action_id]
+                    completed[action_id] = action
+                elif action.status == exit_on_status:
+                    del pending[action_id]
+                    errors[action_id] = ActionExitStatusError(
+                        action_id=action_id, last_status=action.status, retry=retry
+                    )
+                else:
+                    pending[action_id] = action
+            if not pending:
+                break
+            if on_fetch is not None:
+                on_fetch(dict(pending), retry)
+            if max_wait is not None and monotonic() - started >= max_wait:
+                for action_id, action in pending.items():
+                    errors[action_id] = ActionMaxRetriesExceededError(
+                        action_id=action_id, last_status=action.status, retry=retry
+                    )
+                break
+            retry += 1
+            sleep(self.__sleep_time(fetch_every, started, max_wait))
+        return completed, errors
 
     # endregion
     # region plans
-    def fetch_plans(self, timeout: int = None):
+    def fetch_plans(self, timeout: Timeout = None):
         """
         Fetches the list of all plans from the API.
 
@@ -466,14 +1290,15 @@ class Api:
         """
         response = self.__get(
             f"{self.__generate_base_url()}/plans",
+            endpoint="/plans",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        plans_response = _PlanListResponse.model_validate_json(response.text)
+        plans_response = self.__parse(_PlanListResponse, response)
         return plans_response.plans
 
-    def fetch_plans_available(self, timeout: int = None):
+    def fetch_plans_available(self, timeout: Timeout = None):
         """
         Fetches and returns the plans currently available in the system.
 
@@ -485,79 +1310,86 @@ class Api:
         """
         response = self.__get(
             f"{self.__generate_base_url()}/plans/availables",
+            endpoint="/plans/availables",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        plans_response = _PlanAvailableListResponse.model_validate_json(response.text)
+        plans_response = self.__parse(_PlanAvailableListResponse, response)
         return plans_response.plans
 
     # endregion plans
     # region regions
-    def fetch_regions(self, timeout: int = None):
+    def fetch_regions(self, timeout: Timeout = None):
         response = self.__get(
             f"{self.__generate_base_url()}/regions",
+            endpoint="/regions",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        regions_response = _RegionListResponse.model_validate_json(response.text)
+        regions_response = self.__parse(_RegionListResponse, response)
         return regions_response.regions
 
-    def fetch_regions_available(self, plan: str, timeout: int = None):
+    def fetch_regions_available(self, plan: str, timeout: Timeout = None):
         body = _RegionAvailableRequest(plan=plan)
         response = self.__post(
             f"{self.__generate_base_url()}/regions/availables",
+            endpoint="/regions/availables",
             body=body.model_dump(),
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        regions_response = _RegionAvailableResponse.model_validate_json(response.text)
+        regions_response = self.__parse(_RegionAvailableResponse, response)
         return regions_response.regions
 
     # endregion
     # region images
-    def fetch_images_basics(self, timeout: int = None):
+    def fetch_images_basics(self, timeout: Timeout = None):
         response = self.__get(
             f"{self.__generate_base_url()}/images/basics",
+            endpoint="/images/basics",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        images_response = _ImageListResponse.model_validate_json(response.text)
+        images_response = self.__parse(_ImageListResponse, response)
         return images_response.images
 
-    def fetch_images_cloud(self, timeout: int = None):
+    def fetch_images_cloud(self, timeout: Timeout = None):
         response = self.__get(
             f"{self.__generate_base_url()}/images/cloud-images",
+            endpoint="/images/cloud-images",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        images_response = _CloudImageListResponse.model_validate_json(response.text)
+        images_response = self.__parse(_CloudImageListResponse, response)
         return images_response.images
 
     # endregion
     # region templates
-    def fetch_templates(self, timeout: int = None):
+    def fetch_templates(self, timeout: Timeout = None):
         response = self.__get(
             f"{self.__generate_base_url()}/templates",
+            endpoint="/templates",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        templates_response = _TemplateListResponse.model_validate_json(response.text)
+        templates_response = self.__parse(_TemplateListResponse, response)
         return templates_response.templates
 
-    def fetch_template(self, template_id: int, timeout: int = None):
+    def fetch_template(self, template_id: int, timeout: Timeout = None):
         response = self.__get(
             f"{self.__generate_base_url()}/templates/{template_id}",
+            endpoint="/templates/{id}",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        template_response = _TemplateRetrieveResponse.model_validate_json(response.text)
+        template_response = self.__parse(_TemplateRetrieveResponse, response)
         return template_response.template
 
     def create_template(
@@ -566,7 +1398,7 @@ class Api:
         snapshot: Optional[str] = None,
         description: Optional[str] = None,
         notes: Optional[str] = None,
-        timeout: int = None,
+        timeout: Timeout = None,
     ):
         if server is None and snapshot is None:
             raise ValueError("server or snapshot must be provided")
@@ -577,12 +1409,13 @@ class Api:
         )
         response = self.__post(
             f"{self.__generate_base_url()}/templates",
+            endpoint="/templates",
             body=body.model_dump(),
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        template_response = _TemplateCreateResponse.model_validate_json(response.text)
+        template_response = self.__parse(_TemplateCreateResponse, response)
         return template_response.template, template_response.action_id
 
     def update_template(
@@ -590,67 +1423,70 @@ class Api:
         template_id: int,
         description: Optional[str] = None,
         notes: Optional[str] = None,
-        timeout: int = None,
+        timeout: Timeout = None,
     ):
         body = _TemplateUpdateRequest(description=description, notes=notes)
         response = self.__patch(
             f"{self.__generate_base_url()}/templates/{template_id}",
+            endpoint="/templates/{id}",
             body=body.model_dump(),
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        template_response = _TemplateUpdateResponse.model_validate_json(response.text)
+        template_response = self.__parse(_TemplateUpdateResponse, response)
         return template_response.template
 
-    def delete_template(self, template_id: int, timeout: int = None):
+    def delete_template(self, template_id: int, timeout: Timeout = None):
         response = self.__delete(
             f"{self.__generate_base_url()}/templates/{template_id}",
+            endpoint="/templates/{id}",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        action_response = _TemplateDeleteResponse.model_validate_json(response.text)
+        action_response = self.__parse(_TemplateDeleteResponse, response)
         return action_response.action
 
     # endregion
 
     # region cloud_script
 
-    def fetch_scripts(self, timeout: int = None):
+    def fetch_scripts(self, timeout: Timeout = None):
         response = self.__get(
             f"{self.__generate_base_url()}/scripts",
+            endpoint="/scripts",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        scripts_response = _CloudScriptListResponse.model_validate_json(response.text)
+        scripts_response = self.__parse(_CloudScriptListResponse, response)
         return scripts_response.scripts
 
-    def fetch_script(self, script_id: int, timeout: int = None):
+    def fetch_script(self, script_id: int, timeout: Timeout = None):
         response = self.__get(
             f"{self.__generate_base_url()}/scripts/{script_id}",
+            endpoint="/scripts/{id}",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        script_response = _CloudScriptRetrieveResponse.model_validate_json(
-            response.text
-        )
+        script_response = self.__parse(_CloudScriptRetrieveResponse, response)
         return script_response.script
 
     def create_script(
-        self, title: str, content: str, windows=False, timeout: int = None
+        self, title: str, content: str, windows=False, timeout: Timeout = None
     ):
         body = _CloudScriptCreateRequest(title=title, content=content, windows=windows)
         response = self.__post(
             f"{self.__generate_base_url()}/scripts",
+            endpoint="/scripts",
             body=body.model_dump(),
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        script_response = _CloudScriptCreateResponse.model_validate_json(response.text)
+        script_response = self.__parse(_CloudScriptCreateResponse, response)
         return script_response
 
     def update_script(
@@ -659,22 +1495,24 @@ class Api:
         title: Optional[str],
         content: Optional[str],
         windows: Optional[bool],
-        timeout: int = None,
+        timeout: Timeout = None,
     ):
         body = _CloudScriptUpdateRequest(title=title, content=content, windows=windows)
         response = self.__patch(
             f"{self.__generate_base_url()}/scripts/{script_id}",
+            endpoint="/scripts/{id}",
             body=body.model_dump(),
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
         self.__check_response(response)
-        script_response = _CloudScriptUpdateResponse.model_validate_json(response.text)
+        script_response = self.__parse(_CloudScriptUpdateResponse, response)
         return script_response.script
 
-    def delete_script(self, script_id: int, timeout: int = None):
+    def delete_script(self, script_id: int, timeout: Timeout = None):
         response = self.__delete(
             f"{self.__generate_base_url()}/scripts/{script_id}",
+            endpoint="/scripts/{id}",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
@@ -683,39 +1521,86 @@ class Api:
 
     # endregion
     # region sshkey
-    def fetch_ssh_keys(self, timeout: int = None):
+    def fetch_ssh_keys(self, timeout: Timeout = None):
         response = self.__get(
             f"{self.__generate_base_url()}/sshkeys",
+            endpoint="/sshkeys",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
-        ssh_keys_response = _SshKeyListResponse.model_validate_json(response.text)
+        ssh_keys_response = self.__parse(_SshKeyListResponse, response)
         return ssh_keys_response.pubkeys
 
-    def fetch_ssh_key(self, key_id: int, timeout: int = None):
+    def fetch_ssh_key(self, key_id: int, timeout: Timeout = None):
         response = self.__get(
             f"{self.__generate_base_url()}/sshkeys/{key_id}",
+            endpoint="/sshkeys/{id}",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
-        ssh_key_response = _SshKeyRetrieveResponse.model_validate_json(response.text)
+        ssh_key_response = self.__parse(_SshKeyRetrieveResponse, response)
         return ssh_key_response.pubkey
 
-    def create_ssh_key(self, key: str, label: str, timeout: int = None):
+    def create_ssh_key(
+        self, key: str, label: str, timeout: Timeout = None, refetch: bool = True
+    ) -> SshKey:
+        """
+        Registers an SSH key and returns it, looked up by ``label`` in the key list
+        since the api does not return the created key. Without ``refetch`` the list
+        is not downloaded and the key is built from the request: its ``id`` is
+        ``None`` and ``created_at`` the local time of the request.
+        """
         body = _SshKeyCreateRequest(key=key, label=label)
-        response = self.__post(
-            f"{self.__generate_base_url()}/sshkeys",
-            body=body.model_dump(),
-            headers=self.__generate_authentication_headers(),
-        )
-        self.__check_response(response)
-        keys = self.fetch_ssh_keys()
-        for key in keys:
-            if key.label == label:
-                return key
-        raise Exception("Created SSH key not found")
+        with deadline(self.__budget(timeout) if refetch else None):
+            response = self.__post(
+                f"{self.__generate_base_url()}/sshkeys",
+                endpoint="/sshkeys",
+                body=body.model_dump(),
+                headers=self.__generate_authentication_headers(),
+                timeout=timeout,
+            )
+            self.__check_response(response)
+            if not refetch:
+                return _local_ssh_key(body)
+            keys = _ssh_keys_by_label(self.fetch_ssh_keys(timeout=timeout))
+        if label not in keys:
+            raise Exception("Created SSH key not found")
+        return keys[label]
+
+    def create_ssh_keys(
+        self,
+        keys: Dict[str, str],
+        max_workers: Optional[int] = None,
+        refetch: bool = True,
+        timeout: Timeout = None,
+    ) -> Tuple[Dict[str, SshKey], Dict[str, Exception]]:
+        """
+        Registers many SSH keys, given as ``{label: key}``, with at most
+        ``max_workers`` concurrent requests.
 
-    # def update_ssh_key(self, key_id: int, label: str, timeout: int = None):
+        The created keys are looked up with a single ``fetch_ssh_keys`` call at the
+        end, or built from the requests without ``refetch`` as in
+        ``create_ssh_key``. It returns the keys and the errors of the ones that
+        failed, keyed by label.
+        """
+        created, errors = run_bulk(
+            lambda label: self.create_ssh_key(
+                keys[label], label, timeout=timeout, refetch=False
+            ),
+            keys,
+            max_workers=self.__max_workers(max_workers),
+        )
+        if refetch and created:
+            fetched = _ssh_keys_by_label(self.fetch_ssh_keys(timeout=timeout))
+            for label in list(created):
+                if label in fetched:
+                    created[label] = fetched[label]
+                else:
+                    del created[label]
+                    errors[label] = Exception("Created SSH key not found")
+        return created, errors
+
+    # def update_ssh_key(self, key_id: int, label: str, timeout: Timeout = None):
     #     body = _SshKeyUpdateRequest(label=label)
     #     response = self.__patch(
     #         f"{self.__generate_base_url()}/sshkeys/{key_id}",
@@ -724,12 +1609,13 @@ class Api:
     #         timeout=timeout,
     #     )
     #     self.__check_response(response)
-    #     ssh_key_response = _SshKeyUpdateResponse.model_validate_json(response.text)
+    #     ssh_key_response = self.__parse(_SshKeyUpdateResponse, response)
     #     return ssh_key_response.pubkey
 
-    def delete_ssh_key(self, key_id: int, timeout: int = None):
+    def delete_ssh_key(self, key_id: int, timeout: Timeout = None):
         response = self.__delete(
             f"{self.__generate_base_url()}/sshkeys/{key_id}",
+            endpoint="/sshkeys/{id}",
             headers=self.__generate_authentication_headers(),
             timeout=timeout,
         )
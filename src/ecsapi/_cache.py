@@ -0,0 +1,206 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from time import time
+from typing import Dict, Optional, Tuple
+
+CACHE_PATH_ENV_VAR = "ECSAPI_CACHE_PATH"
+DEFAULT_CACHE_PATH = os.path.join("~", ".cache", "ecsapi", "cache.sqlite3")
+
+# seconds a catalog response is served without asking the api, per endpoint
+DEFAULT_CACHE_TTLS: Dict[str, float] = {
+    "/plans": 3600,
+    "/plans/availables": 300,
+    "/regions": 86400,
+    "/images/basics": 3600,
+    "/images/cloud-images": 3600,
+    "/templates": 60,
+}
+
+# cached endpoints a write may change besides the ones of its own resource: the
+# available plans and regions depend on the servers of the account
+DEFAULT_WRITE_INVALIDATIONS: Dict[str, Tuple[str, ...]] = {
+    "/servers": ("/plans/availables", "/regions/availables"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    content BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+class CacheEntry:
+    __slots__ = ("content", "etag", "last_modified", "stored_at")
+
+    def __init__(
+        self,
+        content: bytes,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        stored_at: float,
+    ):
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    def fresh(self, ttl: float) -> bool:
+        return time() - self.stored_at < ttl
+
+    def validators(self) -> Dict[str, str]:
+        """
+        Headers revalidating the entry with a conditional request.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class DiskCache:
+    """
+    Cache of the catalog responses (plans, regions, images and templates) in a
+    SQLite file, shared by every process and thread using the same ``path``.
+
+    Raw payloads are stored with their ``ETag`` and ``Last-Modified`` validators,
+    keyed by api host and a hash of the token, so that accounts never share
+    entries. An entry is served without any request for the ``ttls`` of its
+    endpoint (``DEFAULT_CACHE_TTLS`` by default), then revalidated with a
+    conditional request. SQLite locks the file between writers, and the WAL journal
+    keeps readers from blocking. ``path`` defaults to ``$ECSAPI_CACHE_PATH`` or
+    ``~/.cache/ecsapi/cache.sqlite3``.
+
+    A successful write drops the entries of its resource and the ones listed for
+    it in ``write_invalidations`` (``DEFAULT_WRITE_INVALIDATIONS`` by default).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        busy_timeout: float = 5,
+        write_invalidations: Optional[Dict[str, Tuple[str, ...]]] = None,
+    ):
+        path = path or os.getenv(CACHE_PATH_ENV_VAR, DEFAULT_CACHE_PATH)
+        self.path = os.path.expanduser(path)
+        self.ttls = dict(DEFAULT_CACHE_TTLS if ttls is None else ttls)
+        self.busy_timeout = busy_timeout
+        self.write_invalidations = dict(
+            DEFAULT_WRITE_INVALIDATIONS
+            if write_invalidations is None
+            else write_invalidations
+        )
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections can not be shared between threads nor across a fork
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def namespace(host: str, token: Optional[str]) -> str:
+        digest = hashlib.sha256((token or "").encode()).hexdigest()[:16]
+        return f"{host}:{digest}"
+
+    def ttl(self, endpoint: Optional[str]) -> Optional[float]:
+        return self.ttls.get(endpoint)
+
+    def count(self, hit: bool):
+        """
+        Counts a lookup in ``hits`` or ``misses``, from any thread.
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT content, etag, last_modified, stored_at FROM responses "
+                "WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            )
+            .fetchone()
+        )
+        return CacheEntry(*row) if row is not None else None
+
+    def put(
+        self,
+        namespace: str,
+        key: str,
+        endpoint: str,
+        content: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (namespace, key, endpoint, content, etag, last_modified, time()),
+            )
+
+    def touch(self, namespace: str, key: str):
+        """
+        Restarts the TTL of an entry the api confirmed as unchanged.
+        """
+        with self._connection() as connection:
+            connection.execute(
+                "UPDATE responses SET stored_at = ? WHERE namespace = ? AND key = ?",
+                (time(), namespace, key),
+            )
+
+    def invalidate(self, namespace: Optional[str] = None, endpoint: str = None):
+        """
+        Drops the entries of ``namespace`` (every namespace if ``None``), only the
+        ones of ``endpoint`` and of the endpoints below it when given.
+        """
+        query, args = "DELETE FROM responses WHERE 1 = 1", []
+        if namespace is not None:
+            query += " AND namespace = ?"
+            args.append(namespace)
+        if endpoint is not None:
+            query += " AND (endpoint = ? OR endpoint LIKE ?)"
+            args += [endpoint, f"{endpoint}/%"]
+        with self._connection() as connection:
+            connection.execute(query, args)
+
+    def invalidate_write(self, namespace: str, endpoint: str):
+        """
+        Drops the entries of ``namespace`` a successful write to ``endpoint``, a
+        template like ``/servers/{name}``, may have changed.
+        """
+        resource = endpoint.split("/{")[0]
+        for affected in (resource,) + self.write_invalidations.get(resource, ()):
+            self.invalidate(namespace, affected)
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,134 @@
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from .errors import ResponseTooLargeError
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_RESPONSE_SIZE = 256 * 1024 * 1024
+
+
+def accept_encoding() -> str:
+    """
+    Returns the ``Accept-Encoding`` header value for the decoders available: gzip
+    and deflate always, brotli and zstd when their packages are installed.
+    """
+    encodings = ["gzip", "deflate"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return ", ".join(encodings)
+
+
+class _ZlibDecoder:
+    def __init__(self, wbits: int):
+        self._decompressor = zlib.decompressobj(wbits)
+
+    def stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            # at most CHUNK_SIZE bytes per call, so that a small chunk expanding to
+            # gigabytes is given out piece by piece
+            while chunk:
+                yield self._decompressor.decompress(chunk, CHUNK_SIZE)
+                chunk = self._decompressor.unconsumed_tail
+        yield self._decompressor.flush()
+
+
+class _BrotliDecoder:
+    def __init__(self):
+        self._decompressor = brotli.Decompressor()
+
+    def stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        # output_buffer_limit (brotli 1.1) stops the output growing past the limit
+        # within a block, the rest stays in the decompressor until asked for
+        for chunk in chunks:
+            output = self._decompressor.process(chunk, output_buffer_limit=CHUNK_SIZE)
+            while output:
+                yield output
+                if self._decompressor.can_accept_more_data():
+                    break
+                output = self._decompressor.process(b"", output_buffer_limit=CHUNK_SIZE)
+
+
+class _ZstdDecoder:
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        # zstandard only bounds the output of a reader pulling the input itself
+        reader = self._decompressor.stream_reader(
+            _ChunkReader(chunks), read_across_frames=True
+        )
+        while True:
+            output = reader.read(CHUNK_SIZE)
+            if not output:
+                return
+            yield output
+
+
+class _ChunkReader:
+    """
+    File-like view of an iterable of chunks.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._pending:
+            self._pending = next(self._chunks, None)
+            if self._pending is None:
+                self._pending = b""
+                return b""
+        if size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+def decoder(encoding: str):
+    """
+    Returns a streaming decoder for a ``Content-Encoding``, or ``None`` when the
+    encoding is not supported.
+    """
+    encoding = encoding.strip().lower()
+    if encoding in ("gzip", "x-gzip"):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _ZlibDecoder(zlib.MAX_WBITS)
+    if encoding == "br" and brotli is not None:
+        return _BrotliDecoder()
+    if encoding == "zstd" and zstandard is not None:
+        return _ZstdDecoder()
+    return None
+
+
+def decode(
+    chunks: Iterable[bytes], encoding: str = "", max_size: Optional[int] = None
+) -> bytes:
+    """
+    Decompresses ``chunks`` as they are read into a single buffer, raising
+    ``ResponseTooLargeError`` as soon as the decompressed size exceeds
+    ``max_size``. Chunks without a (supported) ``encoding`` are only joined.
+    """
+    decompressor = decoder(encoding) if encoding else None
+    if decompressor is not None:
+        chunks = decompressor.stream(chunks)
+    limit = max_size if max_size is not None else float("inf")
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) > limit:
+            raise ResponseTooLargeError(max_size)
+    return bytes(buffer)
@@ -0,0 +1,90 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import Iterator, Optional, Tuple, Union
+
+from .errors import DeadlineExceededError
+
+# seconds, or (connect, read) seconds as accepted by requests
+Timeout = Union[float, Tuple[Optional[float], Optional[float]]]
+
+_current: ContextVar[Optional["Deadline"]] = ContextVar("ecsapi_deadline", default=None)
+
+
+class Deadline:
+    """
+    Time budget shared by every request sent while it is active.
+
+    The connect and read timeouts of each request are cut to the time left, and a
+    request that would start after the budget is spent raises
+    ``DeadlineExceededError`` instead of being sent.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - monotonic(), 0)
+
+    @property
+    def expired(self) -> bool:
+        return monotonic() >= self.expires_at
+
+    def clamp(self, timeout: Optional[Timeout]) -> Tuple[float, float]:
+        """
+        Returns the ``(connect, read)`` timeout of a request limited to the time
+        left.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededError(self.seconds)
+        connect, read = split_timeout(timeout)
+        return (
+            remaining if connect is None else min(connect, remaining),
+            remaining if read is None else min(read, remaining),
+        )
+
+
+def split_timeout(
+    timeout: Optional[Timeout],
+) -> Tuple[Optional[float], Optional[float]]:
+    if isinstance(timeout, tuple):
+        return timeout
+    return timeout, timeout
+
+
+def budget_of(timeout: Optional[Timeout]) -> Optional[float]:
+    """
+    Overall budget of a call from its ``timeout``: the seconds themselves, or the
+    sum of connect and read timeouts.
+    """
+    connect, read = split_timeout(timeout)
+    if connect is None or read is None:
+        return None
+    return connect + read if isinstance(timeout, tuple) else timeout
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """
+    Shares a budget of ``seconds`` among the requests sent in the block, also from
+    the workers of the bulk helpers. Nested blocks can only shorten the budget of an
+    outer one; ``None`` keeps the current budget, if any.
+    """
+    outer = _current.get()
+    if seconds is None:
+        yield outer
+        return
+    budget = Deadline(seconds)
+    if outer is not None and outer.expires_at <= budget.expires_at:
+        budget = outer
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
@@ -0,0 +1,278 @@
+import threading
+from time import monotonic, perf_counter
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError
+
+from ._deadline import Deadline, budget_of, current_deadline
+from ._transport import RequestsTransport, Transport, request_key, resending
+
+# methods replayed on another endpoint even when the first one may have served them
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+# statuses of a proxy or mirror that can not serve the request right now
+UNAVAILABLE_STATUSES = frozenset((502, 503, 504))
+
+DEFAULT_EWMA_ALPHA = 0.3
+DEFAULT_EJECT_AFTER = 3
+DEFAULT_EJECT_FOR = 5
+DEFAULT_MAX_EJECT_FOR = 300
+DEFAULT_PROBE_TIMEOUT = 2
+DEFAULT_REMEASURE_EVERY = 20
+# kinds of request with a latency per endpoint, the least recently used is dropped
+MAX_LATENCY_KEYS = 64
+
+
+def _never_sent(error: Exception) -> bool:
+    # the connection could not be opened, so the api never saw the request
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError) or not error.args:
+        return False
+    reason = getattr(error.args[0], "reason", error.args[0])
+    return isinstance(reason, ConnectTimeoutError)
+
+
+class _Endpoint:
+    def __init__(self, url: str):
+        split = urlsplit(url)
+        if not split.scheme or not split.netloc:
+            raise ValueError(f"Endpoint must be an absolute url: {url}")
+        self.url = url
+        self.scheme = split.scheme
+        self.netloc = split.netloc
+        # by kind of request: EWMA latency and number of the request measured last
+        self.ewma: Dict[str, float] = {}
+        self.measured: Dict[str, int] = {}
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until: Optional[float] = None
+
+    def snapshot(self) -> Dict:
+        return {
+            "ewma_s": dict(self.ewma),
+            "failures": self.failures,
+            "ejected": self.ejected_until is not None,
+        }
+
+
+class FailoverTransport(Transport):
+    """
+    Sends each request to one of ``endpoints``, ordered base urls of the same api
+    (``"https://api.seeweb.it"``, a regional mirror, a proxy), through ``transport``
+    (``RequestsTransport`` by default). Only the scheme, host and port of the
+    request url are replaced.
+
+    The latency of every endpoint is tracked as an EWMA per kind of request
+    (``GET /servers``, see ``request_key``), so that slow lists and fast lookups are
+    never compared. ``GET``, ``HEAD`` and ``OPTIONS`` requests go to the fastest
+    endpoint measured for their kind, the first one until any is, preferring the
+    earlier ones unless another is faster by more than ``tolerance``; every
+    ``remeasure_every`` requests of a kind one goes to the endpoint measured least
+    recently instead, so that an endpoint that was slow once is not judged by that
+    forever. On a network error, a timeout or a 502/503/504 they are sent again to
+    the next endpoint.
+
+    Other requests go to the first healthy endpoint and move to the next one only
+    when the connection could not be opened, as a request that may have been
+    applied is never sent twice. Retries share the budget of the active deadline
+    or, without one, of ``timeout``, so a call never lasts longer than a single
+    attempt could.
+
+    After ``eject_after`` consecutive failures an endpoint is ejected for
+    ``eject_for`` seconds, doubling at every ejection up to ``max_eject_for``, while
+    a background thread probes it and readmits it as soon as it answers. When every
+    endpoint is ejected the one readmitted first is used.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[str],
+        transport: Optional[Transport] = None,
+        tolerance: float = 0.2,
+        alpha: float = DEFAULT_EWMA_ALPHA,
+        eject_after: int = DEFAULT_EJECT_AFTER,
+        eject_for: float = DEFAULT_EJECT_FOR,
+        max_eject_for: float = DEFAULT_MAX_EJECT_FOR,
+        probe_path: str = "/",
+        probe_timeout: float = DEFAULT_PROBE_TIMEOUT,
+        remeasure_every: int = DEFAULT_REMEASURE_EVERY,
+    ):
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        self.endpoints = [_Endpoint(url) for url in endpoints]
+        self.transport = transport or RequestsTransport()
+        self.tolerance = tolerance
+        self.alpha = alpha
+        self.eject_after = eject_after
+        self.eject_for = eject_for
+        self.max_eject_for = max_eject_for
+        self.probe_path = probe_path
+        self.probe_timeout = probe_timeout
+        self.remeasure_every = remeasure_every
+        self._requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._prober: Optional[threading.Thread] = None
+        self._closed = False
+
+    # region selection
+
+    def __healthy(self) -> List[_Endpoint]:
+        healthy = [e for e in self.endpoints if e.ejected_until is None]
+        if healthy:
+            return healthy
+        return [min(self.endpoints, key=lambda e: e.ejected_until)]
+
+    def __candidates(self, method: str, key: str) -> List[_Endpoint]:
+        with self._lock:
+            healthy = self.__healthy()
+            if method.upper() not in SAFE_METHODS:
+                return healthy
+            count = self.__count(key)
+            measured = [e for e in healthy if key in e.ewma]
+            first = healthy[0]
+            if measured:
+                limit = min(e.ewma[key] for e in measured) * (1 + self.tolerance)
+                first = next(e for e in measured if e.ewma[key] <= limit)
+            others = [e for e in healthy if e is not first]
+            if others and count % self.remeasure_every == 0:
+                first = min(others, key=lambda e: e.measured.get(key, -1))
+            return [first] + [e for e in healthy if e is not first]
+
+    def __count(self, key: str) -> int:
+        count = self._requests.pop(key, None)
+        if count is None and len(self._requests) >= MAX_LATENCY_KEYS:
+            oldest = next(iter(self._requests))
+            del self._requests[oldest]
+            for endpoint in self.endpoints:
+                endpoint.ewma.pop(oldest, None)
+                endpoint.measured.pop(oldest, None)
+        # reinserted last, so the first key is the least recently used
+        self._requests[key] = (count or 0) + 1
+        return self._requests[key]
+
+    # endregion
+    # region health
+
+    def __success(self, endpoint: _Endpoint, key: str, elapsed: float):
+        with self._lock:
+            # only the kinds of request routed by latency, the reads, are counted
+            if key in self._requests:
+                ewma = endpoint.ewma.get(key)
+                endpoint.ewma[key] = (
+                    elapsed if ewma is None else ewma + self.alpha * (elapsed - ewma)
+                )
+                endpoint.measured[key] = self._requests[key]
+            endpoint.failures = 0
+            endpoint.ejections = 0
+            endpoint.ejected_until = None
+
+    def __failure(self, endpoint: _Endpoint):
+        with self._lock:
+            endpoint.failures += 1
+            if endpoint.failures < self.eject_after or endpoint.ejected_until:
+                return
+            self.__eject(endpoint)
+            self.__start_prober()
+            self._wakeup.notify()
+
+    def __eject(self, endpoint: _Endpoint):
+        duration = min(self.eject_for * 2**endpoint.ejections, self.max_eject_for)
+        endpoint.ejections += 1
+        endpoint.ejected_until = monotonic() + duration
+
+    def __start_prober(self):
+        if self._prober is None and not self._closed:
+            self._prober = threading.Thread(target=self.__probe_loop, daemon=True)
+            self._prober.start()
+
+    def __probe_loop(self):
+        with self._lock:
+            while not self._closed:
+                ejected = [e for e in self.endpoints if e.ejected_until is not None]
+                if not ejected:
+                    self._wakeup.wait()
+                    continue
+                endpoint = min(ejected, key=lambda e: e.ejected_until)
+                wait = endpoint.ejected_until - monotonic()
+                if wait > 0:
+                    self._wakeup.wait(wait)
+                    continue
+                self._lock.release()
+                try:
+                    readmitted = self.__probe(endpoint)
+                finally:
+                    self._lock.acquire()
+                if readmitted:
+                    endpoint.failures = 0
+                    endpoint.ejections = 0
+                    endpoint.ejected_until = None
+                else:
+                    self.__eject(endpoint)
+
+    def __probe(self, endpoint: _Endpoint) -> bool:
+        try:
+            response = self.transport.send(
+                "GET",
+                f"{endpoint.scheme}://{endpoint.netloc}{self.probe_path}",
+                timeout=self.probe_timeout,
+            )
+        except requests.RequestException:
+            return False
+        return response.status_code not in UNAVAILABLE_STATUSES
+
+    def health(self) -> Dict[str, Dict]:
+        """
+        EWMA latency by kind of request, consecutive failures and ejection state of
+        each endpoint.
+        """
+        with self._lock:
+            return {e.url: e.snapshot() for e in self.endpoints}
+
+    # endregion
+
+    def send(self, method, url, params=None, body=None, headers=None, timeout=None):
+        split = urlsplit(url)
+        safe = method.upper() in SAFE_METHODS
+        key = request_key(method, url)
+        candidates = self.__candidates(method, key)
+        budget = current_deadline()
+        if budget is None and budget_of(timeout) is not None:
+            budget = Deadline(budget_of(timeout))
+        for attempt, endpoint in enumerate(candidates):
+            last = attempt == len(candidates) - 1
+            target = urlunsplit(
+                split._replace(scheme=endpoint.scheme, netloc=endpoint.netloc)
+            )
+            if attempt:
+                resending()
+                if budget is not None:
+                    timeout = budget.clamp(timeout)
+            started = perf_counter()
+            try:
+                response = self.transport.send(
+                    method, target, params, body, headers, timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.__failure(endpoint)
+                if last or not (safe or _never_sent(e)):
+                    raise
+                if budget is not None and budget.expired:
+                    raise
+                continue
+            if response.status_code in UNAVAILABLE_STATUSES:
+                self.__failure(endpoint)
+                retry = safe and not last
+                if retry and (budget is None or not budget.expired):
+                    continue
+            else:
+                self.__success(endpoint, key, perf_counter() - started)
+            return response
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+        self.transport.close()
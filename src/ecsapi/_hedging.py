@@ -0,0 +1,206 @@
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from time import perf_counter
+from typing import Deque, Dict, Optional
+
+from ._transport import RequestsTransport, Transport, request_key, resending
+from .utils import DEFAULT_MAX_WORKERS
+
+DEFAULT_HEDGE_PERCENTILE = 95
+DEFAULT_HEDGE_BUDGET = 0.05
+DEFAULT_HEDGE_WINDOW = 256
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+DEFAULT_HEDGE_MIN_DELAY = 0.005
+MAX_HEDGE_CREDITS = 10
+# kinds of request with a latency window, the least recently used is dropped
+MAX_HEDGE_KEYS = 64
+
+
+class HedgingTransport(Transport):
+    """
+    Sends a second copy of a GET through ``transport`` (``RequestsTransport`` by
+    default) when the first has not answered within the ``percentile`` of the
+    latencies observed on the last ``window`` requests of the same kind, and returns
+    whichever answers first. Requests are of the same kind when they share method
+    and endpoint (``GET /servers/{name}``, see ``request_key``), so that slow lists
+    and fast lookups get a delay each.
+
+    Hedging starts once ``min_samples`` latencies of a kind are known (or right away
+    with a fixed ``delay``) and its extra load is capped by ``budget``: each request
+    earns ``budget`` hedges, so ``0.05`` allows at most about 5% more requests. The
+    losing request can not be interrupted once on the wire; it is dropped and its
+    response closed as soon as it completes, releasing the connection. Only GETs are
+    hedged, on another connection when the wrapped transport pools them.
+
+    Requests that can not be hedged (not a GET, no delay known yet, no budget left)
+    are sent on the caller's thread. The others are sent from a pool of
+    ``max_workers`` threads, so that the caller can return as soon as either copy
+    answers, and their hedges from a second pool as large; while either pool is
+    busy requests are sent on the caller's thread without a hedge, so the pools
+    never queue nor cap the requests in flight. Latencies are timed from the moment
+    each copy is actually sent.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[Transport] = None,
+        percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        budget: float = DEFAULT_HEDGE_BUDGET,
+        delay: Optional[float] = None,
+        min_delay: float = DEFAULT_HEDGE_MIN_DELAY,
+        window: int = DEFAULT_HEDGE_WINDOW,
+        min_samples: int = DEFAULT_HEDGE_MIN_SAMPLES,
+        max_workers: int = DEFAULT_MAX_WORKERS * 2,
+    ):
+        self.transport = transport or RequestsTransport()
+        self.percentile = percentile
+        self.budget = budget
+        self.delay = delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._thresholds: Dict[str, float] = {}
+        self._credits = 1.0
+        self._primaries_in_flight = 0
+        self._hedges_in_flight = 0
+        self._lock = threading.Lock()
+        self._primaries = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ecsapi-hedge-primary"
+        )
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ecsapi-hedge"
+        )
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """
+        Seconds after which a GET of kind ``key`` (``GET /servers/{name}``) is
+        hedged, ``None`` until enough latencies are known.
+        """
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            latencies = self._latencies.get(key)
+            if latencies is None or len(latencies) < self.min_samples:
+                return None
+            threshold = self._thresholds.get(key)
+            if threshold is None:
+                ordered = sorted(latencies)
+                index = round(self.percentile / 100 * (len(ordered) - 1))
+                threshold = max(ordered[index], self.min_delay)
+                self._thresholds[key] = threshold
+            return threshold
+
+    def __observe(self, key: str, elapsed: float):
+        with self._lock:
+            latencies = self._latencies.pop(key, None)
+            if latencies is None:
+                latencies = deque(maxlen=self.window)
+                if len(self._latencies) >= MAX_HEDGE_KEYS:
+                    oldest = next(iter(self._latencies))
+                    del self._latencies[oldest]
+                    self._thresholds.pop(oldest, None)
+            # reinserted last, so the first key is the least recently used
+            self._latencies[key] = latencies
+            latencies.append(elapsed)
+            # recomputed lazily, at most once per request
+            self._thresholds.pop(key, None)
+
+    def __can_hedge(self) -> bool:
+        return self._credits >= 1 and self._hedges_in_flight < self.max_workers
+
+    def __take_primary_slot(self) -> bool:
+        with self._lock:
+            if self._primaries_in_flight >= self.max_workers:
+                return False
+            self._primaries_in_flight += 1
+            return True
+
+    def __primary_done(self, _: Future):
+        with self._lock:
+            self._primaries_in_flight -= 1
+
+    def __spend_credit(self) -> bool:
+        with self._lock:
+            if not self.__can_hedge():
+                return False
+            self._credits -= 1
+            self._hedges_in_flight += 1
+            self.hedged += 1
+            return True
+
+    def __hedge_done(self, _: Future):
+        with self._lock:
+            self._hedges_in_flight -= 1
+
+    def __timed(self, key: str, *args):
+        started = perf_counter()
+        response = self.transport.send(*args)
+        self.__observe(key, perf_counter() - started)
+        return response
+
+    def send(self, method, url, params=None, body=None, headers=None, timeout=None):
+        key = request_key(method, url)
+        args = (key, method, url, params, body, headers, timeout)
+        with self._lock:
+            self.requests += 1
+            self._credits = min(self._credits + self.budget, MAX_HEDGE_CREDITS)
+            can_hedge = self.__can_hedge()
+        delay = self.hedge_delay(key) if method.upper() == "GET" and can_hedge else None
+        if delay is None or not self.__take_primary_slot():
+            return self.__timed(*args)
+
+        first = self._primaries.submit(copy_context().run, self.__timed, *args)
+        first.add_done_callback(self.__primary_done)
+        done, _ = wait([first], timeout=delay)
+        if done or not self.__spend_credit():
+            return first.result()
+        resending()
+        second = self._pool.submit(copy_context().run, self.__timed, *args)
+        second.add_done_callback(self.__hedge_done)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for loser in pending:
+                    _drop(loser)
+                if future is second:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return future.result()
+        raise error
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedge_ratio": self.hedged / self.requests if self.requests else 0,
+            }
+
+    def close(self):
+        self._primaries.shutdown(wait=False)
+        self._pool.shutdown(wait=False)
+        self.transport.close()
+
+
+def _drop(future: Future):
+    if future.cancel():
+        return
+
+    def close(done: Future):
+        if done.exception() is None:
+            done.result().close()
+
+    future.add_done_callback(close)
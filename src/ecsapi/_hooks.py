@@ -0,0 +1,54 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class RequestEvent(BaseModel):
+    """
+    Lifecycle of a single request sent by ``Api``.
+
+    ``endpoint`` is the path template (for example ``/servers/{name}``), times are in
+    seconds and ``status`` is ``None`` until a response is received.
+    ``bytes_received`` counts the body as read from the wire, before decompression
+    when the transport reports it.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    endpoint: str
+    method: str
+    url: str
+    status: Optional[int] = None
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    network_time: float = 0
+    parse_time: float = 0
+    error: Optional[Exception] = None
+
+
+class RequestObserver:
+    """
+    Base class of the observers registered with ``Api.add_observer``.
+
+    Every hook receives the same ``RequestEvent``, filled as the request progresses:
+    ``on_request_start`` before sending, ``on_response`` once the body is received,
+    ``on_parsed`` once it is validated into a model, ``on_error`` when the request,
+    the status check or the parsing fails. ``on_retry`` is called with an event
+    without response when the client sends a request again: each new poll of
+    ``watch_action``, a failover to another endpoint or a hedged copy.
+    """
+
+    def on_request_start(self, event: RequestEvent):
+        pass
+
+    def on_response(self, event: RequestEvent):
+        pass
+
+    def on_parsed(self, event: RequestEvent):
+        pass
+
+    def on_error(self, event: RequestEvent):
+        pass
+
+    def on_retry(self, event: RequestEvent):
+        pass
@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import queue
+import threading
+from enum import Enum
+from typing import Optional, List, Dict, Callable, Tuple
+
+from pydantic import BaseModel, Field
+
+from ._deadline import Timeout
+from ._server import Server
+
+DEFAULT_INVENTORY_INTERVAL = 30
+DEFAULT_SUBSCRIPTION_SIZE = 1000
+# longest sleep of ``async for`` between two checks of an empty subscription
+ASYNC_POLL_INTERVAL = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+class InventoryEventEnum(str, Enum):
+    added = "added"
+    removed = "removed"
+    status_changed = "status_changed"
+    field_changed = "field_changed"
+
+
+class InventoryEvent(BaseModel):
+    type: InventoryEventEnum
+    name: str
+    server: Optional[Server] = None
+    previous: Optional[Server] = None
+    fields: List[str] = Field(default_factory=list)
+
+
+class InventorySubscription:
+    """
+    Bounded queue of ``InventoryEvent`` fed by an ``InventoryWatcher``.
+
+    The poller never blocks on a subscription: when it is full the oldest event is
+    dropped and counted in ``dropped``. Events can be consumed with ``get``, with a
+    blocking ``for`` loop or with ``async for``; iteration ends when the subscription
+    or its watcher is closed.
+    """
+
+    __closed = object()
+
+    def __init__(self, watcher, maxsize: int = DEFAULT_SUBSCRIPTION_SIZE):
+        self._watcher = watcher
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._dispatcher: Optional[threading.Thread] = None
+        self.dropped = 0
+        self.closed = False
+        # set by the first ``close``, ``closed`` only once the end has been read
+        self._closing = False
+
+    def _offer(self, event):
+        with self._lock:
+            while True:
+                try:
+                    self._queue.put_nowait(event)
+                    return
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout: float = None) -> Optional[InventoryEvent]:
+        """
+        Returns the next event, ``None`` once the subscription is closed.
+
+        Raises ``queue.Empty`` if no event arrives within ``timeout`` seconds.
+        """
+        if self.closed and self._queue.empty():
+            return None
+        event = self._queue.get(timeout=timeout)
+        return self.__unwrap(event)
+
+    def __unwrap(self, event) -> Optional[InventoryEvent]:
+        if event is self.__closed:
+            self.closed = True
+            return None
+        return event
+
+    def close(self):
+        with self._lock:
+            if self._closing or self.closed:
+                return
+            self._closing = True
+        self._watcher.unsubscribe(self)
+        self._offer(self.__closed)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> InventoryEvent:
+        event = self.get()
+        if event is None:
+            raise StopIteration
+        return event
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> InventoryEvent:
+        # no thread ever blocks on the queue, so a cancelled task loses no event
+        interval = 0.001
+        while True:
+            if self.closed and self._queue.empty():
+                raise StopAsyncIteration
+            try:
+                event = self.__unwrap(self._queue.get_nowait())
+            except queue.Empty:
+                await asyncio.sleep(interval)
+                interval = min(interval * 2, ASYNC_POLL_INTERVAL)
+                continue
+            if event is None:
+                raise StopAsyncIteration
+            return event
+
+    def _dispatch(self, callback: Callable[[InventoryEvent], None]):
+        for event in self:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Inventory callback failed on %s", event.name)
+
+
+class InventoryWatcher:
+    """
+    Polls ``fetch_servers`` once for any number of in-process subscribers.
+
+    Every poll hashes each ``Server`` and only the servers whose hash changed are
+    compared field by field, then the resulting events are pushed to every
+    subscription. A server whose ``status`` changed yields a ``status_changed``
+    event, any other change a ``field_changed`` event; ``fields`` lists what changed.
+    The first poll reports every server as ``added``.
+    """
+
+    def __init__(
+        self,
+        api,
+        interval: float = DEFAULT_INVENTORY_INTERVAL,
+        timeout: Timeout = None,
+    ):
+        self.api = api
+        self.interval = interval
+        self.timeout = timeout
+        self.last_error: Optional[Exception] = None
+        self._servers: Dict[str, Tuple[int, Server]] = {}
+        self._subscriptions: List[InventorySubscription] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def servers(self) -> Dict[str, Server]:
+        return {name: server for name, (_, server) in self._servers.items()}
+
+    def subscribe(
+        self,
+        callback: Callable[[InventoryEvent], None] = None,
+        maxsize: int = DEFAULT_SUBSCRIPTION_SIZE,
+    ) -> InventorySubscription:
+        """
+        Returns a new subscription to the events of the next polls.
+
+        With ``callback`` the events are delivered from a dedicated thread, so a slow
+        callback only fills its own queue; an exception raised by the callback is
+        logged and the next events are still delivered.
+        """
+        subscription = InventorySubscription(self, maxsize=maxsize)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        if callback is not None:
+            subscription._dispatcher = threading.Thread(
+                target=subscription._dispatch,
+                args=(callback,),
+                name="ecsapi-inventory-callback",
+                daemon=True,
+            )
+            subscription._dispatcher.start()
+        return subscription
+
+    def unsubscribe(self, subscription: InventorySubscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def poll(self) -> List[InventoryEvent]:
+        """
+        Fetches the servers once and publishes the events of what changed.
+        """
+        servers = self.api.fetch_servers(timeout=self.timeout)
+        current = {s.name: (hash(s.model_dump_json()), s) for s in servers}
+        events = []
+        for name, (digest, server) in current.items():
+            known = self._servers.get(name)
+            if known is None:
+                events.append(
+                    InventoryEvent(
+                        type=InventoryEventEnum.added, name=name, server=server
+                    )
+                )
+            elif known[0] != digest:
+                previous = known[1]
+                fields = [
+                    field
+                    for field in Server.model_fields
+                    if getattr(previous, field) != getattr(server, field)
+                ]
+                events.append(
+                    InventoryEvent(
+                        type=(
+                            InventoryEventEnum.status_changed
+                            if "status" in fields
+                            else InventoryEventEnum.field_changed
+                        ),
+                        name=name,
+                        server=server,
+                        previous=previous,
+                        fields=fields,
+                    )
+                )
+        for name, (_, previous) in self._servers.items():
+            if name not in current:
+                events.append(
+                    InventoryEvent(
+                        type=InventoryEventEnum.removed, name=name, previous=previous
+                    )
+                )
+        self._servers = current
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for event in events:
+            for subscription in subscriptions:
+                subscription._offer(event)
+        return events
+
+    def __run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.__run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops polling and closes every subscription, once the callbacks have
+        consumed the events already delivered.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.close()
+        for subscription in subscriptions:
+            if subscription._dispatcher is not None:
+                subscription._dispatcher.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,243 @@
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from time import time
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from ._server import Server
+from .errors import InventorySnapshotError
+
+SNAPSHOT_MAGIC = b"ECSI"
+SNAPSHOT_VERSION = 1
+
+# magic, version, flags, created_at, index offset, index length, records
+_HEADER = struct.Struct("<4sHHdQQI")
+# offset, length and crc32 of the uncompressed record, name length
+_ENTRY = struct.Struct("<QIIH")
+
+# name -> (offset, length, crc32)
+_Index = Dict[str, Tuple[int, int, int]]
+
+
+class InventoryDelta(BaseModel):
+    added: List[str] = Field(default_factory=list)
+    changed: List[str] = Field(default_factory=list)
+    removed: List[str] = Field(default_factory=list)
+
+
+def _encode(server: Server) -> bytes:
+    # by alias, as the api sends it and the models validate it
+    return server.model_dump_json(by_alias=True).encode()
+
+
+def _append(f: BinaryIO, raw: bytes) -> Tuple[int, int, int]:
+    record = zlib.compress(raw)
+    offset = f.tell()
+    f.write(record)
+    return offset, len(record), zlib.crc32(raw)
+
+
+def _finish(f: BinaryIO, index: _Index, created_at: float):
+    index_offset = f.tell()
+    for name, (offset, length, crc) in index.items():
+        encoded = name.encode()
+        f.write(_ENTRY.pack(offset, length, crc, len(encoded)))
+        f.write(encoded)
+    index_length = f.tell() - index_offset
+    f.truncate()
+    f.flush()
+    # the header goes last, so that a crash leaves the previous index in place
+    f.seek(0)
+    f.write(
+        _HEADER.pack(
+            SNAPSHOT_MAGIC,
+            SNAPSHOT_VERSION,
+            0,
+            created_at,
+            index_offset,
+            index_length,
+            len(index),
+        )
+    )
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class InventorySnapshot(Mapping):
+    """
+    Point in time copy of the servers of an account in a compact binary file.
+
+    Each server is stored as a zlib compressed record, followed by an index of
+    names, offsets and checksums, and a fixed header with the format version and
+    the time of the data. Opening a snapshot memory maps the file and only reads
+    the index: a record is decompressed and validated into a ``Server`` the first
+    time it is accessed.
+
+    ``update`` applies the next live fetch as a delta, appending only the records
+    whose content changed and a new index, and compacts the file once dead records
+    take more space than live ones. There must be a single writer per file, while
+    any number of processes can read it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._mmap = None
+        self._index: _Index = {}
+        self._decoded: Dict[str, Server] = {}
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise InventorySnapshotError(self.path, "empty file")
+        if len(self._mmap) < _HEADER.size:
+            self.close()
+            raise InventorySnapshotError(self.path, "truncated header")
+        magic, version, _, created_at, index_offset, index_length, count = (
+            _HEADER.unpack_from(self._mmap, 0)
+        )
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise InventorySnapshotError(self.path, "not an inventory snapshot")
+        if version != SNAPSHOT_VERSION:
+            self.close()
+            raise InventorySnapshotError(
+                self.path, f"unsupported schema version {version}"
+            )
+        self.version = version
+        self.created_at = created_at
+        self._index = {}
+        self._decoded = {}
+        position, end = index_offset, index_offset + index_length
+        while position < end:
+            offset, length, crc, name_length = _ENTRY.unpack_from(self._mmap, position)
+            position += _ENTRY.size
+            name = bytes(self._mmap[position : position + name_length]).decode()
+            position += name_length
+            self._index[name] = (offset, length, crc)
+        if len(self._index) != count:
+            self.close()
+            raise InventorySnapshotError(self.path, "corrupted index")
+
+    @classmethod
+    def write(
+        cls, path: str, servers: Iterable[Server], created_at: Optional[float] = None
+    ) -> "InventorySnapshot":
+        """
+        Writes a new snapshot of ``servers``, replacing ``path`` atomically.
+        """
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(b"\0" * _HEADER.size)
+            index = {server.name: _append(f, _encode(server)) for server in servers}
+            _finish(f, index, time() if created_at is None else created_at)
+        os.replace(temporary, path)
+        return cls(path)
+
+    def update(
+        self, servers: Iterable[Server], created_at: Optional[float] = None
+    ) -> InventoryDelta:
+        """
+        Brings the snapshot to the live ``servers``, writing only the records that
+        were added or changed, and returns the names added, changed and removed.
+        """
+        created_at = time() if created_at is None else created_at
+        delta = InventoryDelta()
+        index: _Index = {}
+        self._release()
+        try:
+            with open(self.path, "r+b") as f:
+                # records go after the current index, which stays valid until the
+                # header points to the new one
+                f.seek(0, os.SEEK_END)
+                for server in servers:
+                    previous = self._index.get(server.name)
+                    raw = _encode(server)
+                    if previous is not None and previous[2] == zlib.crc32(raw):
+                        index[server.name] = previous
+                        continue
+                    index[server.name] = _append(f, raw)
+                    (delta.changed if previous else delta.added).append(server.name)
+                delta.removed = [name for name in self._index if name not in index]
+                _finish(f, index, created_at)
+                size = f.seek(0, os.SEEK_END)
+        finally:
+            self._open()
+        live = sum(length for _, length, _ in index.values())
+        if size > 2 * live + _HEADER.size + 4096:
+            self.compact()
+        return delta
+
+    def compact(self):
+        """
+        Rewrites the file with the live records only.
+        """
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(b"\0" * _HEADER.size)
+            index = {}
+            for name, (offset, length, crc) in self._index.items():
+                index[name] = (f.tell(), length, crc)
+                f.write(self._mmap[offset : offset + length])
+            _finish(f, index, self.created_at)
+        self._release()
+        os.replace(temporary, self.path)
+        self._open()
+
+    @property
+    def age(self) -> float:
+        """
+        Seconds since the data of the snapshot was fetched.
+        """
+        return time() - self.created_at
+
+    @property
+    def created(self) -> datetime:
+        return datetime.fromtimestamp(self.created_at, tz=timezone.utc)
+
+    def __getitem__(self, name: str) -> Server:
+        server = self._decoded.get(name)
+        if server is None:
+            offset, length, _ = self._index[name]
+            record = zlib.decompress(self._mmap[offset : offset + length])
+            server = self._decoded[name] = Server.model_validate_json(record)
+        return server
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, name) -> bool:
+        return name in self._index
+
+    def servers(self) -> List[Server]:
+        return [self[name] for name in self._index]
+
+    def _release(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        self._release()
+        self._decoded = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
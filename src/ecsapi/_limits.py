@@ -0,0 +1,304 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import deque
+from time import monotonic, sleep, time
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+RATE_LIMIT_PATH_ENV_VAR = "ECSAPI_RATE_LIMIT_PATH"
+DEFAULT_RATE_LIMIT_PATH = os.path.join("~", ".cache", "ecsapi", "rate_limits.sqlite3")
+
+_BUCKETS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+
+class TokenBucket:
+    """
+    Rate limiter allowing ``rate`` requests per second on average, with bursts of
+    up to ``burst`` requests (``rate`` rounded up by default). Shared safely by
+    threads.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = monotonic,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """
+        Takes ``tokens`` if available and returns ``0``, otherwise returns the
+        seconds to wait before they are.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until ``tokens`` are available and takes them. Returns ``False``
+        without taking any when they would not be available within ``timeout``
+        seconds.
+        """
+        if tokens > self.burst:
+            raise ValueError("tokens must not exceed burst")
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return True
+            if deadline is not None and monotonic() + wait > deadline:
+                return False
+            sleep(wait)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits the requests in flight with AIMD: while the latency stays within
+    ``tolerance`` times its baseline the limit grows by one request per round of
+    ``limit`` successful requests, up to ``max_limit``, and on an overload signal
+    (a 429 or 5xx response, a timeout or a latency spike) it is multiplied by
+    ``backoff``, down to ``min_limit``. Only requests started after the last cut can
+    cut it again, so a burst of failures counts once.
+
+    The baseline is a slow EWMA of the latencies that were not spikes, kept per
+    ``key`` (the method and endpoint of the requests of an ``Api``) so that a slow
+    list call is never compared with fast lookups. The current limit and its last
+    ``history`` changes are exposed by ``snapshot`` and ``to_prometheus``.
+    """
+
+    def __init__(
+        self,
+        initial: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        backoff: float = 0.5,
+        tolerance: float = 2,
+        alpha: float = 0.05,
+        history: int = 256,
+        clock: Callable[[], float] = monotonic,
+    ):
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError(
+                "limits must satisfy 1 <= min_limit <= initial <= max_limit"
+            )
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.alpha = alpha
+        self.in_flight = 0
+        self.baselines: Dict[str, float] = {}
+        self.drops = 0
+        self._limit = float(initial)
+        self._clock = clock
+        self._last_drop = float("-inf")
+        self._history: Deque[Tuple[float, int]] = deque(
+            [(clock(), int(initial))], maxlen=history
+        )
+        self._changed = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def history(self) -> List[Tuple[float, int]]:
+        """
+        ``(clock time, limit)`` of the last changes of the limit.
+        """
+        with self._changed:
+            return list(self._history)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for a free slot and takes it. Returns ``False`` when none frees up
+        within ``timeout`` seconds.
+        """
+        with self._changed:
+            if not self._changed.wait_for(
+                lambda: self.in_flight < int(self._limit), timeout
+            ):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(
+        self,
+        elapsed: float,
+        overloaded: bool = False,
+        key: str = "",
+        sample: bool = True,
+    ):
+        """
+        Frees a slot taken by ``acquire``, adjusting the limit with the ``elapsed``
+        seconds of the request and whether the api signalled an overload. Without
+        ``sample`` (for example after a connection error) ``elapsed`` only dates the
+        start of the request and is not compared with the baseline of ``key``.
+        """
+        with self._changed:
+            busy = self.in_flight >= int(self._limit)
+            self.in_flight -= 1
+            if sample and not overloaded:
+                baseline = self.baselines.get(key)
+                if baseline is None:
+                    self.baselines[key] = elapsed
+                elif elapsed > baseline * self.tolerance:
+                    overloaded = True
+                else:
+                    self.baselines[key] = baseline + self.alpha * (elapsed - baseline)
+            if overloaded:
+                started = self._clock() - elapsed
+                if started >= self._last_drop:
+                    self._last_drop = self._clock()
+                    self.drops += 1
+                    self.__set(max(self._limit * self.backoff, self.min_limit))
+            elif sample and busy:
+                # only a limit that is reached proves it can grow
+                self.__set(min(self._limit + 1 / self._limit, self.max_limit))
+            self._changed.notify_all()
+
+    def __set(self, limit: float):
+        before = int(self._limit)
+        self._limit = limit
+        if int(limit) != before:
+            self._history.append((self._clock(), int(limit)))
+
+    def snapshot(self) -> Dict:
+        with self._changed:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self.in_flight,
+                "baselines_s": dict(self.baselines),
+                "drops": self.drops,
+                "history": list(self._history),
+            }
+
+    def to_prometheus(self, prefix: str = "ecsapi") -> str:
+        """
+        Returns the limit, the requests in flight and the cuts in the Prometheus text
+        exposition format.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, kind, help_text, value in (
+            ("concurrency_limit", "gauge", "Adaptive concurrency limit.", "limit"),
+            ("requests_in_flight", "gauge", "Requests in flight.", "in_flight"),
+            ("concurrency_drops_total", "counter", "Cuts of the limit.", "drops"),
+        ):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            lines.append(f"{prefix}_{name} {snapshot[value]}")
+        return "\n".join(lines) + "\n"
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    ``TokenBucket`` kept in a SQLite file, so that every thread and process of the
+    host using the same ``path`` and ``key`` draws from a single budget, for example
+    all the programs sharing an api token (see ``for_token``).
+
+    Each ``try_acquire`` is one short write transaction: the bucket is refilled by
+    the wall clock time elapsed since the last update, by any process, and the
+    tokens taken. ``rate`` and ``burst`` are those of the instance taking the
+    tokens, so every user of a bucket should pass the same ones. ``path`` defaults to
+    ``$ECSAPI_RATE_LIMIT_PATH`` or ``~/.cache/ecsapi/rate_limits.sqlite3``.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        key: str = "default",
+        path: Optional[str] = None,
+        busy_timeout: float = 5,
+        clock: Callable[[], float] = time,
+    ):
+        super().__init__(rate, burst, clock)
+        path = path or os.getenv(RATE_LIMIT_PATH_ENV_VAR, DEFAULT_RATE_LIMIT_PATH)
+        self.path = os.path.expanduser(path)
+        self.key = key
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._connection().execute(_BUCKETS_SCHEMA)
+
+    @classmethod
+    def for_token(
+        cls, token: str, rate: float, burst: Optional[float] = None, **kwargs
+    ) -> "SharedTokenBucket":
+        """
+        Bucket shared by everything using the api ``token``, keyed by its hash.
+        """
+        digest = hashlib.sha256(token.encode()).hexdigest()[:16]
+        return cls(rate, burst, key=f"token:{digest}", **kwargs)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections can not be shared between threads nor across a fork
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            # a lost refill after a power failure is harmless, skip the fsync
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT tokens, updated FROM buckets WHERE key = ?", (self.key,)
+            ).fetchone()
+            now = self._clock()
+            available = self.burst
+            if row is not None:
+                elapsed = max(now - row[1], 0)
+                available = min(self.burst, row[0] + elapsed * self.rate)
+            wait = 0
+            if available >= tokens:
+                available -= tokens
+            else:
+                wait = (tokens - available) / self.rate
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                (self.key, available, now),
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return wait
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
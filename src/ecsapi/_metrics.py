@@ -0,0 +1,185 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Tuple, List
+
+from ._hooks import RequestEvent, RequestObserver
+
+NETWORK_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PARSE_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total, result = 0, []
+        for bucket, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((f"{bucket:g}", total))
+        result.append(("+Inf", self.count))
+        return result
+
+    def snapshot(self) -> Dict:
+        return {
+            "buckets": dict(self.cumulative()),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class _EndpointMetrics:
+    __slots__ = (
+        "requests",
+        "network",
+        "parse",
+        "bytes_sent",
+        "bytes_received",
+        "retries",
+    )
+
+    def __init__(self):
+        self.requests: Dict[str, int] = {}
+        self.network = _Histogram(NETWORK_BUCKETS)
+        self.parse = _Histogram(PARSE_BUCKETS)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+
+
+class ApiMetrics(RequestObserver):
+    """
+    Per endpoint metrics of the requests sent by ``Api``.
+
+    It counts requests by status class (``error`` when no response was received),
+    keeps separate latency histograms for network and parse time, bytes in and out and
+    retries. Being an observer it sees the inner requests of compound calls too.
+    It is enabled with ``Api(metrics=True)`` and exported with ``to_prometheus`` or
+    ``snapshot``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[Tuple[str, str], _EndpointMetrics] = {}
+
+    def __metrics(self, event: RequestEvent) -> _EndpointMetrics:
+        key = (event.method, event.endpoint)
+        metrics = self._endpoints.get(key)
+        if metrics is None:
+            metrics = self._endpoints.setdefault(key, _EndpointMetrics())
+        return metrics
+
+    def __count(self, metrics: _EndpointMetrics, status_class: str):
+        metrics.requests[status_class] = metrics.requests.get(status_class, 0) + 1
+
+    def on_response(self, event: RequestEvent):
+        with self._lock:
+            metrics = self.__metrics(event)
+            self.__count(metrics, f"{event.status // 100}xx")
+            metrics.network.observe(event.network_time)
+            metrics.bytes_sent += event.bytes_sent
+            metrics.bytes_received += event.bytes_received
+
+    def on_parsed(self, event: RequestEvent):
+        with self._lock:
+            self.__metrics(event).parse.observe(event.parse_time)
+
+    def on_error(self, event: RequestEvent):
+        if event.status is not None:
+            return
+        with self._lock:
+            metrics = self.__metrics(event)
+            self.__count(metrics, "error")
+            metrics.network.observe(event.network_time)
+
+    def on_retry(self, event: RequestEvent):
+        with self._lock:
+            self.__metrics(event).retries += 1
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Returns the metrics as plain data, keyed by ``"<method> <endpoint>"``.
+        """
+        with self._lock:
+            return {
+                f"{method} {endpoint}": {
+                    "requests": dict(m.requests),
+                    "network_seconds": m.network.snapshot(),
+                    "parse_seconds": m.parse.snapshot(),
+                    "bytes_sent": m.bytes_sent,
+                    "bytes_received": m.bytes_received,
+                    "retries": m.retries,
+                }
+                for (method, endpoint), m in self._endpoints.items()
+            }
+
+    def to_prometheus(self, prefix: str = "ecsapi") -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = [
+                f"# HELP {prefix}_requests_total Requests by endpoint and status class.",
+                f"# TYPE {prefix}_requests_total counter",
+            ]
+            for (method, endpoint), m in endpoints:
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                for status_class, count in sorted(m.requests.items()):
+                    lines.append(
+                        f'{prefix}_requests_total{{{labels},status_class="{status_class}"}} {count}'
+                    )
+            for name, attr, help_text in (
+                ("network_seconds", "network", "Time waiting for the response."),
+                ("parse_seconds", "parse", "Time validating the response."),
+            ):
+                lines.append(f"# HELP {prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {prefix}_{name} histogram")
+                for (method, endpoint), m in endpoints:
+                    labels = f'endpoint="{endpoint}",method="{method}"'
+                    histogram = getattr(m, attr)
+                    for le, count in histogram.cumulative():
+                        lines.append(
+                            f'{prefix}_{name}_bucket{{{labels},le="{le}"}} {count}'
+                        )
+                    lines.append(f"{prefix}_{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{prefix}_{name}_count{{{labels}}} {histogram.count}")
+            for name, attr, help_text in (
+                ("sent_bytes_total", "bytes_sent", "Request body bytes sent."),
+                ("received_bytes_total", "bytes_received", "Response bytes received."),
+                ("retries_total", "retries", "Requests sent again by the client."),
+            ):
+                lines.append(f"# HELP {prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for (method, endpoint), m in endpoints:
+                    labels = f'endpoint="{endpoint}",method="{method}"'
+                    lines.append(f"{prefix}_{name}{{{labels}}} {getattr(m, attr)}")
+        return "\n".join(lines) + "\n"
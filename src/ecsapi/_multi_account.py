@@ -0,0 +1,166 @@
+from time import monotonic
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from ._action import Action
+from ._api import Api
+from ._deadline import Timeout, deadline
+from ._limits import SharedTokenBucket, TokenBucket
+from ._server import Server
+from ._transport import LimitedTransport, PooledTransport, Transport
+from .utils import run_bulk, DEFAULT_MAX_WORKERS
+
+DEFAULT_ACCOUNT_CONCURRENCY = 4
+
+
+class MultiAccountApi:
+    """
+    One ``Api`` per account, given as ``{account: token}``, over a single shared
+    transport (a ``PooledTransport`` by default) so that all accounts reuse the same
+    connections.
+
+    Each account has its own limits, ``rate`` requests per second with bursts of
+    ``burst`` and at most ``max_concurrency`` requests in flight, so a busy account
+    never eats into the quota of the others; ``add_account`` sets different limits
+    per account. ``run`` and the ``fetch_*`` helpers call every account in parallel,
+    each one in its own worker, and return the results and the errors keyed by
+    account: with ``max_wait`` the accounts still running when it expires fail with
+    ``DeadlineExceededError`` while the others return their results. With
+    ``shared_rate_limit`` (``True`` or the path of the file) the rate of each token
+    is a ``SharedTokenBucket``, shared with the other processes of the host, and
+    otherwise a ``TokenBucket`` timed by ``clock``.
+
+    The default transport keeps a connection per request that the accounts can
+    have in flight (``DEFAULT_MAX_WORKERS`` for accounts without
+    ``max_concurrency``) and grows when accounts are added. ``api_kwargs``
+    (``host``, ``timeout``, ...) are passed to every ``Api``.
+    """
+
+    def __init__(
+        self,
+        tokens: Dict[str, str],
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_concurrency: Optional[int] = DEFAULT_ACCOUNT_CONCURRENCY,
+        transport: Optional[Transport] = None,
+        shared_rate_limit: Union[bool, str] = False,
+        clock: Callable[[], float] = monotonic,
+        **api_kwargs,
+    ):
+        self.transport = transport or PooledTransport()
+        self.shared_rate_limit = shared_rate_limit
+        self.clock = clock
+        self.api_kwargs = api_kwargs
+        self.apis: Dict[str, Api] = {}
+        self._owns_transport = transport is None
+        self._concurrency: Dict[str, int] = {}
+        for account, token in tokens.items():
+            self.add_account(account, token, rate, burst, max_concurrency)
+
+    def add_account(
+        self,
+        account: str,
+        token: str,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_concurrency: Optional[int] = DEFAULT_ACCOUNT_CONCURRENCY,
+    ) -> Api:
+        bucket = None
+        if rate is not None and self.shared_rate_limit:
+            path = self.shared_rate_limit
+            bucket = SharedTokenBucket.for_token(
+                token, rate, burst, path=path if isinstance(path, str) else None
+            )
+        elif rate is not None:
+            bucket = TokenBucket(rate, burst, self.clock)
+        transport = LimitedTransport(
+            self.transport, bucket=bucket, max_concurrency=max_concurrency
+        )
+        api = Api(token=token, transport=transport, **self.api_kwargs)
+        self.apis[account] = api
+        self._concurrency[account] = max_concurrency or DEFAULT_MAX_WORKERS
+        self.__grow_pool()
+        return api
+
+    def remove_account(self, account: str):
+        del self.apis[account]
+        del self._concurrency[account]
+
+    def __grow_pool(self):
+        if not self._owns_transport:
+            return
+        size = max(DEFAULT_MAX_WORKERS, sum(self._concurrency.values()))
+        if size > self.transport.pool_maxsize:
+            self.transport.resize(size)
+
+    @property
+    def accounts(self) -> List[str]:
+        return list(self.apis)
+
+    def api(self, account: str) -> Api:
+        return self.apis[account]
+
+    def run(
+        self,
+        func: Callable[[Api], Any],
+        accounts: Optional[Iterable[str]] = None,
+        max_wait: Optional[float] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+        """
+        Calls ``func`` with the ``Api`` of each account (all of them by default) in
+        parallel, sharing a budget of ``max_wait`` seconds.
+        """
+        accounts = self.accounts if accounts is None else list(accounts)
+        with deadline(max_wait):
+            return run_bulk(
+                lambda account: func(self.apis[account]),
+                accounts,
+                max_workers=max(len(accounts), 1),
+            )
+
+    def fetch_servers(
+        self,
+        accounts: Optional[Iterable[str]] = None,
+        max_wait: Optional[float] = None,
+        timeout: Timeout = None,
+    ) -> Tuple[List[Tuple[str, Server]], Dict[str, Exception]]:
+        """
+        Fetches the servers of every account, merged in a single list of
+        ``(account, server)`` pairs.
+        """
+        results, errors = self.run(
+            lambda api: api.fetch_servers(timeout=timeout), accounts, max_wait
+        )
+        return _merge(results), errors
+
+    def fetch_actions(
+        self,
+        start: int = 0,
+        length: int = 50,
+        resource: str = None,
+        accounts: Optional[Iterable[str]] = None,
+        max_wait: Optional[float] = None,
+        timeout: Timeout = None,
+    ) -> Tuple[List[Tuple[str, Action]], Dict[str, Exception]]:
+        """
+        Fetches a page of actions of every account, merged in a single list of
+        ``(account, action)`` pairs.
+        """
+        results, errors = self.run(
+            lambda api: api.fetch_actions(start, length, resource, timeout=timeout)[0],
+            accounts,
+            max_wait,
+        )
+        return _merge(results), errors
+
+    def close(self):
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _merge(results: Dict[str, List]) -> List[Tuple[str, Any]]:
+    return [(account, item) for account, items in results.items() for item in items]
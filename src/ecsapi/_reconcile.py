@@ -0,0 +1,299 @@
+from enum import Enum
+from typing import Optional, List, Dict, Tuple, Any, Union
+
+from pydantic import BaseModel, Field, model_validator
+from typing_extensions import Self
+
+from ._action import Action
+from ._deadline import Timeout
+from ._server import Server, ServerCreateRequest
+from .errors import PlanNotAvailableError
+from .utils import run_bulk, DEFAULT_MAX_WORKERS
+
+
+class FleetServerSpec(BaseModel):
+    name: Optional[str] = None
+    plan: str
+    location: str
+    image: str
+    notes: str
+    group: Optional[str] = None
+    ssh_key: Optional[str] = None
+    support: Optional[str] = None
+    user_customize: Optional[Union[str, int]] = None
+
+    @property
+    def key(self) -> str:
+        return self.name or self.notes
+
+
+class FleetSpec(BaseModel):
+    servers: List[FleetServerSpec] = Field(default_factory=list)
+    group: Optional[str] = None
+    prune: bool = False
+
+    @model_validator(mode="after")
+    def check_unique_keys(self) -> Self:
+        keys = [server.key for server in self.servers]
+        duplicated = sorted({key for key in keys if keys.count(key) > 1})
+        if duplicated:
+            raise ValueError(f"server keys must be unique: {duplicated}")
+        return self
+
+
+class ReconcileActionEnum(str, Enum):
+    create = "create"
+    update = "update"
+    delete = "delete"
+
+
+class ReconcileChange(BaseModel):
+    action: ReconcileActionEnum
+    key: str
+    server: Optional[str] = None
+    spec: Optional[FleetServerSpec] = None
+    fields: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ReconcilePlan(BaseModel):
+    changes: List[ReconcileChange] = Field(default_factory=list)
+    unchanged: List[str] = Field(default_factory=list)
+    drifted: List[str] = Field(default_factory=list)
+    missing: List[str] = Field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not self.changes
+
+
+class FleetReconciler:
+    """
+    Drives the account towards a desired ``FleetSpec``.
+
+    A spec server is matched to an existing server by ``name`` when given, otherwise
+    by ``notes``, which acts as a stable label for servers whose name is assigned on
+    creation, so the key (name or notes) of each spec server must be unique. Servers
+    are only created for unnamed specs: the api assigns the name, so a named spec
+    with no matching server is reported as ``missing``. Only ``notes`` and ``group``
+    can be updated in place: a matched server with a different plan, location or
+    image is reported as ``drifted`` and left untouched. With ``prune`` the existing
+    servers not matched by the spec are deleted; when the spec has a ``group`` only
+    the servers of that group are managed.
+
+    Computing the plan costs a single ``fetch_servers`` call, so a pass over an
+    unchanged fleet never issues any other request, and the updated servers are
+    refreshed together by another one.
+    """
+
+    def __init__(self, api):
+        self.api = api
+
+    def plan(self, spec: FleetSpec, timeout: Timeout = None) -> ReconcilePlan:
+        current = [
+            s
+            for s in self.api.fetch_servers(timeout=timeout)
+            if spec.group is None or s.group == spec.group
+        ]
+        by_name = {s.name: s for s in current}
+        by_notes: Dict[str, List[Server]] = {}
+        for server in current:
+            by_notes.setdefault(server.notes, []).append(server)
+
+        plan = ReconcilePlan()
+        matched = set()
+        for server_spec in spec.servers:
+            if server_spec.group is None and spec.group is not None:
+                server_spec = server_spec.model_copy(update={"group": spec.group})
+            server = self.__match(server_spec, by_name, by_notes, matched)
+            if server is None and server_spec.name is not None:
+                plan.missing.append(server_spec.name)
+                continue
+            if server is None:
+                self.__add(
+                    plan,
+                    ReconcileChange(
+                        action=ReconcileActionEnum.create,
+                        key=server_spec.key,
+                        spec=server_spec,
+                    ),
+                )
+                continue
+            matched.add(server.name)
+            if self.__drifted(server_spec, server):
+                plan.drifted.append(server.name)
+                continue
+            fields = self.__diff(server_spec, server)
+            if fields:
+                self.__add(
+                    plan,
+                    ReconcileChange(
+                        action=ReconcileActionEnum.update,
+                        key=server_spec.key,
+                        server=server.name,
+                        spec=server_spec,
+                        fields=fields,
+                    ),
+                )
+            else:
+                plan.unchanged.append(server.name)
+
+        if spec.prune:
+            for server in current:
+                if server.name not in matched:
+                    self.__add(
+                        plan,
+                        ReconcileChange(
+                            action=ReconcileActionEnum.delete,
+                            key=server.name,
+                            server=server.name,
+                        ),
+                    )
+        return plan
+
+    @staticmethod
+    def __add(plan: ReconcilePlan, change: ReconcileChange):
+        # the key of a deletion (server name) can clash with a spec key (notes)
+        keys = {c.key for c in plan.changes}
+        key, suffix = change.key, 1
+        while key in keys:
+            key = f"{change.key}#{suffix}"
+            suffix += 1
+        change.key = key
+        plan.changes.append(change)
+
+    def apply(
+        self,
+        plan: ReconcilePlan,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        wait: bool = True,
+        fetch_every: float = 1,
+        max_wait: float = None,
+        timeout: Timeout = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+        """
+        Executes the changes of ``plan`` with at most ``max_workers`` concurrent calls.
+
+        It returns the result of each change (the updated ``Server`` of updates, the
+        ``Action`` of deletions and the action id of creations) and the errors, both
+        keyed by change key. With ``wait`` all the actions are tracked together and the
+        results of creations and deletions are their final ``Action``.
+        """
+        if plan.empty:
+            return {}, {}
+        changes = {change.key: change for change in plan.changes}
+        if len(changes) != len(plan.changes):
+            raise ValueError("the keys of the plan changes must be unique")
+        available = None
+        if any(c.action == ReconcileActionEnum.create for c in plan.changes):
+            available = {
+                (p.name, r.region)
+                for p in self.api.fetch_plans_available(timeout=timeout)
+                for r in p.region_available
+            }
+
+        def execute(key: str):
+            change = changes[key]
+            if change.action == ReconcileActionEnum.create:
+                request = self.__create_request(change.spec)
+                if (request.plan, request.location) not in available:
+                    raise PlanNotAvailableError(
+                        plan=request.plan, region=request.location
+                    )
+                _, action_id = self.api.create_server(
+                    request, check_if_can_create=False, timeout=timeout
+                )
+                return action_id
+            if change.action == ReconcileActionEnum.update:
+                return self.api.update_server(
+                    change.server, timeout=timeout, refetch=False, **change.fields
+                )
+            return self.api.delete_server(change.server, timeout=timeout)
+
+        results, errors = run_bulk(execute, changes, max_workers=max_workers)
+        updated = [
+            key for key in results if changes[key].action == ReconcileActionEnum.update
+        ]
+        if updated:
+            # one list call instead of a fetch_server per update
+            servers = {s.name: s for s in self.api.fetch_servers(timeout=timeout)}
+            for key in updated:
+                results[key] = servers.get(changes[key].server)
+        if not wait:
+            return results, errors
+        keys_by_action = {
+            (r.id if isinstance(r, Action) else r): key
+            for key, r in results.items()
+            if changes[key].action != ReconcileActionEnum.update
+        }
+        completed, failed = self.api.watch_actions(
+            keys_by_action,
+            fetch_every=fetch_every,
+            max_wait=max_wait,
+            max_workers=max_workers,
+            timeout=timeout,
+        )
+        for action_id, key in keys_by_action.items():
+            if action_id in completed:
+                results[key] = completed[action_id]
+            else:
+                del results[key]
+                errors[key] = failed[action_id]
+        return results, errors
+
+    def reconcile(
+        self,
+        spec: FleetSpec,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        wait: bool = True,
+        fetch_every: float = 1,
+        max_wait: float = None,
+        timeout: Timeout = None,
+    ) -> Tuple[ReconcilePlan, Dict[str, Any], Dict[str, Exception]]:
+        plan = self.plan(spec, timeout=timeout)
+        results, errors = self.apply(
+            plan,
+            max_workers=max_workers,
+            wait=wait,
+            fetch_every=fetch_every,
+            max_wait=max_wait,
+            timeout=timeout,
+        )
+        return plan, results, errors
+
+    @staticmethod
+    def __match(
+        spec: FleetServerSpec,
+        by_name: Dict[str, Server],
+        by_notes: Dict[str, List[Server]],
+        matched: set,
+    ) -> Optional[Server]:
+        if spec.name is not None:
+            server = by_name.get(spec.name)
+            return server if server is not None and server.name not in matched else None
+        for server in by_notes.get(spec.notes, []):
+            if server.name not in matched:
+                return server
+        return None
+
+    @staticmethod
+    def __drifted(spec: FleetServerSpec, server: Server) -> bool:
+        return (
+            spec.plan.lower() != server.plan.lower()
+            or spec.location != server.location
+            or spec.image != server.so
+        )
+
+    @staticmethod
+    def __diff(spec: FleetServerSpec, server: Server) -> Dict[str, Any]:
+        fields = {}
+        if spec.notes != server.notes:
+            fields["notes"] = spec.notes
+        if spec.group is not None and spec.group != server.group:
+            fields["group"] = spec.group
+        return fields
+
+    @staticmethod
+    def __create_request(spec: FleetServerSpec) -> ServerCreateRequest:
+        return ServerCreateRequest(
+            **spec.model_dump(exclude={"name"}, exclude_none=True)
+        )
@@ -0,0 +1,211 @@
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    Literal,
+    Optional,
+    Tuple,
+    get_args,
+)
+
+from ._limits import TokenBucket
+from ._metrics import NETWORK_BUCKETS, _Histogram
+from .utils import DEFAULT_MAX_WORKERS
+
+Priority = Literal["interactive", "default", "background"]
+
+DEFAULT_PRIORITY_WEIGHTS: Dict[str, float] = {
+    "interactive": 16,
+    "default": 4,
+    "background": 1,
+}
+# priority of the requests sent outside a ``priority`` block, by method and endpoint
+DEFAULT_ENDPOINT_PRIORITIES: Dict[Tuple[str, str], str] = {
+    ("GET", "/servers/{name}"): "interactive",
+    ("GET", "/servers/{name}/status"): "interactive",
+    ("GET", "/actions/{id}"): "interactive",
+    ("GET", "/actions"): "background",
+}
+
+_current: ContextVar[Optional[str]] = ContextVar("ecsapi_priority", default=None)
+
+
+def current_priority() -> Optional[str]:
+    return _current.get()
+
+
+@contextmanager
+def priority(name: Optional[Priority]) -> Iterator[None]:
+    """
+    Tags the requests sent in the block, also from the workers of the bulk helpers,
+    with the priority ``name``; ``None`` keeps the current one, if any.
+    """
+    if name is None:
+        yield
+        return
+    if name not in get_args(Priority):
+        raise ValueError(f"Priority must be in Priority: {Priority}")
+    token = _current.set(name)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("priority", "enqueued")
+
+    def __init__(self, priority: str, enqueued: float):
+        self.priority = priority
+        self.enqueued = enqueued
+
+
+class _ClassMetrics:
+    __slots__ = ("dispatched", "expired", "wait")
+
+    def __init__(self):
+        self.dispatched = 0
+        self.expired = 0
+        self.wait = _Histogram(NETWORK_BUCKETS)
+
+
+class PriorityScheduler:
+    """
+    Dispatches the requests of one or many ``Api`` from a queue per priority class,
+    with at most ``max_concurrency`` requests in flight and, with a ``bucket`` (a
+    ``TokenBucket``), at most one request per token.
+
+    While requests of many classes are waiting, each class gets a share of the
+    dispatches proportional to its weight (``DEFAULT_PRIORITY_WEIGHTS`` by
+    default): interactive requests overtake background ones, which still get one
+    turn in every ``sum(weights)`` and never starve. Requests of the same class are
+    dispatched in arrival order. The time spent queued is measured per class with
+    ``clock`` and exposed by ``snapshot``; timeouts always follow the real time.
+
+    The token of ``bucket`` is taken without holding the scheduler lock, as a
+    ``SharedTokenBucket`` takes it with a SQLite transaction: meanwhile requests
+    can still be queued, but only the request taking the token can be dispatched.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_WORKERS,
+        bucket: Optional[TokenBucket] = None,
+        weights: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.max_concurrency = max_concurrency
+        self.bucket = bucket
+        self.weights = dict(DEFAULT_PRIORITY_WEIGHTS, **(weights or {}))
+        self.in_flight = 0
+        self._queues: Dict[str, Deque[_Waiter]] = {
+            name: deque() for name in get_args(Priority)
+        }
+        self._passes: Dict[str, float] = dict.fromkeys(self._queues, 0.0)
+        self._virtual_time = 0.0
+        self._metrics = {name: _ClassMetrics() for name in self._queues}
+        self._clock = clock
+        self._taking = False
+        self._changed = threading.Condition()
+
+    def __next(self) -> Optional[_Waiter]:
+        # stride scheduling: the waiting class with the lowest pass goes first
+        waiting = [name for name, queue in self._queues.items() if queue]
+        if not waiting:
+            return None
+        return self._queues[min(waiting, key=self._passes.__getitem__)][0]
+
+    def __dispatch(self, waiter: _Waiter):
+        self._queues[waiter.priority].popleft()
+        self._virtual_time = self._passes[waiter.priority]
+        self._passes[waiter.priority] += 1 / self.weights[waiter.priority]
+        self.in_flight += 1
+        metrics = self._metrics[waiter.priority]
+        metrics.dispatched += 1
+        metrics.wait.observe(self._clock() - waiter.enqueued)
+
+    def acquire(self, name: Priority = "default", timeout: Optional[float] = None):
+        """
+        Waits for the turn of a request of priority ``name`` and takes a slot.
+        Returns ``False`` when the turn does not come within ``timeout`` seconds.
+        """
+        if name not in self._queues:
+            raise ValueError(f"Priority must be in Priority: {Priority}")
+        # the clock only measures the time queued, timeouts follow the real time
+        limit = None if timeout is None else monotonic() + timeout
+        waiter = _Waiter(name, self._clock())
+        with self._changed:
+            queue = self._queues[name]
+            if not queue:
+                # an idle class does not save up turns
+                self._passes[name] = max(self._passes[name], self._virtual_time)
+            queue.append(waiter)
+            while True:
+                wait = None
+                if (
+                    self.__next() is waiter
+                    and self.in_flight < self.max_concurrency
+                    and not self._taking
+                ):
+                    try:
+                        wait = self.__take_token()
+                    except BaseException:
+                        queue.remove(waiter)
+                        self._changed.notify_all()
+                        raise
+                    if not wait:
+                        self.__dispatch(waiter)
+                        self._changed.notify_all()
+                        return True
+                if limit is not None:
+                    left = limit - monotonic()
+                    if left <= 0:
+                        queue.remove(waiter)
+                        self._metrics[name].expired += 1
+                        self._changed.notify_all()
+                        return False
+                    wait = left if wait is None else min(wait, left)
+                self._changed.wait(wait)
+
+    def __take_token(self) -> float:
+        # called and returning with the lock held, released around the bucket
+        if self.bucket is None:
+            return 0
+        self._taking = True
+        self._changed.release()
+        try:
+            return self.bucket.try_acquire()
+        finally:
+            self._changed.acquire()
+            self._taking = False
+            self._changed.notify_all()
+
+    def release(self):
+        """
+        Frees a slot taken by ``acquire``.
+        """
+        with self._changed:
+            self.in_flight -= 1
+            self._changed.notify_all()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Queued, dispatched and expired requests and the histogram of the seconds
+        spent queued, by priority class.
+        """
+        with self._changed:
+            return {
+                name: {
+                    "queued": len(self._queues[name]),
+                    "dispatched": metrics.dispatched,
+                    "expired": metrics.expired,
+                    "wait_s": metrics.wait.snapshot(),
+                }
+                for name, metrics in self._metrics.items()
+            }
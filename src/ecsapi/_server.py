@@ -172,6 +172,14 @@ class _ServerUpdateRequest(BaseModel):
     group: Optional[str] = None
 
 
+def _patch_server(server: Server, request: _ServerUpdateRequest) -> Server:
+    # the server as the api returns it after the update, without fetching it
+    update = request.model_dump(exclude_none=True)
+    if update.get("group") == "nogroup":
+        update["group"] = None
+    return server.model_copy(update=update)
+
+
 class _ServerActionRequest(BaseModel):
     type: Literal["rollback", "console", "power_on", "power_off"]
     snapshot: Optional[int] = None
@@ -0,0 +1,114 @@
+from time import monotonic
+from typing import Literal, Optional, Union
+
+from ._action import Action
+from ._deadline import Timeout
+from ._server import Server
+
+DEFAULT_SERVER_REF_TTL = 30
+
+
+class ServerRef:
+    """
+    Handle to a server by name, loading the ``Server`` on the first attribute access
+    and caching it for ``ttl`` seconds (``None`` never expires, ``0`` always
+    refetches).
+
+    Any ``Server`` field can be read from the handle (``ref.ipv4``, ``ref.status``),
+    and the power and update methods act on the server directly. Power actions drop
+    the cached server, updates patch it locally. Many handles are refreshed together
+    with ``Api.refresh_servers``.
+    """
+
+    def __init__(
+        self,
+        api,
+        name: str,
+        ttl: Optional[float] = DEFAULT_SERVER_REF_TTL,
+        server: Optional[Server] = None,
+    ):
+        self.api = api
+        self.name = name
+        self.ttl = ttl
+        self._server: Optional[Server] = None
+        self._fetched_at: Optional[float] = None
+        if server is not None:
+            self._set(server)
+
+    def _set(self, server: Server):
+        self._server = server
+        self._fetched_at = monotonic()
+
+    @property
+    def stale(self) -> bool:
+        if self._server is None:
+            return True
+        if self.ttl is None:
+            return False
+        return monotonic() - self._fetched_at >= self.ttl
+
+    @property
+    def server(self) -> Server:
+        if self.stale:
+            self.refresh()
+        return self._server
+
+    def refresh(self, timeout: Timeout = None) -> Server:
+        self._set(self.api.fetch_server(self.name, timeout=timeout))
+        return self._server
+
+    def invalidate(self):
+        self._server = None
+        self._fetched_at = None
+
+    def __getattr__(self, attribute: str):
+        # only called for the attributes not set on the handle itself
+        if attribute in Server.model_fields:
+            return getattr(self.server, attribute)
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{attribute}'"
+        )
+
+    def turn_on(self, timeout: Timeout = None) -> Action:
+        self.invalidate()
+        return self.api.turn_on_server(self.name, timeout=timeout)
+
+    def turn_off(self, timeout: Timeout = None) -> Action:
+        self.invalidate()
+        return self.api.turn_off_server(self.name, timeout=timeout)
+
+    def rollback(self, snapshot_id: int, timeout: Timeout = None) -> Action:
+        self.invalidate()
+        return self.api.rollback_server(self.name, snapshot_id, timeout=timeout)
+
+    def delete(self, timeout: Timeout = None) -> Action:
+        self.invalidate()
+        return self.api.delete_server(self.name, timeout=timeout)
+
+    def update(
+        self,
+        notes: str = None,
+        group: Union[str, Literal["nogroup"]] = None,
+        timeout: Timeout = None,
+    ) -> "ServerRef":
+        cached = self._server
+        server = self.api.update_server(
+            cached or self.name,
+            notes=notes,
+            group=group,
+            timeout=timeout,
+            refetch=False,
+        )
+        if cached is not None:
+            # the patched server is as fresh as the one it was built from
+            self._server = server
+        return self
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ServerRef) and other.name == self.name
+
+    def __hash__(self) -> int:
+        return hash(self.name)
+
+    def __repr__(self) -> str:
+        return f"ServerRef({self.name!r})"
@@ -1,7 +1,7 @@
-from typing import List
+from typing import Dict, List
 
 from pydantic import BaseModel, TypeAdapter
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 class SshKey(BaseModel):
@@ -14,6 +14,14 @@ class SshKey(BaseModel):
 SshKeyListAdapter = TypeAdapter(List[SshKey])
 
 
+def _ssh_keys_by_label(keys: List[SshKey]) -> Dict[str, SshKey]:
+    # the first key wins when labels are repeated, as in a scan of the list
+    by_label = {}
+    for key in keys:
+        by_label.setdefault(key.label, key)
+    return by_label
+
+
 class _SshKeyListResponse(BaseModel):
     status: str
     pubkeys: List[SshKey]
@@ -29,6 +37,16 @@ class _SshKeyCreateRequest(BaseModel):
     label: str
 
 
+def _local_ssh_key(request: _SshKeyCreateRequest) -> SshKey:
+    # the key as the api stores it, without looking it up: the id is unknown
+    return SshKey.model_construct(
+        id=None,
+        key=request.key,
+        label=request.label,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
 class _SshKeyCreateResponse(BaseModel):
     status: str
 
@@ -0,0 +1,554 @@
+import base64
+import gzip
+import json
+import threading
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from time import monotonic, perf_counter, sleep
+from typing import Callable, Deque, Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from ._compression import (
+    CHUNK_SIZE,
+    DEFAULT_MAX_RESPONSE_SIZE,
+    accept_encoding,
+    decode,
+    decoder,
+)
+from ._deadline import Timeout, current_deadline
+from ._limits import TokenBucket
+from .errors import CassetteMismatchError, DeadlineExceededError
+from .utils import DEFAULT_MAX_WORKERS
+
+CASSETTE_VERSION = 1
+
+_endpoint: ContextVar[Optional[str]] = ContextVar("ecsapi_endpoint", default=None)
+_on_resend: ContextVar[Optional[Callable[[], None]]] = ContextVar(
+    "ecsapi_on_resend", default=None
+)
+
+
+@contextmanager
+def sending(
+    endpoint: Optional[str], on_resend: Optional[Callable[[], None]] = None
+) -> Iterator[None]:
+    """
+    Tags the requests sent in the block with the path template of their endpoint
+    (``/servers/{name}``), read by the transports through ``request_key``.
+    ``on_resend`` is called whenever a transport sends one of them again.
+    """
+    endpoint_token = _endpoint.set(endpoint)
+    resend_token = _on_resend.set(on_resend)
+    try:
+        yield
+    finally:
+        _on_resend.reset(resend_token)
+        _endpoint.reset(endpoint_token)
+
+
+def resending():
+    """
+    Called by a transport about to send a request again, to another endpoint or as
+    a hedge, so that the caller of ``sending`` can count it.
+    """
+    on_resend = _on_resend.get()
+    if on_resend is not None:
+        on_resend()
+
+
+def request_key(method: str, url: str) -> str:
+    """
+    Groups the requests of the same kind, for example ``GET /servers/{name}``: the
+    method and the endpoint set by ``sending``, or else the path of ``url``.
+    """
+    return f"{method.upper()} {_endpoint.get() or urlsplit(url).path}"
+
+
+class Transport:
+    """
+    Sends the HTTP requests of ``Api``.
+
+    ``send`` returns a ``requests.Response`` (or an object with the same
+    ``status_code``, ``headers``, ``content``, ``text`` and ``request.body``) and
+    raises the ``requests`` exceptions on network errors, so that implementations
+    can be swapped without changing how ``Api`` handles responses. ``timeout`` is
+    in seconds, either one value or a ``(connect, read)`` pair.
+    """
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict] = None,
+        body: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        timeout: Optional[Timeout] = None,
+    ) -> requests.Response:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def _with_accept_encoding(headers: Optional[Dict]) -> Dict:
+    headers = dict(headers or {})
+    headers.setdefault("Accept-Encoding", accept_encoding())
+    return headers
+
+
+def _read_body(response: requests.Response, max_size: Optional[int]):
+    """
+    Reads the body of a response sent with ``stream=True``, decompressing it chunk
+    by chunk under ``max_size``. The bytes read from the wire are kept in
+    ``ecsapi_wire_bytes``.
+    """
+    if response._content is not False or response.raw is None:
+        return
+    encoding = response.headers.get("Content-Encoding", "").strip().lower()
+    supported = encoding in ("", "identity") or decoder(encoding) is not None
+    try:
+        chunks = response.raw.stream(CHUNK_SIZE, decode_content=not supported)
+        content = decode(chunks, encoding if supported else "", max_size)
+    except zlib.error as e:
+        response.close()
+        raise requests.exceptions.ContentDecodingError(str(e)) from e
+    except Exception:
+        response.close()
+        raise
+    response._content = content
+    response._content_consumed = True
+    response.ecsapi_wire_bytes = response.raw.tell()
+
+
+class RequestsTransport(Transport):
+    """
+    Default transport, a ``requests.request`` per call.
+
+    Compression is negotiated explicitly (gzip and deflate, plus brotli and zstd
+    when their packages are installed) and responses are decompressed while they
+    are read; bodies larger than ``max_response_size`` once decompressed raise
+    ``ResponseTooLargeError``.
+    """
+
+    def __init__(self, max_response_size: Optional[int] = DEFAULT_MAX_RESPONSE_SIZE):
+        self.max_response_size = max_response_size
+
+    def send(self, method, url, params=None, body=None, headers=None, timeout=None):
+        response = requests.request(
+            method,
+            url,
+            json=body,
+            params=params,
+            headers=_with_accept_encoding(headers),
+            timeout=timeout,
+            stream=True,
+        )
+        _read_body(response, self.max_response_size)
+        return response
+
+
+def _request_key(method: str, url: str, params: Optional[Dict], body) -> Tuple:
+    prepared = requests.Request(method, url, params=params).prepare()
+    return (
+        method,
+        prepared.url,
+        None if body is None else json.dumps(body, sort_keys=True),
+    )
+
+
+def _build_response(
+    method: str,
+    url: str,
+    params: Optional[Dict],
+    body: Optional[Dict],
+    status: int,
+    headers: Dict[str, str],
+    content: bytes,
+) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = content
+    response.encoding = "utf-8"
+    response.request = requests.Request(method, url, params=params, json=body).prepare()
+    response.url = response.request.url
+    return response
+
+
+class PooledTransport(Transport):
+    """
+    Transport reusing connections through a ``requests.Session``.
+
+    Up to ``pool_maxsize`` connections per host are kept alive, so it should be at
+    least the ``max_workers`` of the bulk helpers. The session is shared between
+    threads, which is safe for the plain requests sent by ``Api``. Compression and
+    ``max_response_size`` are handled as in ``RequestsTransport``.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = DEFAULT_MAX_WORKERS,
+        max_retries: int = 0,
+        max_response_size: Optional[int] = DEFAULT_MAX_RESPONSE_SIZE,
+    ):
+        self.max_response_size = max_response_size
+        self.pool_connections = pool_connections
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self.resize(pool_maxsize)
+
+    def resize(self, pool_maxsize: int):
+        """
+        Keeps up to ``pool_maxsize`` connections per host from now on. Requests in
+        flight finish on the previous pool, whose connections are then dropped.
+        """
+        self.pool_maxsize = pool_maxsize
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=self.max_retries,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def send(self, method, url, params=None, body=None, headers=None, timeout=None):
+        response = self.session.request(
+            method,
+            url,
+            json=body,
+            params=params,
+            headers=_with_accept_encoding(headers),
+            timeout=timeout,
+            stream=True,
+        )
+        _read_body(response, self.max_response_size)
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+class InMemoryTransport(Transport):
+    """
+    Transport routing every request to ``handler`` in process, without sockets, to
+    measure the client side cost (building requests, checking and parsing
+    responses) apart from the network.
+
+    ``handler`` is called as ``handler(method, path, params, body, headers)`` with
+    the url path and the query string merged into ``params``, and returns either an
+    object with ``status_code``, ``headers`` and ``content`` or a
+    ``(status, headers, content)`` tuple. ``FakeEcs.handle`` of ``ecsapi.testing``
+    is such a handler.
+    """
+
+    def __init__(self, handler: Callable):
+        self.handler = handler
+
+    def send(self, method, url, params=None, body=None, headers=None, timeout=None):
+        split = urlsplit(url)
+        query = dict(parse_qsl(split.query))
+        if params:
+            query.update({k: str(v) for k, v in params.items() if v is not None})
+        result = self.handler(method, split.path, query, body, headers or {})
+        if isinstance(result, tuple):
+            status, response_headers, content = result
+        else:
+            status = result.status_code
+            response_headers, content = result.headers, result.content
+        return _build_response(
+            method, url, params, body, status, response_headers, content
+        )
+
+
+class HttpxTransport(Transport):
+    """
+    Transport based on ``httpx`` that multiplexes concurrent requests as HTTP/2
+    streams over a single connection per host.
+
+    ``httpx`` is an optional dependency (``pip install "httpx[http2]"``). Without
+    the ``h2`` package, or when the server does not negotiate HTTP/2 over TLS, the
+    requests fall back to HTTP/1.1 with a pool of ``max_connections``. Plain
+    ``http`` urls use HTTP/2 only with ``prior_knowledge``, as there is no
+    negotiation without TLS. Compression and ``max_response_size`` are handled as
+    in ``RequestsTransport``.
+    """
+
+    def __init__(
+        self,
+        http2: bool = True,
+        prior_knowledge: bool = False,
+        max_connections: int = 100,
+        verify: bool = True,
+        max_response_size: Optional[int] = DEFAULT_MAX_RESPONSE_SIZE,
+    ):
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError(
+                'HttpxTransport requires httpx: pip install "httpx[http2]"'
+            ) from e
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                http2 = False
+        self._httpx = httpx
+        self.http2 = http2
+        self.max_response_size = max_response_size
+        self.client = httpx.Client(
+            http1=not (http2 and prior_knowledge),
+            http2=http2,
+            verify=verify,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    def send(self, method, url, params=None, body=None, headers=None, timeout=None):
+        httpx = self._httpx
+        request = self.client.build_request(
+            method,
+            url,
+            params=params,
+            json=body,
+            headers=_with_accept_encoding(headers),
+            timeout=(
+                httpx.Timeout(timeout[1], connect=timeout[0])
+                if isinstance(timeout, tuple)
+                else timeout
+            ),
+        )
+        try:
+            response = self.client.send(request, stream=True)
+            try:
+                encoding = response.headers.get("Content-Encoding", "").strip().lower()
+                if encoding in ("", "identity") or decoder(encoding) is not None:
+                    chunks = response.iter_raw(CHUNK_SIZE)
+                else:
+                    chunks, encoding = response.iter_bytes(CHUNK_SIZE), ""
+                content = decode(chunks, encoding, self.max_response_size)
+            finally:
+                response.close()
+        except zlib.error as e:
+            raise requests.exceptions.ContentDecodingError(str(e)) from e
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+        built = _build_response(
+            method,
+            url,
+            params,
+            body,
+            response.status_code,
+            dict(response.headers),
+            content,
+        )
+        built.http_version = response.http_version
+        built.ecsapi_wire_bytes = response.num_bytes_downloaded
+        return built
+
+    def close(self):
+        self.client.close()
+
+
+class LimitedTransport(Transport):
+    """
+    Sends the requests through ``transport`` (``RequestsTransport`` by default)
+    within the limits of one account: at most one request per token of ``bucket``
+    (a ``TokenBucket``) and at most ``max_concurrency`` requests in flight.
+
+    Requests wait for their turn, for no longer than the active deadline if any,
+    raising ``DeadlineExceededError`` when it is spent. Many ``LimitedTransport``
+    can wrap the same transport to share its connection pool.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[Transport] = None,
+        bucket: Optional[TokenBucket] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.transport = transport or RequestsTransport()
+        self.bucket = bucket
+        self.max_concurrency = max_concurrency
+        self._slots = (
+            threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        )
+
+    def send(self, method, url, params=None, body=None, headers=None, timeout=None):
+        budget = current_deadline()
+        wait = budget.remaining() if budget is not None else None
+        if self._slots is not None and not self._slots.acquire(timeout=wait):
+            raise DeadlineExceededError(budget.seconds)
+        try:
+            wait = budget.remaining() if budget is not None else None
+            if self.bucket is not None and not self.bucket.acquire(timeout=wait):
+                raise DeadlineExceededError(budget.seconds)
+            return self.transport.send(method, url, params, body, headers, timeout)
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def close(self):
+        self.transport.close()
+
+
+class RecordingTransport(Transport):
+    """
+    Sends the requests through ``transport`` (``RequestsTransport`` by default) and
+    appends every exchange to the cassette at ``path``.
+
+    The cassette is a gzip compressed file with a JSON line per exchange: method, url
+    with the query string, request body, status, content type, response body, start
+    offset from the first request and duration. Request headers, hence the api
+    token, are not recorded. Network errors are recorded too and raised again on
+    replay.
+    """
+
+    def __init__(self, path: str, transport: Optional[Transport] = None):
+        self.path = path
+        self.transport = transport or RequestsTransport()
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._started: Optional[float] = None
+        self.__write(
+            {
+                "version": CASSETTE_VERSION,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+
+    def __write(self, record: Dict):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def send(self, method, url, params=None, body=None, headers=None, timeout=None):
+        started = perf_counter()
+        with self._lock:
+            if self._started is None:
+                self._started = started
+        method_, full_url, body_ = _request_key(method, url, params, body)
+        exchange = {
+            "method": method_,
+            "url": full_url,
+            "body": body_,
+            "started": started - self._started,
+        }
+        try:
+            response = self.transport.send(method, url, params, body, headers, timeout)
+        except requests.RequestException as e:
+            exchange["duration"] = perf_counter() - started
+            exchange["error"] = type(e).__name__
+            exchange["message"] = str(e)
+            with self._lock:
+                self.__write(exchange)
+            raise
+        exchange["duration"] = perf_counter() - started
+        exchange["status"] = response.status_code
+        exchange["headers"] = {
+            "Content-Type": response.headers.get("Content-Type", "application/json")
+        }
+        content = response.content or b""
+        try:
+            exchange["content"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            exchange["content"] = base64.b64encode(content).decode()
+            exchange["encoding"] = "base64"
+        with self._lock:
+            self.__write(exchange)
+        return response
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Answers the requests with the exchanges of a cassette written by
+    ``RecordingTransport``, without touching the network.
+
+    Requests are matched on method, url with query string and body; repeated
+    requests, like the polling of ``watch_action``, get the recorded responses in
+    order. With ``speed`` the recorded timeline is replayed ``speed`` times faster
+    (``1`` is the recorded speed): each response is returned when it was received
+    during the recording, relative to the first request of the replay, so the gaps
+    between requests and their overlap are reproduced. With ``speed=None`` responses
+    are returned as fast as possible. A request that is not in the cassette, or asked
+    more times than recorded, raises ``CassetteMismatchError``.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0):
+        self.path = path
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._exchanges: Dict[Tuple, Deque[Dict]] = {}
+        self._first_started: Optional[float] = None
+        self._replay_started: Optional[float] = None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(
+                    f"Unsupported cassette version: {header.get('version')}"
+                )
+            self.recorded_at = header.get("recorded_at")
+            for line in f:
+                exchange = json.loads(line)
+                key = (exchange["method"], exchange["url"], exchange["body"])
+                self._exchanges.setdefault(key, deque()).append(exchange)
+                started = exchange.get("started", 0)
+                if self._first_started is None or started < self._first_started:
+                    self._first_started = started
+
+    @property
+    def remaining(self) -> int:
+        """
+        Number of recorded exchanges not replayed yet.
+        """
+        with self._lock:
+            return sum(len(exchanges) for exchanges in self._exchanges.values())
+
+    def send(self, method, url, params=None, body=None, headers=None, timeout=None):
+        key = _request_key(method, url, params, body)
+        with self._lock:
+            exchanges = self._exchanges.get(key)
+            if not exchanges:
+                raise CassetteMismatchError(key[0], key[1], key[2])
+            exchange = exchanges.popleft()
+            if self._replay_started is None:
+                self._replay_started = monotonic()
+        if self.speed:
+            offset = exchange.get("started", 0) - self._first_started
+            answered_at = (
+                self._replay_started + (offset + exchange["duration"]) / self.speed
+            )
+            sleep(max(answered_at - monotonic(), 0))
+        if "error" in exchange:
+            error = getattr(requests.exceptions, exchange["error"], None)
+            if not (isinstance(error, type) and issubclass(error, Exception)):
+                error = requests.ConnectionError
+            raise error(exchange["message"])
+        if exchange.get("encoding") == "base64":
+            content = base64.b64decode(exchange["content"])
+        else:
+            content = exchange["content"].encode()
+        return _build_response(
+            method, url, params, body, exchange["status"], exchange["headers"], content
+        )
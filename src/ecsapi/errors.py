@@ -57,3 +57,56 @@ class PlanNotAvailableError(Exception):
 
     def __str__(self):
         return f"Plan `{self.plan}` not available in region `{self.region}`"
+
+
+class ServersWaitTimeoutError(Exception):
+    def __init__(self, status: str, pending: dict):
+        self.status = status
+        self.pending = pending
+
+    def __str__(self):
+        stragglers = ", ".join(
+            (
+                f"{name} (never seen)"
+                if server is None
+                else f"{name} ({server.status}, {server.progress}%)"
+            )
+            for name, server in self.pending.items()
+        )
+        return f"Max wait exceeded waiting for status `{self.status}`: {stragglers}"
+
+
+class CassetteMismatchError(Exception):
+    def __init__(self, method: str, url: str, body: str = None):
+        self.method = method
+        self.url = url
+        self.body = body
+
+    def __str__(self):
+        body = f" with body {self.body}" if self.body is not None else ""
+        return f"No recorded response left for {self.method} {self.url}{body}"
+
+
+class ResponseTooLargeError(Exception):
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+
+    def __str__(self):
+        return f"Response body exceeds the maximum size of {self.max_size} bytes"
+
+
+class DeadlineExceededError(Exception):
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def __str__(self):
+        return f"Deadline of {self.seconds}s exceeded"
+
+
+class InventorySnapshotError(Exception):
+    def __init__(self, path: str, reason: str):
+        self.path = path
+        self.reason = reason
+
+    def __str__(self):
+        return f"Invalid inventory snapshot `{self.path}`: {self.reason}"
@@ -0,0 +1,13 @@
+"""
+Stateful fake of the ECS api for offline tests and load tests.
+
+``FakeEcs`` keeps servers, actions, templates, cloud scripts and ssh keys in memory
+and moves them through their states over time; ``FakeEcsServer`` serves it over
+HTTP so that an ``Api`` can be pointed at it. Latency, jitter, errors and
+throttling are injected through ``FakeEcsConfig``.
+"""
+
+from ._fake import FakeEcs, FakeEcsConfig, FakeResponse
+from ._server import FakeEcsServer
+
+__all__ = ["FakeEcs", "FakeEcsConfig", "FakeResponse", "FakeEcsServer"]
@@ -0,0 +1,79 @@
+from typing import Dict, List
+
+REGIONS: List[Dict] = [
+    {"id": 2, "location": "it-mi2", "description": "Milano"},
+    {"id": 3, "location": "it-fr2", "description": "Frosinone"},
+    {"id": 6, "location": "ch-lug1", "description": "Lugano"},
+    {"id": 7, "location": "bg-sof1", "description": "Sofia"},
+]
+
+# name, cpu, ram, disk, hourly price, windows
+PLANS = [
+    ("eCS1", "1", "1024", "20", 0.019, False),
+    ("eCS2", "1", "2048", "40", 0.026, False),
+    ("eCS3", "2", "4096", "80", 0.046, False),
+    ("eCS4", "4", "8192", "160", 0.086, False),
+    ("eCS5", "8", "16384", "320", 0.166, False),
+    ("eCS1W", "2", "4096", "60", 0.055, True),
+]
+
+# name, description, so base, cloud image
+IMAGES = [
+    ("almalinux-9", "AlmaLinux 9", "almalinux", False),
+    ("rockylinux-9", "Rocky Linux 9", "rockylinux", False),
+    ("debian-12", "Debian 12", "debian", False),
+    ("ubuntu-2204", "Ubuntu 22.04", "ubuntu", False),
+    ("ubuntu-2404", "Ubuntu 24.04", "ubuntu", False),
+    ("windows-2022", "Windows Server 2022", "windows", False),
+    ("ubuntu-2404-cloud", "Ubuntu 24.04 cloud image", "ubuntu", True),
+    ("debian-12-cloud", "Debian 12 cloud image", "debian", True),
+]
+
+CATALOG_DATE = "2024-01-01T00:00:00+00:00"
+
+
+def plan(index: int, name, cpu, ram, disk, hourly_price, windows) -> Dict:
+    return {
+        "id": index,
+        "name": name,
+        "cpu": cpu,
+        "ram": ram,
+        "disk": disk,
+        "gpu": "0",
+        "gpu_label": None,
+        "hourly_price": hourly_price,
+        "montly_price": round(hourly_price * 730, 2),
+        "windows": windows,
+        "host_type": "ECS",
+        "available": True,
+        "default_image": None,
+    }
+
+
+def image(index: int, name, description, so_base, cloud_image) -> Dict:
+    return {
+        "id": index,
+        "name": name,
+        "creation_date": CATALOG_DATE,
+        "deletion_date": None,
+        "active_flag": True,
+        "status": "CD",
+        "uuid": f"{index:032x}",
+        "description": description,
+        "notes": "",
+        "public": True,
+        "cloud_image": cloud_image,
+        "so_base": so_base,
+        "required_disk": 20,
+        "api_version": "v4",
+        "api_version_value": 4,
+        "version": "",
+    }
+
+
+def plans() -> List[Dict]:
+    return [plan(i, *row) for i, row in enumerate(PLANS, start=1)]
+
+
+def images() -> List[Dict]:
+    return [image(i, *row) for i, row in enumerate(IMAGES, start=1)]
@@ -0,0 +1,843 @@
+import heapq
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from . import _catalog
+
+
+class FakeEcsConfig(BaseModel):
+    """
+    Behaviour of a ``FakeEcs``.
+
+    ``latency`` plus a uniform ``jitter`` is slept before every response,
+    ``error_rate`` of the requests fail with one of ``error_statuses`` and, when
+    ``throttle_rate`` is set, requests beyond ``throttle_rate`` per second (with
+    bursts of ``throttle_burst``) are answered with 429. Actions take
+    ``action_time`` seconds, except server creation (``boot_time``) and deletions
+    (``delete_time``), and ``action_failure_rate`` of them end as failed.
+    ``FakeEcsServer`` gzips the responses of at least ``gzip_min_size`` bytes when
+    the client accepts it.
+
+    The fields can be changed while the fake is serving.
+    """
+
+    latency: float = 0
+    jitter: float = 0
+    error_rate: float = 0
+    error_statuses: List[int] = Field(default_factory=lambda: [500, 502, 503])
+    throttle_rate: Optional[float] = None
+    throttle_burst: int = 10
+    boot_time: float = 2
+    action_time: float = 1
+    delete_time: float = 1
+    action_failure_rate: float = 0
+    user: str = "fake"
+    gzip_min_size: Optional[int] = None
+
+
+class FakeResponse:
+    __slots__ = ("status_code", "headers", "content")
+
+    def __init__(self, status_code: int, content: bytes, headers: Dict[str, str]):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+
+class _Job:
+    __slots__ = ("started", "duration", "failed", "on_progress", "on_done")
+
+    def __init__(self, started, duration, failed, on_progress, on_done):
+        self.started = started
+        self.duration = duration
+        self.failed = failed
+        self.on_progress = on_progress
+        self.on_done = on_done
+
+
+class FakeEcs:
+    """
+    In memory ECS api implementing the endpoints used by ``Api``.
+
+    Servers, actions, templates, cloud scripts and ssh keys are kept in memory and
+    move through their states as time passes: a created server is ``Booting`` and
+    its progress follows the creation action until it is ``Booted``, a deleted
+    server is ``Deleting`` until its action completes and so on. Time is read from
+    ``clock`` and can be moved forward with ``advance``, so tests do not need to
+    sleep.
+
+    ``handle`` answers a single request; ``FakeEcsServer`` serves it over HTTP.
+    Requests share a single lock only while they read or change the state: pending
+    actions are kept by due time, so each request completes just the due ones and
+    refreshes the progress of the records it returns, and responses are serialised
+    after the lock is released.
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        prefix: str = "ecs",
+        version: int = 2,
+        config: Optional[FakeEcsConfig] = None,
+        seed: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.token = token
+        self.prefix = prefix
+        self.version = version
+        self.base = f"/{prefix}/v{version}"
+        self.config = config or FakeEcsConfig()
+        self.requests = 0
+        self.servers: Dict[str, Dict] = {}
+        self.actions: Dict[int, Dict] = {}
+        self.templates: Dict[int, Dict] = {}
+        self.scripts: Dict[int, Dict] = {}
+        self.ssh_keys: Dict[int, Dict] = {}
+        self._power: Dict[str, str] = {}
+        self._jobs: Dict[int, _Job] = {}
+        # (due time, action id) of the pending jobs, and those reporting progress
+        self._due: List[Tuple[float, int]] = []
+        self._progressing = set()
+        self._random = random.Random(seed)
+        self._clock = clock
+        self._skew = 0.0
+        self._lock = threading.RLock()
+        self._throttle_lock = threading.Lock()
+        self._tokens: Optional[float] = None
+        self._refilled = 0.0
+        self._fail_next: List[int] = []
+        self._server_ids = itertools.count(200000)
+        self._template_ids = itertools.count(600)
+        self._action_ids = itertools.count(1)
+        self._script_ids = itertools.count(1)
+        self._ssh_key_ids = itertools.count(1)
+        self._plans = {plan["name"]: plan for plan in _catalog.plans()}
+        self._images = {image["name"]: image for image in _catalog.images()}
+        self._regions = {region["location"]: region for region in _catalog.REGIONS}
+
+        name, number = r"([^/]+)", r"(\d+)"
+        routes = [
+            ("GET", "/servers", self._list_servers),
+            ("POST", "/servers", self._create_server),
+            ("GET", f"/servers/{name}/status", self._server_status),
+            ("POST", f"/servers/{name}/actions", self._server_action),
+            ("GET", f"/servers/{name}", self._get_server),
+            ("PUT", f"/servers/{name}", self._update_server),
+            ("DELETE", f"/servers/{name}", self._delete_server),
+            ("GET", "/actions", self._list_actions),
+            ("GET", f"/actions/{number}", self._get_action),
+            ("GET", "/plans", self._list_plans),
+            ("GET", "/plans/availables", self._list_plans_available),
+            ("GET", "/regions", self._list_regions),
+            ("POST", "/regions/availables", self._list_regions_available),
+            ("GET", "/images/basics", self._list_images_basics),
+            ("GET", "/images/cloud-images", self._list_images_cloud),
+            ("GET", "/templates", self._list_templates),
+            ("POST", "/templates", self._create_template),
+            ("GET", f"/templates/{number}", self._get_template),
+            ("PATCH", f"/templates/{number}", self._update_template),
+            ("DELETE", f"/templates/{number}", self._delete_template),
+            ("GET", "/scripts", self._list_scripts),
+            ("POST", "/scripts", self._create_script),
+            ("GET", f"/scripts/{number}", self._get_script),
+            ("PATCH", f"/scripts/{number}", self._update_script),
+            ("DELETE", f"/scripts/{number}", self._delete_script),
+            ("GET", "/sshkeys", self._list_ssh_keys),
+            ("POST", "/sshkeys", self._create_ssh_key),
+            ("GET", f"/sshkeys/{number}", self._get_ssh_key),
+            ("DELETE", f"/sshkeys/{number}", self._delete_ssh_key),
+        ]
+        self._routes = [
+            (method, re.compile(rf"^{path}$"), handler)
+            for method, path, handler in routes
+        ]
+
+    # region time and faults
+
+    def now(self) -> float:
+        return self._clock() + self._skew
+
+    def advance(self, seconds: float):
+        """
+        Moves the clock of the fake forward, progressing every pending action.
+        """
+        with self._lock:
+            self._skew += seconds
+            self._tick()
+            self._progress(list(self._jobs))
+
+    def fail_next(self, count: int = 1, status: int = 500):
+        """
+        Makes the next ``count`` requests fail with ``status``.
+        """
+        with self._lock:
+            self._fail_next.extend([status] * count)
+
+    def _date(self) -> str:
+        now = datetime.now(timezone.utc) + timedelta(seconds=self._skew)
+        return now.isoformat()
+
+    def _throttle(self) -> Optional[float]:
+        rate = self.config.throttle_rate
+        if not rate:
+            return None
+        burst = self.config.throttle_burst
+        with self._throttle_lock:
+            now = self.now()
+            if self._tokens is None:
+                self._tokens = burst
+            else:
+                self._tokens = min(burst, self._tokens + (now - self._refilled) * rate)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return (1 - self._tokens) / rate
+
+    def _injected_status(self) -> Optional[int]:
+        if self._fail_next:
+            with self._lock:
+                if self._fail_next:
+                    return self._fail_next.pop(0)
+        if self.config.error_rate and self._random.random() < self.config.error_rate:
+            return self._random.choice(self.config.error_statuses)
+        return None
+
+    # endregion
+    # region dispatch
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict] = None,
+        body: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+    ) -> FakeResponse:
+        """
+        Answers a request for ``path`` (with the ``/<prefix>/v<version>`` base and
+        without the query string), applying latency and the injected faults.
+        """
+        with self._lock:
+            self.requests += 1
+        config = self.config
+        delay = config.latency
+        if config.jitter:
+            delay += self._random.uniform(0, config.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.token is not None and (headers or {}).get("X-APITOKEN") != self.token:
+            return self._error(401, "Invalid token")
+        retry_after = self._throttle()
+        if retry_after is not None:
+            response = self._error(429, "Too many requests")
+            response.headers["Retry-After"] = f"{retry_after:.3f}"
+            return response
+        status = self._injected_status()
+        if status is not None:
+            return self._error(status, "Injected failure")
+
+        if not path.startswith(self.base):
+            return self._error(404, "Not found")
+        path = path[len(self.base) :]
+        for route_method, pattern, handler in self._routes:
+            if route_method != method:
+                continue
+            match = pattern.match(path)
+            if match is None:
+                continue
+            with self._lock:
+                self._tick()
+                status, payload = handler(params or {}, body or {}, *match.groups())
+                payload = _detach(payload)
+            return self._json(status, payload)
+        return self._error(404, "Not found")
+
+    def _json(self, status: int, payload: Dict) -> FakeResponse:
+        return FakeResponse(
+            status,
+            json.dumps(payload).encode(),
+            {"Content-Type": "application/json"},
+        )
+
+    def _error(self, status: int, message: str) -> FakeResponse:
+        return self._json(status, {"status": "error", "message": message})
+
+    # endregion
+    # region state machine
+
+    def _tick(self):
+        # completes the due jobs only, the others are looked at by _progress
+        if not self._due or self._due[0][0] > self.now():
+            return
+        now = self.now()
+        while self._due and self._due[0][0] <= now:
+            _, action_id = heapq.heappop(self._due)
+            job = self._jobs.pop(action_id)
+            self._progressing.discard(action_id)
+            action = self.actions[action_id]
+            action["status"] = "failed" if job.failed else "completed"
+            action["progress"] = 100
+            action["completed_at"] = self._date()
+            if job.on_done is not None:
+                job.on_done(job.failed)
+
+    def _progress(self, action_ids: Iterable[int]):
+        # progress of pending jobs, not due yet after _tick
+        now = self.now()
+        for action_id in action_ids:
+            job = self._jobs.get(action_id)
+            if job is None:
+                continue
+            action = self.actions[action_id]
+            elapsed = (now - job.started) / job.duration
+            action["progress"] = min(int(elapsed * 100), 99)
+            if job.on_progress is not None:
+                job.on_progress(action["progress"])
+
+    def _start_action(
+        self,
+        action_type: str,
+        resource: str,
+        resource_type: str,
+        duration: float,
+        on_progress: Callable[[int], None] = None,
+        on_done: Callable[[bool], None] = None,
+    ) -> Dict:
+        action_id = next(self._action_ids)
+        date = self._date()
+        action = {
+            "id": action_id,
+            "status": "in-progress",
+            "user": self.config.user,
+            "created_at": date,
+            "started_at": date,
+            "completed_at": None,
+            "resource": resource,
+            "resource_type": resource_type,
+            "type": action_type,
+            "progress": 0,
+        }
+        failure_rate = self.config.action_failure_rate
+        failed = bool(failure_rate) and self._random.random() < failure_rate
+        self.actions[action_id] = action
+        started = self.now()
+        self._jobs[action_id] = _Job(started, duration, failed, on_progress, on_done)
+        heapq.heappush(self._due, (started + max(duration, 0), action_id))
+        if on_progress is not None:
+            self._progressing.add(action_id)
+        if duration <= 0:
+            self._tick()
+        return action
+
+    def _new_server(
+        self,
+        plan: str,
+        location: str,
+        image: str,
+        notes: str = "created by ecsapi",
+        group: Optional[str] = None,
+        support: Optional[str] = None,
+        status: str = "Booting",
+    ) -> Dict:
+        index = next(self._server_ids)
+        name = f"ec{index}"
+        size = self._plans[plan]
+        date = self._date()
+        server = {
+            "name": name,
+            "ipv4": f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}",
+            "ipv6": f"fd00::{index:x}",
+            "group": group,
+            "plan": plan,
+            "plan_size": {
+                "core": size["cpu"],
+                "ram": size["ram"],
+                "disk": size["disk"],
+                "gpu": size["gpu"],
+                "gpu_label": size["gpu_label"],
+                "host_type": size["host_type"],
+            },
+            "reserved_plans": [],
+            "last_restored_snapshot": None,
+            "is_reserved": False,
+            "reserved_until": "",
+            "support": None,
+            "location": location,
+            "location_label": self._regions[location]["description"],
+            "notes": notes,
+            "so": image,
+            "so_label": image,
+            "creation_date": date,
+            "deletion_date": None,
+            "active_flag": True,
+            "status": status,
+            "progress": 100 if status == "Booted" else 0,
+            "api_version": "v5",
+            "api_version_value": 5,
+            "user": self.config.user,
+            "virttype": "KVM",
+        }
+        if support is not None:
+            server["support"] = {
+                "server__name": name,
+                "server_notes": notes,
+                "support_title": support.capitalize(),
+                "support_code": support,
+                "immutable": False,
+                "start": date,
+                "end": None,
+                "may_downgrade": True,
+                "weigth": 1,
+                "days": 30,
+                "cancelled": False,
+                "cancelled_at": None,
+            }
+        self.servers[name] = server
+        self._power[name] = "RUNNING"
+        return server
+
+    def add_server(
+        self,
+        plan: str = "eCS1",
+        location: str = "it-fr2",
+        image: str = "ubuntu-2404",
+        **fields,
+    ) -> Dict:
+        """
+        Adds an already ``Booted`` server, without an action. ``fields`` override
+        the generated ones.
+        """
+        with self._lock:
+            server = self._new_server(plan, location, image, status="Booted")
+            server.update(fields)
+            return server
+
+    def add_servers(self, count: int, **fields) -> List[Dict]:
+        return [self.add_server(**fields) for _ in range(count)]
+
+    # endregion
+    # region servers
+
+    def _list_servers(self, params, body):
+        self._progress(self._progressing)
+        servers = list(self.servers.values())
+        return 200, {"status": "ok", "count": len(servers), "server": servers}
+
+    def _get_server(self, params, body, name):
+        self._progress(self._progressing)
+        server = self.servers.get(name)
+        if server is None:
+            return 404, {"status": "error", "message": f"Server {name} not found"}
+        return 200, {"status": "ok", "server": server}
+
+    def _server_status(self, params, body, name):
+        if name not in self.servers:
+            return 404, {"status": "error", "message": f"Server {name} not found"}
+        return 200, {
+            "status": "ok",
+            "server": {"name": name, "current_status": self._power[name]},
+        }
+
+    def _create_server(self, params, body):
+        plan, location, image = (
+            body.get("plan"),
+            body.get("location"),
+            body.get("image"),
+        )
+        if plan not in self._plans:
+            return 400, {"status": "error", "message": f"Invalid plan {plan}"}
+        if location not in self._regions:
+            return 400, {"status": "error", "message": f"Invalid location {location}"}
+        templates = {template["name"] for template in self.templates.values()}
+        if image not in self._images and image not in templates:
+            return 400, {"status": "error", "message": f"Invalid image {image}"}
+        server = self._new_server(
+            plan,
+            location,
+            image,
+            notes=body.get("notes") or "created by ecsapi",
+            group=body.get("group"),
+            support=body.get("support"),
+        )
+
+        def progress(value: int):
+            server["progress"] = value
+
+        def done(failed: bool):
+            server["status"] = "Fail" if failed else "Booted"
+            server["progress"] = 100
+
+        action = self._start_action(
+            "create_server",
+            server["name"],
+            "ECS",
+            self.config.boot_time,
+            on_progress=progress,
+            on_done=done,
+        )
+        return 200, {"status": "ok", "action_id": action["id"], "server": server}
+
+    def _update_server(self, params, body, name):
+        server = self.servers.get(name)
+        if server is None:
+            return 404, {"status": "error", "message": f"Server {name} not found"}
+        if body.get("notes") is not None:
+            server["notes"] = body["notes"]
+        if body.get("group") is not None:
+            server["group"] = None if body["group"] == "nogroup" else body["group"]
+        return 200, {"status": "ok"}
+
+    def _server_action(self, params, body, name):
+        server = self.servers.get(name)
+        if server is None:
+            return 404, {"status": "error", "message": f"Server {name} not found"}
+        if server["status"] == "Deleting":
+            return 400, {"status": "error", "message": f"Server {name} is deleting"}
+        action_type = body.get("type")
+        if action_type in ("power_on", "power_off"):
+            power = "RUNNING" if action_type == "power_on" else "STOPPED"
+
+            def done(failed: bool):
+                if not failed:
+                    self._power[name] = power
+
+            action = self._start_action(
+                action_type, name, "ECS", self.config.action_time, on_done=done
+            )
+        elif action_type == "rollback":
+            snapshot_id = body.get("snapshot")
+            if snapshot_id is None:
+                return 400, {"status": "error", "message": "Missing snapshot"}
+            server["status"] = "Reimaging"
+
+            def done(failed: bool):
+                server["status"] = "Booted"
+                if not failed:
+                    server["last_restored_snapshot"] = self._snapshot(
+                        server, snapshot_id
+                    )
+
+            action = self._start_action(
+                action_type, name, "ECS", self.config.action_time, on_done=done
+            )
+        elif action_type == "console":
+            action = self._start_action(action_type, name, "ECS", 0)
+        else:
+            return 400, {"status": "error", "message": f"Invalid type {action_type}"}
+        return 200, action
+
+    def _snapshot(self, server: Dict, snapshot_id: int) -> Dict:
+        date = self._date()
+        return {
+            "id": snapshot_id,
+            "name": f"{server['name']}-SNP-{snapshot_id}",
+            "user": self.config.user,
+            "snapshot_parent": None,
+            "snapshot_parent_name": None,
+            "is_last_restored": True,
+            "protected": False,
+            "restoring": False,
+            "source_server": server["name"],
+            "status": "CD",
+            "status_label": "Created",
+            "uid": f"{snapshot_id:032x}",
+            "description": "",
+            "notes": "",
+            "active_flag": True,
+            "size_on_disk": None,
+            "created_at": date,
+            "updated_at": date,
+            "deleted_at": None,
+            "api_version_value": 5,
+            "api_version": "v5",
+        }
+
+    def _delete_server(self, params, body, name):
+        server = self.servers.get(name)
+        if server is None:
+            return 404, {"status": "error", "message": f"Server {name} not found"}
+        if server["status"] == "Deleting":
+            return 400, {"status": "error", "message": f"Server {name} is deleting"}
+        previous = server["status"]
+        server["status"] = "Deleting"
+
+        def done(failed: bool):
+            if failed:
+                server["status"] = previous
+                return
+            self.servers.pop(name, None)
+            self._power.pop(name, None)
+
+        action = self._start_action(
+            "delete_server", name, "ECS", self.config.delete_time, on_done=done
+        )
+        return 200, {"status": "ok", "action": action}
+
+    # endregion
+    # region actions
+
+    def _list_actions(self, params, body):
+        resource = params.get("resource")
+        actions = [
+            action
+            for action in reversed(self.actions.values())
+            if resource is None or action["resource"] == resource
+        ]
+        start = int(params.get("start", 0))
+        length = int(params.get("length", 50))
+        page = actions[start : start + length]
+        self._progress(action["id"] for action in page)
+        return 200, {
+            "status": "ok",
+            "actions": page,
+            "total_actions": len(actions),
+        }
+
+    def _get_action(self, params, body, action_id):
+        self._progress([int(action_id)])
+        action = self.actions.get(int(action_id))
+        if action is None:
+            return 404, {"status": "error", "message": f"Action {action_id} not found"}
+        return 200, {"status": "ok", "action": action}
+
+    # endregion
+    # region catalog
+
+    def _list_plans(self, params, body):
+        plans = [
+            dict(plan, available_regions=_catalog.REGIONS)
+            for plan in self._plans.values()
+        ]
+        return 200, {"status": "ok", "plans": plans}
+
+    def _list_plans_available(self, params, body):
+        hosts: Dict[tuple, List[Dict]] = {}
+        for server in self.servers.values():
+            hosts.setdefault((server["plan"], server["location"]), []).append(
+                {"name": server["name"], "notes": server["notes"]}
+            )
+        plans = []
+        for plan in self._plans.values():
+            images = [
+                image
+                for image in self._images.values()
+                if (image["so_base"] == "windows") == plan["windows"]
+            ]
+            regions = [
+                {
+                    "region": location,
+                    "hosts": [
+                        {
+                            "host": f"ecs1.{location}.fake",
+                            "servers": hosts.get((plan["name"], location), []),
+                        }
+                    ],
+                }
+                for location in self._regions
+            ]
+            plans.append(dict(plan, os_availables=images, region_availables=regions))
+        return 200, {"status": "ok", "plans": plans}
+
+    def _list_regions(self, params, body):
+        return 200, {"status": "ok", "regions": _catalog.REGIONS}
+
+    def _list_regions_available(self, params, body):
+        plan = body.get("plan")
+        if plan not in self._plans:
+            return 400, {"status": "error", "message": f"Invalid plan {plan}"}
+        return 200, {"status": "ok", "regions": [list(self._regions)]}
+
+    def _list_images_basics(self, params, body):
+        images = [i for i in self._images.values() if not i["cloud_image"]]
+        return 200, {"status": "ok", "images": images}
+
+    def _list_images_cloud(self, params, body):
+        images = [i for i in self._images.values() if i["cloud_image"]]
+        return 200, {"status": "ok", "images": images}
+
+    # endregion
+    # region templates
+
+    def _list_templates(self, params, body):
+        return 200, {"status": "ok", "templates": list(self.templates.values())}
+
+    def _get_template(self, params, body, template_id):
+        template = self.templates.get(int(template_id))
+        if template is None:
+            return 404, {
+                "status": "error",
+                "message": f"Template {template_id} not found",
+            }
+        return 200, {"status": "ok", "template": template}
+
+    def _create_template(self, params, body):
+        source = body.get("server")
+        if source is not None and source not in self.servers:
+            return 400, {"status": "error", "message": f"Invalid server {source}"}
+        if source is None and body.get("snapshot") is None:
+            return 400, {"status": "error", "message": "Missing server or snapshot"}
+        so = self.servers[source]["so"] if source is not None else "linux"
+        template_id = next(self._template_ids)
+        name = f"ei{200000 + template_id}"
+        template = {
+            "id": template_id,
+            "name": name,
+            "creation_date": self._date(),
+            "deletion_date": None,
+            "active_flag": False,
+            "status": "CG",
+            "uuid": f"{template_id:032x}",
+            "description": body.get("description") or "created by ecsapi",
+            "notes": body.get("notes") or "created by ecsapi",
+            "public": False,
+            "cloud_image": False,
+            "so_base": so.split("-")[0],
+            "required_disk": 20,
+            "api_version": "v5",
+            "api_version_value": 5,
+            "version": "",
+        }
+        self.templates[template_id] = template
+
+        def done(failed: bool):
+            template["status"] = "FL" if failed else "CD"
+            template["active_flag"] = not failed
+
+        action = self._start_action(
+            "create_template", name, "ECI", self.config.action_time, on_done=done
+        )
+        return 200, {"status": "ok", "action_id": action["id"], "template": template}
+
+    def _update_template(self, params, body, template_id):
+        template = self.templates.get(int(template_id))
+        if template is None:
+            return 404, {
+                "status": "error",
+                "message": f"Template {template_id} not found",
+            }
+        for field in ("notes", "description"):
+            if body.get(field) is not None:
+                template[field] = body[field]
+        return 200, {"status": "ok", "template": template}
+
+    def _delete_template(self, params, body, template_id):
+        template_id = int(template_id)
+        template = self.templates.get(template_id)
+        if template is None:
+            return 404, {
+                "status": "error",
+                "message": f"Template {template_id} not found",
+            }
+        template["status"] = "DE"
+
+        def done(failed: bool):
+            if failed:
+                template["status"] = "CD"
+                return
+            self.templates.pop(template_id, None)
+
+        action = self._start_action(
+            "delete_template",
+            template["name"],
+            "ECI",
+            self.config.delete_time,
+            on_done=done,
+        )
+        return 200, {"status": "ok", "action": action}
+
+    # endregion
+    # region scripts
+
+    def _list_scripts(self, params, body):
+        return 200, {"status": "ok", "scripts": list(self.scripts.values())}
+
+    def _get_script(self, params, body, script_id):
+        script = self.scripts.get(int(script_id))
+        if script is None:
+            return 404, {"status": "error", "message": f"Script {script_id} not found"}
+        return 200, {"status": "ok", "script": script}
+
+    def _create_script(self, params, body):
+        script_id = next(self._script_ids)
+        script = {
+            "id": script_id,
+            "user": self.config.user,
+            "title": body.get("title") or "by ecsapi",
+            "content": body.get("content") or "by ecsapi",
+            "windows": bool(body.get("windows")),
+            "public": False,
+            "category": None,
+        }
+        self.scripts[script_id] = script
+        return 200, {"status": "ok", "script": script}
+
+    def _update_script(self, params, body, script_id):
+        script = self.scripts.get(int(script_id))
+        if script is None:
+            return 404, {"status": "error", "message": f"Script {script_id} not found"}
+        for field in ("title", "content", "windows"):
+            if body.get(field) is not None:
+                script[field] = body[field]
+        return 200, {"status": "ok", "script": script}
+
+    def _delete_script(self, params, body, script_id):
+        if self.scripts.pop(int(script_id), None) is None:
+            return 404, {"status": "error", "message": f"Script {script_id} not found"}
+        return 200, {"status": "ok"}
+
+    # endregion
+    # region ssh keys
+
+    def _list_ssh_keys(self, params, body):
+        return 200, {"status": "ok", "pubkeys": list(self.ssh_keys.values())}
+
+    def _get_ssh_key(self, params, body, key_id):
+        ssh_key = self.ssh_keys.get(int(key_id))
+        if ssh_key is None:
+            return 404, {"status": "error", "message": f"Key {key_id} not found"}
+        return 200, {"status": "ok", "pubkey": ssh_key}
+
+    def _create_ssh_key(self, params, body):
+        if not body.get("key") or not body.get("label"):
+            return 400, {"status": "error", "message": "Missing key or label"}
+        key_id = next(self._ssh_key_ids)
+        self.ssh_keys[key_id] = {
+            "id": key_id,
+            "key": body["key"],
+            "label": body["label"],
+            "created_at": self._date(),
+        }
+        return 200, {"status": "ok"}
+
+    def _delete_ssh_key(self, params, body, key_id):
+        if self.ssh_keys.pop(int(key_id), None) is None:
+            return 404, {"status": "error", "message": f"Key {key_id} not found"}
+        return 200, {"status": "ok"}
+
+    # endregion
+
+
+def _detach(payload: Any) -> Any:
+    # copies the records of a payload, to be serialised without the lock: records
+    # are replaced, never changed, below their first level
+    if isinstance(payload, dict):
+        return {key: _copy(value) for key, value in payload.items()}
+    return _copy(payload)
+
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+    return value
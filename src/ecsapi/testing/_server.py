@@ -0,0 +1,124 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from .._api import Api
+from ._fake import FakeEcs, FakeEcsConfig
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class FakeEcsServer:
+    """
+    Serves a ``FakeEcs`` over HTTP/1.1 with keep-alive from a thread per
+    connection, on ``127.0.0.1`` and a free port unless ``port`` is given.
+
+    Use it as a context manager, or call ``start`` and ``stop``::
+
+        with FakeEcsServer(config=FakeEcsConfig(latency=0.05)) as server:
+            api = server.api()
+            server_, action_id = api.create_server(request)
+    """
+
+    def __init__(
+        self,
+        fake: Optional[FakeEcs] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        config: Optional[FakeEcsConfig] = None,
+    ):
+        self.fake = fake or FakeEcs(config=config)
+        self._server = _HTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    def _handler(self):
+        fake = self.fake
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = None
+                if length:
+                    try:
+                        body = json.loads(self.rfile.read(length))
+                    except ValueError:
+                        body = None
+                url = urlsplit(self.path)
+                response = fake.handle(
+                    self.command,
+                    url.path,
+                    params=dict(parse_qsl(url.query)),
+                    body=body,
+                    headers=self.headers,
+                )
+                content = response.content
+                min_size = fake.config.gzip_min_size
+                self.send_response(response.status_code)
+                for header, value in response.headers.items():
+                    self.send_header(header, value)
+                if (
+                    min_size is not None
+                    and len(content) >= min_size
+                    and "gzip" in self.headers.get("Accept-Encoding", "")
+                ):
+                    content = gzip.compress(content)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _serve
+
+        return Handler
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def api(self, **kwargs) -> Api:
+        """
+        Returns an ``Api`` pointed at this server.
+        """
+        return Api(
+            token=self.fake.token or "fake",
+            host=self.host,
+            port=self.port,
+            prefix=self.fake.prefix,
+            version=self.fake.version,
+            protocol="http",
+            **kwargs,
+        )
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+DEFAULT_MAX_WORKERS = 10
+
+
+def run_bulk(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Tuple[Dict[Any, Any], Dict[Any, Exception]]:
+    """
+    Calls ``func`` on each item with at most ``max_workers`` concurrent calls.
+
+    It returns the results and the raised exceptions, both keyed by item, so one
+    failure never stops the others. Duplicated items are called once. Each call
+    runs in a copy of the caller context, so an active ``Api.deadline`` also bounds
+    the requests sent by the workers.
+    """
+    results, errors = {}, {}
+    items = list(dict.fromkeys(items))
+    if not items:
+        return results, errors
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        futures = {item: pool.submit(copy_context().run, func, item) for item in items}
+        for item, future in futures.items():
+            try:
+                results[item] = future.result()
+            except Exception as e:
+                errors[item] = e
+    return results, errors
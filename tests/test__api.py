@@ -10,6 +10,7 @@ from src.ecsapi.errors import (
     NotFoundError,
     ActionExitStatusError,
     ActionMaxRetriesExceededError,
+    ServersWaitTimeoutError,
 )
 from src.ecsapi._api import (
     __initialize_env__,
@@ -33,6 +34,10 @@ from src.ecsapi._api import (
     DEFAULT_VERSION,
     Api,
 )
+from src.ecsapi._hooks import RequestObserver
+from src.ecsapi._server_ref import ServerRef
+from src.ecsapi._transport import InMemoryTransport
+from src.ecsapi.testing import FakeEcs
 import os
 import pytest
 from httmock import urlmatch, HTTMock, all_requests
@@ -249,6 +254,22 @@ def mock_ssh_key_create_fetch_response(url, request):
     return {"status_code": 200, "content": SSH_KEYS_FETCH_RESPONSE}
 
 
+@urlmatch(netloc=r"localhost:8080")
+def mock_bulk_response(url, request):
+    if url.path.endswith("/servers/ec404/actions"):
+        return {"status_code": 404}
+    if request.method == "POST":
+        return {"status_code": 200, "content": SINGLE_ACTION_RESPONSE}
+    if request.method == "DELETE":
+        return {"status_code": 200, "content": SERVER_DELETE_RESPONSE}
+    if "/actions/" in url.path:
+        return {"status_code": 200, "content": ACTION_FETCH_RESPONSE}
+    servers = json.loads(SERVERS_FETCH_RESPONSE)
+    for server in servers["server"]:
+        server["group"] = "eg12345"
+    return {"status_code": 200, "content": json.dumps(servers)}
+
+
 def get_api():
     return Api(
         token="abcde",
@@ -518,6 +539,44 @@ def test_Api__delete():
     assert res["method"] == "DELETE"
 
 
+class RecordingObserver(RequestObserver):
+    def __init__(self):
+        self.calls = []
+
+    def on_request_start(self, event):
+        self.calls.append(("start", event.endpoint))
+
+    def on_response(self, event):
+        self.calls.append(("response", event.status))
+
+    def on_parsed(self, event):
+        self.calls.append(("parsed", event.endpoint))
+
+    def on_error(self, event):
+        self.calls.append(("error", type(event.error)))
+
+
+def test_Api_observers():
+    api = get_api()
+    observer = RecordingObserver()
+    api.add_observer(observer)
+    with HTTMock(mock_servers_fetch_response):
+        api.fetch_server("ec200410")
+        pytest.raises(NotFoundError, api.fetch_server, "ec12345")
+    assert observer.calls == [
+        ("start", "/servers/{name}"),
+        ("response", 200),
+        ("parsed", "/servers/{name}"),
+        ("start", "/servers/{name}"),
+        ("response", 404),
+        ("error", NotFoundError),
+    ]
+    api.remove_observer(observer)
+    with HTTMock(mock_servers_fetch_response):
+        api.fetch_servers()
+    assert len(observer.calls) == 6
+
+
 def test_Api_fetch_servers():
     api = get_api()
     with HTTMock(mock_servers_fetch_response):
@@ -581,12 +640,77 @@ def test_Api_update_server():
         api.update_server("ec200410", "david martinez", "edgerunner")
 
 
+def get_fake_api(fake: FakeEcs, calls: list) -> Api:
+    def handler(method, path, params, body, headers):
+        calls.append((method, path))
+        return fake.handle(method, path, params, body, headers)
+
+    return Api(
+        token="abcde",
+        host="localhost",
+        port=8080,
+        prefix="ecs",
+        version=2,
+        protocol="http",
+        transport=InMemoryTransport(handler),
+    )
+
+
+def test_Api_update_server_without_refetch():
+    fake, calls = FakeEcs(), []
+    name = fake.add_server(group="eg1")["name"]
+    api = get_fake_api(fake, calls)
+    server = api.fetch_server(name)
+    patched = api.update_server(server, notes="patched", group="nogroup", refetch=False)
+    assert patched.notes == "patched"
+    assert patched.group is None
+    assert server.notes != "patched"
+    ref = api.update_server(name, notes="again", refetch=False)
+    assert isinstance(ref, ServerRef) and ref.name == name
+    assert [method for method, _ in calls] == ["GET", "PUT", "PUT"]
+    assert fake.servers[name]["notes"] == "again"
+    # read lazily, with the new values
+    assert ref.notes == "again"
+    assert [method for method, _ in calls] == ["GET", "PUT", "PUT", "GET"]
+
+
+def test_Api_update_servers():
+    fake, calls = FakeEcs(), []
+    names = [server["name"] for server in fake.add_servers(5)]
+    api = get_fake_api(fake, calls)
+    servers, errors = api.update_servers(names + ["ec404"], notes="bulk")
+    assert isinstance(errors["ec404"], NotFoundError)
+    assert sorted(servers) == sorted(names)
+    assert all(server.notes == "bulk" for server in servers.values())
+    assert calls.count(("GET", "/ecs/v2/servers")) == 1
+    assert len(calls) == 7
+    servers, errors = api.update_servers(names, notes="local", refetch=False)
+    assert sorted(ref.name for ref in servers.values()) == sorted(names)
+    assert len(calls) == 12
+
+
 def test_Api_delete_server():
     api = get_api()
     with HTTMock(mock_server_delete_fetch_response):
         api.delete_server("ec200410")
 
 
+def test_Api_delete_servers():
+    api = get_api()
+    with HTTMock(mock_bulk_response):
+        pytest.raises(ValueError, api.delete_servers)
+        pytest.raises(ValueError, api.delete_servers, ["ec200410"], "eg12345")
+        targets = api.delete_servers(group="eg12345", dry_run=True)
+        assert [s.name for s in targets] == ["ec200410"]
+        targets = api.delete_servers(["ec200410", "ec1"], dry_run=True)
+        assert [s.name for s in targets] == ["ec200410"]
+        actions, errors = api.delete_servers(
+            server_filter=lambda s: s.location == "it-fr2"
+        )
+        assert actions["ec200410"].status == "completed"
+        assert not errors
+
+
 def test_Api_turn_on_server():
     api = get_api()
     with HTTMock(mock_server_action_response):
@@ -605,6 +729,56 @@ def test_Api_rollback_server():
         api.rollback_server("ec200410", 1234)
 
 
+def test_Api_wait_for_servers():
+    api = get_api()
+    stragglers = []
+    with HTTMock(mock_servers_fetch_response):
+        servers = list(api.wait_for_servers(["ec200410"], per_server_threshold=0))
+        assert [s.name for s in servers] == ["ec200410"]
+        servers = list(api.wait_for_servers(["ec200410"], status="Booted"))
+        assert [s.name for s in servers] == ["ec200410"]
+        with pytest.raises(ServersWaitTimeoutError):
+            list(
+                api.wait_for_servers(
+                    ["ec200410", "ec12345"],
+                    status="Deleted",
+                    fetch_every=0.001,
+                    max_wait=0.01,
+                    on_fetch=lambda pending, retry: stragglers.append(pending),
+                )
+            )
+    assert stragglers[0]["ec200410"].progress == 100
+    assert stragglers[0]["ec12345"] is None
+
+
+def test_Api_turn_on_servers():
+    api = get_api()
+    with HTTMock(mock_bulk_response):
+        pytest.raises(ValueError, api.turn_on_servers)
+        actions, errors = api.turn_on_servers(["ec200410", "ec404"])
+        assert list(actions) == ["ec200410"]
+        assert isinstance(errors["ec404"], NotFoundError)
+        actions, errors = api.turn_on_servers(group="eg12345", wait=True)
+        assert actions["ec200410"].status == "completed"
+        assert not errors
+
+
+def test_Api_turn_off_servers():
+    api = get_api()
+    with HTTMock(mock_bulk_response):
+        actions, errors = api.turn_off_servers(["ec200410"], wait=True)
+        assert actions["ec200410"].status == "completed"
+
+
+def test_Api_rollback_servers():
+    api = get_api()
+    with HTTMock(mock_bulk_response):
+        actions, errors = api.rollback_servers({"ec200410": 107})
+        assert list(actions) == ["ec200410"]
+        actions, errors = api.rollback_servers(group="eg12345")
+        assert list(actions) == ["ec200410"]
+
+
 def test_Api_fetch_server_status():
     api = get_api()
     with HTTMock(mock_server_status_fetch_response):
@@ -778,6 +952,25 @@ def test_Api_watch_action():
     assert True
 
 
+def test_Api_watch_actions():
+    api = get_api()
+    with HTTMock(mock_action_fetch_response):
+        completed, errors = api.watch_actions([1234, 1235])
+        assert list(completed) == [1234, 1235]
+        completed, errors = api.watch_actions(
+            [1234], desired_status="not existing status", exit_on_status="completed"
+        )
+        assert isinstance(errors[1234], ActionExitStatusError)
+        completed, errors = api.watch_actions(
+            [1234],
+            desired_status="not existing status",
+            exit_on_status="not existing status",
+            fetch_every=0.001,
+            max_wait=0.01,
+        )
+        assert isinstance(errors[1234], ActionMaxRetriesExceededError)
+
+
 def test_Api_fetch_ssh_keys():
     api = get_api()
     with HTTMock(mock_ssh_keys_fetch_response):
@@ -799,6 +992,22 @@ def test_Api_create_ssh_key():
     assert True
 
 
+def test_Api_create_ssh_keys():
+    fake, calls = FakeEcs(), []
+    api = get_fake_api(fake, calls)
+    solo = api.create_ssh_key("ssh-ed25519 AAAA", "solo", refetch=False)
+    assert (solo.id, solo.key, solo.label) == (None, "ssh-ed25519 AAAA", "solo")
+    assert solo.created_at.tzinfo is not None
+    keys, errors = api.create_ssh_keys(
+        {"alex": "ssh-ed25519 BBBB", "sam": "ssh-ed25519 CCCC", "empty": ""}
+    )
+    assert keys["alex"].key == "ssh-ed25519 BBBB"
+    assert keys["sam"].label == "sam"
+    assert list(errors) == ["empty"]
+    assert calls.count(("GET", "/ecs/v2/sshkeys")) == 1
+    assert len(calls) == 5
+
+
 def test_Api_delete_ssh_key():
     api = get_api()
     with HTTMock(mock_ssh_key_delete_response):
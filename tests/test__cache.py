@@ -0,0 +1,153 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from src.ecsapi import Api, DiskCache, InMemoryTransport
+from src.ecsapi._server import ServerCreateRequest
+from src.ecsapi.testing import FakeEcs
+
+
+class ETagHandler:
+    """
+    Serves a ``FakeEcs`` with an ``ETag`` on every response, answering 304 to the
+    requests revalidating it.
+    """
+
+    def __init__(self, fake: FakeEcs, etag: str = '"v1"'):
+        self.fake = fake
+        self.etag = etag
+        self.calls = []
+
+    def __call__(self, method, path, params, body, headers):
+        self.calls.append((method, path, headers.get("If-None-Match")))
+        if method == "GET" and headers.get("If-None-Match") == self.etag:
+            return 304, {"ETag": self.etag}, b""
+        response = self.fake.handle(method, path, params, body, headers)
+        return (
+            response.status_code,
+            dict(response.headers, ETag=self.etag),
+            response.content,
+        )
+
+
+def get_api(handler, cache: DiskCache, token: str = "fake") -> Api:
+    return Api(
+        token=token,
+        host="localhost",
+        port=8080,
+        prefix="ecs",
+        version=2,
+        protocol="http",
+        transport=InMemoryTransport(handler),
+        cache=cache,
+    )
+
+
+def test_DiskCache_serves_fresh_entries(tmp_path):
+    handler = ETagHandler(FakeEcs())
+    path = str(tmp_path / "cache.sqlite3")
+    api = get_api(handler, DiskCache(path))
+    plans = api.fetch_plans()
+    assert api.fetch_plans() == plans
+    assert len(handler.calls) == 1
+    assert api.cache.hits == 1
+
+    # a new process starts from the file
+    assert get_api(handler, DiskCache(path)).fetch_plans() == plans
+    assert len(handler.calls) == 1
+    # other accounts never share entries
+    get_api(handler, DiskCache(path), token="other").fetch_plans()
+    assert len(handler.calls) == 2
+    # endpoints without a ttl are not cached
+    api.fetch_servers()
+    api.fetch_servers()
+    assert len(handler.calls) == 4
+
+
+def test_DiskCache_revalidates_expired_entries(tmp_path):
+    handler = ETagHandler(FakeEcs())
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), ttls={"/regions": 0})
+    api = get_api(handler, cache)
+    regions = api.fetch_regions()
+    assert api.fetch_regions() == regions
+    assert handler.calls == [
+        ("GET", "/ecs/v2/regions", None),
+        ("GET", "/ecs/v2/regions", '"v1"'),
+    ]
+    handler.etag = '"v2"'
+    api.fetch_regions()
+    assert handler.calls[-1] == ("GET", "/ecs/v2/regions", '"v1"')
+    api.fetch_regions()
+    assert handler.calls[-1] == ("GET", "/ecs/v2/regions", '"v2"')
+    assert len(handler.calls) == 4
+
+
+def test_DiskCache_invalidated_by_writes(tmp_path):
+    fake = FakeEcs()
+    server = fake.add_server()["name"]
+    handler = ETagHandler(fake)
+    api = get_api(handler, DiskCache(str(tmp_path / "cache.sqlite3")))
+    assert api.fetch_templates() == []
+    api.fetch_plans()
+    api.create_template(server=server)
+    assert len(api.fetch_templates()) == 1
+    api.fetch_plans()
+    assert [call[1] for call in handler.calls] == [
+        "/ecs/v2/templates",
+        "/ecs/v2/plans",
+        "/ecs/v2/templates",
+        "/ecs/v2/templates",
+    ]
+
+
+def fill(path: str, worker: int):
+    cache = DiskCache(path)
+    for i in range(50):
+        cache.put("namespace", f"{worker}-{i}", "/plans", b"payload")
+
+
+def test_DiskCache_shared_across_processes(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    processes = [
+        multiprocessing.Process(target=fill, args=(path, worker)) for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    cache = DiskCache(path)
+    assert all(
+        cache.get("namespace", f"{worker}-{i}").content == b"payload"
+        for worker in range(4)
+        for i in range(50)
+    )
+
+
+def test_DiskCache_servers_invalidate_availability(tmp_path):
+    handler = ETagHandler(FakeEcs())
+    api = get_api(handler, DiskCache(str(tmp_path / "cache.sqlite3")))
+    api.fetch_plans_available()
+    api.fetch_plans()
+    request = ServerCreateRequest(plan="eCS1", location="it-fr2", image="ubuntu-2404")
+    server, _ = api.create_server(request, check_if_can_create=False)
+    api.fetch_plans_available()
+    api.fetch_plans()
+    api.delete_server(server.name)
+    api.fetch_plans_available()
+    assert [call[:2] for call in handler.calls] == [
+        ("GET", "/ecs/v2/plans/availables"),
+        ("GET", "/ecs/v2/plans"),
+        ("POST", "/ecs/v2/servers"),
+        ("GET", "/ecs/v2/plans/availables"),
+        ("DELETE", f"/ecs/v2/servers/{server.name}"),
+        ("GET", "/ecs/v2/plans/availables"),
+    ]
+
+
+def test_DiskCache_counts_from_threads(tmp_path):
+    handler = ETagHandler(FakeEcs())
+    api = get_api(handler, DiskCache(str(tmp_path / "cache.sqlite3")))
+    api.fetch_regions()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: api.fetch_regions(), range(400)))
+    assert (api.cache.hits, api.cache.misses) == (400, 1)
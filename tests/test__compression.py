@@ -0,0 +1,98 @@
+import gzip
+import zlib
+
+import pytest
+import requests
+
+from src.ecsapi._compression import CHUNK_SIZE, accept_encoding, decode, decoder
+from src.ecsapi._hooks import RequestObserver
+from src.ecsapi._transport import PooledTransport, RequestsTransport
+from src.ecsapi.errors import ResponseTooLargeError
+from src.ecsapi.testing import FakeEcsConfig, FakeEcsServer, FakeResponse
+
+
+def split(data: bytes, size: int = 1000):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_accept_encoding():
+    assert accept_encoding().startswith("gzip, deflate")
+
+
+def test_decode():
+    payload = b'{"status": "ok"}' * 1000
+    assert decode(split(gzip.compress(payload)), "gzip") == payload
+    assert decode(split(zlib.compress(payload)), "deflate") == payload
+    assert decode(split(payload)) == payload
+
+
+def test_decode_max_size():
+    bomb = gzip.compress(b"\0" * 50 * 2**20)
+    with pytest.raises(ResponseTooLargeError):
+        decode(split(bomb, 64 * 1024), "gzip", max_size=2**20)
+    with pytest.raises(ResponseTooLargeError):
+        decode([bomb], "gzip", max_size=2**20)
+    with pytest.raises(ResponseTooLargeError):
+        decode(split(b"a" * 2000), max_size=1000)
+
+
+def test_decode_brotli_max_size():
+    brotli = pytest.importorskip("brotli")
+    payload = b'{"status": "ok"}' * 1000
+    assert decode(split(brotli.compress(payload)), "br") == payload
+    bomb = brotli.compress(b"\0" * 50 * 2**20)
+    assert len(bomb) < 64 * 1024
+    # the chunk is given out piece by piece, never expanded in full
+    assert len(next(decoder("br").stream([bomb]))) < 2 * CHUNK_SIZE
+    with pytest.raises(ResponseTooLargeError):
+        decode([bomb], "br", max_size=2**20)
+
+
+def test_decode_zstd_max_size():
+    zstandard = pytest.importorskip("zstandard")
+    payload = b'{"status": "ok"}' * 1000
+    compressor = zstandard.ZstdCompressor()
+    assert decode(split(compressor.compress(payload)), "zstd") == payload
+    bomb = compressor.compress(b"\0" * 50 * 2**20)
+    assert len(bomb) < 64 * 1024
+    # the chunk is given out piece by piece, never expanded in full
+    assert len(next(decoder("zstd").stream([bomb]))) <= CHUNK_SIZE
+    with pytest.raises(ResponseTooLargeError):
+        decode([bomb], "zstd", max_size=2**20)
+
+
+def test_RequestsTransport_gzip():
+    class Sizes(RequestObserver):
+        def on_response(self, event):
+            self.received = event.bytes_received
+
+    observer = Sizes()
+    with FakeEcsServer(config=FakeEcsConfig(gzip_min_size=0)) as server:
+        server.fake.add_servers(50)
+        for transport in (RequestsTransport(), PooledTransport()):
+            api = server.api(transport=transport)
+            api.add_observer(observer)
+            assert len(api.fetch_servers()) == 50
+            response = transport.send(
+                "GET",
+                f"http://127.0.0.1:{server.port}/ecs/v2/servers",
+                headers={"X-APITOKEN": "fake"},
+            )
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert observer.received < len(response.content) / 4
+
+        api = server.api(transport=RequestsTransport(max_response_size=1000))
+        with pytest.raises(ResponseTooLargeError):
+            api.fetch_servers()
+
+
+def test_RequestsTransport_corrupted_body():
+    corrupted = FakeResponse(
+        200,
+        b"not gzip",
+        {"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+    with FakeEcsServer() as server:
+        server.fake.handle = lambda *args, **kwargs: corrupted
+        with pytest.raises(requests.exceptions.ContentDecodingError):
+            server.api().fetch_servers()
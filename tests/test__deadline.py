@@ -0,0 +1,120 @@
+import time
+
+import pytest
+
+from src.ecsapi import Api, InMemoryTransport
+from src.ecsapi._deadline import Deadline, budget_of, current_deadline, deadline
+from src.ecsapi._server import ServerCreateRequest
+from src.ecsapi.errors import ActionMaxRetriesExceededError, DeadlineExceededError
+from src.ecsapi.testing import FakeEcs, FakeEcsConfig, FakeEcsServer
+from src.ecsapi.utils import run_bulk
+
+
+class TimeoutsTransport(InMemoryTransport):
+    def __init__(self, handler):
+        super().__init__(handler)
+        self.timeouts = []
+
+    def send(self, method, url, params=None, body=None, headers=None, timeout=None):
+        self.timeouts.append(timeout)
+        return super().send(method, url, params, body, headers, timeout)
+
+
+def get_api(transport, **kwargs) -> Api:
+    return Api(
+        token="fake",
+        host="localhost",
+        port=8080,
+        prefix="ecs",
+        version=2,
+        protocol="http",
+        transport=transport,
+        **kwargs,
+    )
+
+
+def test_budget_of():
+    assert budget_of(None) is None
+    assert budget_of(2.5) == 2.5
+    assert budget_of((1, 4)) == 5
+    assert budget_of((1, None)) is None
+
+
+def test_deadline_nested_keeps_tighter_budget():
+    assert current_deadline() is None
+    with deadline(10) as outer:
+        with deadline(60) as inner:
+            assert inner is outer
+        with deadline(1) as inner:
+            assert inner is not outer
+            assert current_deadline() is inner
+        with deadline(None) as inner:
+            assert inner is outer
+    assert current_deadline() is None
+
+
+def test_Deadline_clamp():
+    budget = Deadline(2)
+    connect, read = budget.clamp((1, 10))
+    assert connect == 1
+    assert 1.9 < read <= 2
+    connect, read = budget.clamp(None)
+    assert 1.9 < connect <= 2 and connect == read
+    with pytest.raises(DeadlineExceededError):
+        Deadline(0).clamp(5)
+
+
+def test_connect_timeout_and_deadline():
+    transport = TimeoutsTransport(FakeEcs(token="fake").handle)
+    api = get_api(transport, timeout=5, connect_timeout=1)
+    api.fetch_servers()
+    api.fetch_servers(timeout=(0.5, 3))
+    with api.deadline(2):
+        api.fetch_servers()
+    assert transport.timeouts[0] == (1, 5)
+    assert transport.timeouts[1] == (0.5, 3)
+    connect, read = transport.timeouts[2]
+    assert connect == 1 and 1.9 < read <= 2
+
+
+def test_expired_deadline_stops_requests():
+    transport = TimeoutsTransport(FakeEcs(token="fake").handle)
+    api = get_api(transport)
+    with pytest.raises(DeadlineExceededError):
+        with api.deadline(0.05):
+            time.sleep(0.06)
+            api.fetch_servers()
+    assert transport.timeouts == []
+
+
+def test_deadline_propagates_to_bulk_workers():
+    with deadline(5) as budget:
+        results, errors = run_bulk(lambda _: current_deadline(), range(4))
+    assert errors == {}
+    assert all(result is budget for result in results.values())
+
+
+def test_create_server_budget_shared_by_inner_requests():
+    with FakeEcsServer(config=FakeEcsConfig(latency=0.3)) as server:
+        api = server.api()
+        request = ServerCreateRequest(
+            plan="eCS1", location="it-fr2", image="ubuntu-2404"
+        )
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            api.create_server(request, timeout=0.45)
+        assert time.monotonic() - started < 0.6
+
+
+def test_watch_action_max_wait():
+    with FakeEcsServer(config=FakeEcsConfig(boot_time=60)) as server:
+        api = server.api()
+        request = ServerCreateRequest(
+            plan="eCS1", location="it-fr2", image="ubuntu-2404"
+        )
+        _, action_id = api.create_server(request, check_if_can_create=False)
+        started = time.monotonic()
+        with pytest.raises(ActionMaxRetriesExceededError) as e:
+            api.watch_action(action_id, fetch_every=10, max_wait=0.2)
+        assert time.monotonic() - started < 1
+        assert e.value.last_status == "in-progress"
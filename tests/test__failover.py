@@ -0,0 +1,212 @@
+import time
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from src.ecsapi import Api, FailoverTransport, InMemoryTransport, Transport
+from src.ecsapi._api import ENDPOINTS_ENV_VAR, __initialize_endpoints__
+from src.ecsapi._server import ServerCreateRequest
+from src.ecsapi._transport import _build_response
+from src.ecsapi.testing import FakeEcs
+
+PRIMARY = "http://primary:8080"
+MIRROR = "http://mirror:8080"
+
+
+class Hosts(Transport):
+    """
+    Serves one ``FakeEcs`` from many hosts, each of which can be taken down
+    (connection refused), made to time out after serving the request, made
+    unavailable (503) or slowed down.
+    """
+
+    def __init__(self):
+        self.fake = FakeEcs()
+        self.backend = InMemoryTransport(self.fake.handle)
+        self.down = set()
+        self.timing_out = set()
+        self.unavailable = set()
+        self.delay = {}
+        self.calls = []
+
+    def send(self, method, url, params=None, body=None, headers=None, timeout=None):
+        host = urlsplit(url).netloc
+        self.calls.append((host, method))
+        if host in self.down:
+            refused = NewConnectionError(None, f"{host} refused the connection")
+            raise requests.ConnectionError(MaxRetryError(None, url, refused))
+        time.sleep(self.delay.get(host, 0))
+        if host in self.unavailable:
+            return _build_response(method, url, params, body, 503, {}, b"")
+        response = self.backend.send(method, url, params, body, headers, timeout)
+        if host in self.timing_out:
+            raise requests.ReadTimeout(f"{host} did not answer in time")
+        return response
+
+
+def get_api(hosts: Hosts, **kwargs) -> Api:
+    return Api(
+        token="fake",
+        prefix="ecs",
+        version=2,
+        transport=FailoverTransport([PRIMARY, MIRROR], hosts, **kwargs),
+    )
+
+
+def test_FailoverTransport_fails_over_and_ejects():
+    hosts = Hosts()
+    hosts.down.add("primary:8080")
+    api = get_api(hosts, eject_after=2, eject_for=60, remeasure_every=2)
+    for _ in range(3):
+        api.fetch_servers()
+    # the measured mirror is preferred, the primary only tried to remeasure it
+    assert [host for host, _ in hosts.calls] == [
+        "primary:8080",
+        "mirror:8080",
+        "primary:8080",
+        "mirror:8080",
+        "mirror:8080",
+    ]
+    assert api.transport.health()[PRIMARY]["ejected"]
+
+    hosts.calls.clear()
+    api.fetch_servers()
+    assert hosts.calls == [("mirror:8080", "GET")]
+    api.transport.close()
+
+
+def test_FailoverTransport_never_resends_applied_requests():
+    hosts = Hosts()
+    hosts.timing_out.add("primary:8080")
+    api = get_api(hosts)
+    request = ServerCreateRequest(plan="eCS1", location="it-fr2", image="ubuntu-2404")
+    with pytest.raises(requests.ReadTimeout):
+        api.create_server(request, check_if_can_create=False)
+    assert hosts.calls == [("primary:8080", "POST")]
+    name = next(iter(hosts.fake.servers))
+
+    hosts.calls.clear()
+    with pytest.raises(requests.ReadTimeout):
+        api.delete_server(name)
+    assert hosts.calls == [("primary:8080", "DELETE")]
+
+    hosts.calls.clear()
+    api.fetch_servers()
+    assert hosts.calls == [("primary:8080", "GET"), ("mirror:8080", "GET")]
+
+    hosts.timing_out.clear()
+    hosts.unavailable.update(["primary:8080", "mirror:8080"])
+    assert api.transport.send("GET", f"{PRIMARY}/ecs/v2/servers").status_code == 503
+
+
+def test_FailoverTransport_counts_retries():
+    hosts = Hosts()
+    hosts.unavailable.add("primary:8080")
+    api = Api(
+        token="fake",
+        prefix="ecs",
+        version=2,
+        transport=FailoverTransport([PRIMARY, MIRROR], hosts),
+        metrics=True,
+    )
+    api.fetch_servers()
+    assert hosts.calls == [("primary:8080", "GET"), ("mirror:8080", "GET")]
+    assert api.metrics.snapshot()["GET /servers"]["retries"] == 1
+
+
+def test_FailoverTransport_moves_unsent_requests():
+    hosts = Hosts()
+    hosts.down.add("primary:8080")
+    api = get_api(hosts)
+    request = ServerCreateRequest(plan="eCS1", location="it-fr2", image="ubuntu-2404")
+    api.create_server(request, check_if_can_create=False)
+    assert hosts.calls[:2] == [("primary:8080", "POST"), ("mirror:8080", "POST")]
+    assert len(hosts.fake.servers) == 1
+
+
+def test_FailoverTransport_bounded_by_timeout():
+    hosts = Hosts()
+    hosts.timing_out.add("primary:8080")
+    hosts.delay["primary:8080"] = 0.1
+    transport = FailoverTransport([PRIMARY, MIRROR], hosts)
+    with pytest.raises(requests.ReadTimeout):
+        transport.send("GET", f"{PRIMARY}/ecs/v2/servers", timeout=0.1)
+    assert hosts.calls == [("primary:8080", "GET")]
+
+
+def test_FailoverTransport_prefers_lower_latency():
+    hosts = Hosts()
+    hosts.delay["primary:8080"] = 0.03
+    api = get_api(hosts, remeasure_every=4)
+    hosts.fake.add_servers(1)
+    name = next(iter(hosts.fake.servers))
+    for _ in range(4):
+        api.fetch_regions()
+    # the first endpoint until the fourth request measures the other one
+    assert hosts.calls == [("primary:8080", "GET")] * 3 + [("mirror:8080", "GET")]
+    hosts.calls.clear()
+    for _ in range(3):
+        api.fetch_regions()
+    assert hosts.calls == [("mirror:8080", "GET")] * 3
+    # remeasured, still slower
+    api.fetch_regions()
+    assert hosts.calls[-1] == ("primary:8080", "GET")
+
+    # another kind of request is measured on its own
+    hosts.calls.clear()
+    api.fetch_server(name)
+    assert hosts.calls == [("primary:8080", "GET")]
+    health = api.transport.health()
+    assert set(health[MIRROR]["ewma_s"]) == {"GET /regions"}
+    assert health[PRIMARY]["ewma_s"]["GET /regions"] > 0.03
+    assert health[PRIMARY]["ewma_s"]["GET /servers/{name}"] > 0.03
+
+
+def test_FailoverTransport_remeasures_endpoints():
+    hosts = Hosts()
+    hosts.delay["mirror:8080"] = 0.03
+    api = get_api(hosts, remeasure_every=2, alpha=1)
+    for _ in range(4):
+        api.fetch_regions()
+    assert [host for host, _ in hosts.calls] == ["primary:8080", "mirror:8080"] * 2
+    # the mirror got faster, the next remeasure moves the reads to it
+    hosts.delay = {"primary:8080": 0.03}
+    hosts.calls.clear()
+    for _ in range(4):
+        api.fetch_regions()
+    assert [host for host, _ in hosts.calls] == [
+        "primary:8080",
+        "mirror:8080",
+        "mirror:8080",
+        "primary:8080",
+    ]
+
+
+def test_FailoverTransport_readmits_in_background():
+    hosts = Hosts()
+    hosts.down.add("primary:8080")
+    api = get_api(hosts, eject_after=1, eject_for=0.05)
+    api.fetch_servers()
+    assert api.transport.health()[PRIMARY]["ejected"]
+    hosts.down.clear()
+    started = time.monotonic()
+    while api.transport.health()[PRIMARY]["ejected"]:
+        assert time.monotonic() - started < 2
+        time.sleep(0.01)
+    assert ("primary:8080", "GET") in hosts.calls[2:]
+    api.transport.close()
+
+
+def test_Api_endpoints(monkeypatch):
+    api = Api(token="fake", endpoints=[PRIMARY, MIRROR])
+    assert isinstance(api.transport, FailoverTransport)
+    assert [e.url for e in api.transport.endpoints] == [PRIMARY, MIRROR]
+    assert isinstance(Api(token="fake").transport, Transport)
+    assert not isinstance(Api(token="fake").transport, FailoverTransport)
+
+    monkeypatch.setenv(ENDPOINTS_ENV_VAR, f"{PRIMARY}, {MIRROR}")
+    assert __initialize_endpoints__() == [PRIMARY, MIRROR]
+    with pytest.raises(ValueError):
+        FailoverTransport(["primary"])
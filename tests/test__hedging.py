@@ -0,0 +1,137 @@
+import threading
+import time
+
+from src.ecsapi import Api, HedgingTransport, InMemoryTransport
+from src.ecsapi._metrics import ApiMetrics
+from src.ecsapi.testing import FakeEcs
+from src.ecsapi.utils import run_bulk
+
+
+class Stragglers:
+    """
+    Serves a ``FakeEcs`` where the calls listed in ``slow`` (by number) take
+    ``delay`` seconds.
+    """
+
+    def __init__(self, slow=(), delay=0.5):
+        self.fake = FakeEcs()
+        self.fake.add_servers(1)
+        self.slow = set(slow)
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, method, path, params, body, headers):
+        with self._lock:
+            number = len(self.calls)
+            self.calls.append((method, path))
+        if number in self.slow:
+            time.sleep(self.delay)
+        return self.fake.handle(method, path, params, body, headers)
+
+
+def get_api(stragglers: Stragglers, **kwargs) -> Api:
+    return Api(
+        token="fake",
+        host="localhost",
+        port=8080,
+        prefix="ecs",
+        version=2,
+        protocol="http",
+        transport=HedgingTransport(InMemoryTransport(stragglers), **kwargs),
+    )
+
+
+def test_HedgingTransport_first_response_wins():
+    stragglers = Stragglers(slow={0})
+    api = get_api(stragglers, delay=0.02)
+    name = next(iter(stragglers.fake.servers))
+    started = time.monotonic()
+    assert api.fetch_server(name).name == name
+    assert time.monotonic() - started < 0.3
+    assert len(stragglers.calls) == 2
+    assert api.transport.stats()["hedge_wins"] == 1
+    api.transport.close()
+
+
+def test_HedgingTransport_counts_retries():
+    stragglers = Stragglers(slow={0})
+    api = get_api(stragglers, delay=0.02)
+    metrics = ApiMetrics()
+    api.add_observer(metrics)
+    api.fetch_server(next(iter(stragglers.fake.servers)))
+    snapshot = metrics.snapshot()["GET /servers/{name}"]
+    assert snapshot["retries"] == 1
+    assert snapshot["requests"] == {"2xx": 1}
+    api.transport.close()
+
+
+def test_HedgingTransport_learns_delay_and_respects_budget():
+    stragglers = Stragglers(slow=range(20, 40), delay=0.05)
+    api = get_api(stragglers, budget=0.1, min_samples=10)
+    name = next(iter(stragglers.fake.servers))
+    for _ in range(10):
+        api.fetch_server_status(name)
+    assert api.transport.hedge_delay("GET /servers/{name}/status") is not None
+    # lists and lookups get a delay each
+    assert api.transport.hedge_delay("GET /servers") is None
+    assert len(stragglers.calls) == 10
+
+    for _ in range(20):
+        api.fetch_server_status(name)
+    stats = api.transport.stats()
+    # one initial credit plus one every ten requests
+    assert 1 <= stats["hedged"] <= 4
+    assert len(stragglers.calls) == 30 + stats["hedged"]
+    api.transport.close()
+
+
+def test_HedgingTransport_never_hedges_writes():
+    stragglers = Stragglers(slow={0}, delay=0.05)
+    api = get_api(stragglers, delay=0.001)
+    name = next(iter(stragglers.fake.servers))
+    api.update_server(name, notes="hedged", refetch=False)
+    assert stragglers.calls == [("PUT", f"/ecs/v2/servers/{name}")]
+    assert api.transport.stats()["hedged"] == 0
+
+
+def test_HedgingTransport_does_not_cap_concurrency():
+    stragglers = Stragglers(slow=range(10), delay=0.05)
+    in_flight, peak = [0], [0]
+    handle = stragglers.__call__
+    lock = threading.Lock()
+
+    def counting(*args):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        try:
+            return handle(*args)
+        finally:
+            with lock:
+                in_flight[0] -= 1
+
+    threads = set()
+    api = get_api(stragglers, delay=1, max_workers=2)
+    api.transport.transport = InMemoryTransport(
+        lambda *args: threads.add(threading.current_thread().name) or counting(*args)
+    )
+    name = next(iter(stragglers.fake.servers))
+    results, errors = run_bulk(lambda _: api.fetch_server(name), range(10))
+    assert errors == {}
+    # primaries never wait for a pool, past two they run on the caller's thread
+    assert peak[0] == 10
+    primaries = [t for t in threads if t.startswith("ecsapi-hedge-primary")]
+    assert 1 <= len(primaries) <= 2
+    assert api.transport.stats()["hedged"] == 0
+    api.transport.close()
+
+    # until a delay is known requests run on the caller's thread
+    threads = []
+    api = get_api(stragglers)
+    api.transport.transport = InMemoryTransport(
+        lambda *args: threads.append(threading.current_thread()) or handle(*args)
+    )
+    api.fetch_server(name)
+    assert threads == [threading.current_thread()]
+    api.transport.close()
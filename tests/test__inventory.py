@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+from httmock import urlmatch, HTTMock
+
+from src.ecsapi._inventory import InventoryWatcher, InventoryEventEnum
+from tests.store import SERVERS_FETCH_RESPONSE
+from tests.test__api import get_api
+
+
+def mock_inventory(servers):
+    """
+    Serves ``servers``, built by each test, with the changes made since.
+    """
+
+    @urlmatch(netloc=r"localhost:8080")
+    def mock_inventory_response(url, request):
+        return {"status_code": 200, "content": json.dumps(servers)}
+
+    return mock_inventory_response
+
+
+def test_InventoryWatcher_poll():
+    watcher = InventoryWatcher(get_api())
+    subscription = watcher.subscribe()
+    received = []
+    watcher.subscribe(callback=received.append)
+    servers = json.loads(SERVERS_FETCH_RESPONSE)
+    server = servers["server"][0]
+    with HTTMock(mock_inventory(servers)):
+        events = watcher.poll()
+        assert [e.type for e in events] == [InventoryEventEnum.added]
+        assert watcher.poll() == []
+        server["status"] = "Booting"
+        server["progress"] = 50
+        events = watcher.poll()
+        assert events[0].type == InventoryEventEnum.status_changed
+        assert events[0].fields == ["status", "progress"]
+        server["notes"] = "changed"
+        events = watcher.poll()
+        assert events[0].type == InventoryEventEnum.field_changed
+        servers["server"] = []
+        events = watcher.poll()
+        assert events[0].type == InventoryEventEnum.removed
+    watcher.stop()
+    assert [e.type for e in subscription] == [
+        InventoryEventEnum.added,
+        InventoryEventEnum.status_changed,
+        InventoryEventEnum.field_changed,
+        InventoryEventEnum.removed,
+    ]
+    assert len(received) == 4
+
+
+def test_InventoryWatcher_backpressure():
+    watcher = InventoryWatcher(get_api())
+    subscription = watcher.subscribe(maxsize=1)
+    servers = json.loads(SERVERS_FETCH_RESPONSE)
+    with HTTMock(mock_inventory(servers)):
+        watcher.poll()
+        servers["server"] = []
+        watcher.poll()
+    assert subscription.dropped == 1
+    assert subscription.get().type == InventoryEventEnum.removed
+
+
+def test_InventorySubscription_close_once():
+    watcher = InventoryWatcher(get_api())
+    subscription = watcher.subscribe()
+    with HTTMock(mock_inventory(json.loads(SERVERS_FETCH_RESPONSE))):
+        watcher.poll()
+    subscription.close()
+    subscription.close()
+    watcher.stop()
+    assert subscription._queue.qsize() == 2
+    assert [e.type for e in subscription] == [InventoryEventEnum.added]
+    assert subscription.closed
+    subscription.close()
+    assert subscription._queue.empty()
+
+
+def test_InventorySubscription_async():
+    watcher = InventoryWatcher(get_api())
+    subscription = watcher.subscribe()
+    with HTTMock(mock_inventory(json.loads(SERVERS_FETCH_RESPONSE))):
+        watcher.poll()
+    watcher.stop()
+
+    async def consume():
+        return [event.type async for event in subscription]
+
+    assert asyncio.run(consume()) == [InventoryEventEnum.added]
+
+
+def test_InventorySubscription_async_cancel_keeps_events():
+    watcher = InventoryWatcher(get_api())
+    subscription = watcher.subscribe()
+
+    async def consume():
+        waiting = asyncio.ensure_future(subscription.__anext__())
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with HTTMock(mock_inventory(json.loads(SERVERS_FETCH_RESPONSE))):
+            watcher.poll()
+        watcher.stop()
+        return [event.type async for event in subscription]
+
+    assert asyncio.run(consume()) == [InventoryEventEnum.added]
+
+
+def test_InventoryWatcher_callback_errors(caplog):
+    watcher = InventoryWatcher(get_api())
+    received = []
+
+    def callback(event):
+        received.append(event.type)
+        if len(received) == 1:
+            raise RuntimeError("broken callback")
+
+    subscription = watcher.subscribe(callback=callback)
+    assert subscription._dispatcher.name == "ecsapi-inventory-callback"
+    assert subscription._dispatcher.daemon
+    servers = json.loads(SERVERS_FETCH_RESPONSE)
+    with HTTMock(mock_inventory(servers)):
+        watcher.poll()
+        servers["server"] = []
+        watcher.poll()
+    watcher.stop()
+    assert received == [InventoryEventEnum.added, InventoryEventEnum.removed]
+    assert "broken callback" in caplog.text
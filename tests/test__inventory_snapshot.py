@@ -0,0 +1,130 @@
+import os
+import time
+
+import pytest
+
+from src.ecsapi import Api, InMemoryTransport, InventorySnapshot
+from src.ecsapi.errors import InventorySnapshotError
+from src.ecsapi.testing import FakeEcs
+
+
+def get_api(fake: FakeEcs, calls: list) -> Api:
+    def handler(method, path, params, body, headers):
+        calls.append((method, path))
+        return fake.handle(method, path, params, body, headers)
+
+    return Api(
+        token="fake",
+        host="localhost",
+        port=8080,
+        prefix="ecs",
+        version=2,
+        protocol="http",
+        transport=InMemoryTransport(handler),
+    )
+
+
+def fetch(fake: FakeEcs):
+    return get_api(fake, []).fetch_servers()
+
+
+def test_InventorySnapshot_write_and_reload(tmp_path):
+    fake = FakeEcs()
+    fake.add_servers(19, group="eg1")
+    # aliased fields, as support.weigth, must survive the round trip
+    body = {"plan": "eCS1", "location": "it-fr2", "image": "ubuntu-2404"}
+    fake.handle("POST", "/ecs/v2/servers", body=dict(body, support="gold"))
+    servers = fetch(fake)
+    assert servers[-1].support is not None
+    path = str(tmp_path / "inventory.ecsi")
+    InventorySnapshot.write(path, servers, created_at=1000).close()
+
+    with InventorySnapshot(path) as snapshot:
+        assert snapshot.version == 1
+        assert snapshot.created_at == 1000
+        assert len(snapshot) == 20
+        assert list(snapshot) == [server.name for server in servers]
+        assert snapshot._decoded == {}
+        assert snapshot[servers[3].name] == servers[3]
+        assert list(snapshot._decoded) == [servers[3].name]
+        assert snapshot.servers() == servers
+        assert "ec404" not in snapshot
+
+
+def test_InventorySnapshot_invalid_files(tmp_path):
+    path = str(tmp_path / "inventory.ecsi")
+    with open(path, "wb") as f:
+        f.write(b"not a snapshot at all, definitely not")
+    with pytest.raises(InventorySnapshotError):
+        InventorySnapshot(path)
+    open(path, "wb").close()
+    with pytest.raises(InventorySnapshotError):
+        InventorySnapshot(path)
+
+
+def test_InventorySnapshot_update_writes_delta(tmp_path):
+    fake = FakeEcs()
+    names = [server["name"] for server in fake.add_servers(10)]
+    path = str(tmp_path / "inventory.ecsi")
+    snapshot = InventorySnapshot.write(path, fetch(fake))
+    size = os.path.getsize(path)
+
+    fake.servers[names[0]]["notes"] = "changed"
+    del fake.servers[names[1]]
+    added = fake.add_server()["name"]
+    delta = snapshot.update(fetch(fake))
+    assert delta.changed == [names[0]]
+    assert delta.removed == [names[1]]
+    assert delta.added == [added]
+    assert snapshot[names[0]].notes == "changed"
+    assert names[1] not in snapshot
+    # only the two new records and the index were appended
+    assert os.path.getsize(path) - size < size / 2
+
+    assert snapshot.update(fetch(fake)).model_dump() == {
+        "added": [],
+        "changed": [],
+        "removed": [],
+    }
+    with InventorySnapshot(path) as reloaded:
+        assert reloaded.servers() == snapshot.servers()
+    snapshot.close()
+
+
+def test_InventorySnapshot_compacts(tmp_path):
+    fake = FakeEcs()
+    names = [server["name"] for server in fake.add_servers(50)]
+    path = str(tmp_path / "inventory.ecsi")
+    snapshot = InventorySnapshot.write(path, fetch(fake))
+    size = os.path.getsize(path)
+    for i in range(5):
+        for name in names:
+            fake.servers[name]["notes"] = f"round {i}"
+        snapshot.update(fetch(fake))
+    assert os.path.getsize(path) < 2.5 * size
+    assert all(server.notes == "round 4" for server in snapshot.servers())
+    snapshot.close()
+
+
+def test_Api_load_inventory(tmp_path):
+    fake, calls = FakeEcs(), []
+    fake.add_servers(5)
+    api = get_api(fake, calls)
+    path = str(tmp_path / "inventory.ecsi")
+    snapshot = api.load_inventory(path, max_age=60)
+    assert len(snapshot) == 5
+    assert len(calls) == 1
+    snapshot.close()
+
+    snapshot = api.load_inventory(path, max_age=60)
+    assert len(calls) == 1
+    snapshot.close()
+
+    fake.add_server()
+    time.sleep(0.02)
+    with api.load_inventory(path, max_age=0.01) as snapshot:
+        assert len(snapshot) == 6
+    assert len(calls) == 2
+    with api.export_inventory(path) as snapshot:
+        assert snapshot.age < 1
+    assert len(calls) == 3
@@ -0,0 +1,186 @@
+import multiprocessing
+import threading
+import time
+
+from src.ecsapi import (
+    AdaptiveConcurrencyLimiter,
+    Api,
+    InMemoryTransport,
+    SharedTokenBucket,
+)
+from src.ecsapi.errors import ServerError
+from src.ecsapi.testing import FakeEcs
+from src.ecsapi.utils import run_bulk
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Counting:
+    """
+    Serves a ``FakeEcs`` taking ``delay`` seconds per request and counting the
+    requests in flight.
+    """
+
+    def __init__(self, delay=0.01):
+        self.fake = FakeEcs()
+        self.fake.add_servers(20)
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, method, path, params, body, headers):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            return self.fake.handle(method, path, params, body, headers)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def get_api(counting: Counting, limiter: AdaptiveConcurrencyLimiter) -> Api:
+    return Api(
+        token="fake",
+        host="localhost",
+        port=8080,
+        prefix="ecs",
+        version=2,
+        protocol="http",
+        transport=InMemoryTransport(counting),
+        adaptive_concurrency=limiter,
+    )
+
+
+def test_AdaptiveConcurrencyLimiter_aimd():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(initial=2, max_limit=4, clock=clock)
+    # a limit that is not reached does not grow
+    assert limiter.acquire()
+    limiter.release(0.25)
+    assert limiter.limit == 2
+
+    for _ in range(10):
+        limit = limiter.limit
+        for _ in range(limit):
+            assert limiter.acquire(timeout=0)
+        assert not limiter.acquire(timeout=0)
+        clock.now += 0.25
+        for _ in range(limit):
+            limiter.release(0.25)
+    assert limiter.limit == 4
+
+    # a burst of failures of requests started together cuts the limit once
+    for _ in range(4):
+        limiter.acquire()
+    clock.now += 0.25
+    for _ in range(4):
+        limiter.release(0.25, overloaded=True)
+    assert limiter.limit == 2 and limiter.drops == 1
+
+    # so does a latency spike
+    limiter.acquire()
+    clock.now += 1
+    limiter.release(1)
+    assert limiter.limit == 1 and limiter.drops == 2
+    assert [limit for _, limit in limiter.history] == [2, 3, 4, 2, 1]
+    assert "ecsapi_concurrency_limit 1" in limiter.to_prometheus()
+
+
+def test_AdaptiveConcurrencyLimiter_overload_bursts_and_baselines():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(initial=32, clock=clock)
+    # concurrent timeouts, with no response hence no latency sample, cut once
+    for _ in range(5):
+        limiter.acquire()
+    clock.now += 10
+    for _ in range(5):
+        limiter.release(10, overloaded=True, sample=False)
+    assert limiter.limit == 16 and limiter.drops == 1
+
+    # a slow list call is not a spike of the fast lookups
+    for _ in range(3):
+        limiter.acquire()
+        clock.now += 0.05
+        limiter.release(0.05, key="GET /servers/{name}")
+    limiter.acquire()
+    clock.now += 2
+    limiter.release(2, key="GET /servers")
+    assert limiter.limit == 16 and limiter.drops == 1
+    assert limiter.snapshot()["baselines_s"] == {
+        "GET /servers/{name}": 0.05,
+        "GET /servers": 2,
+    }
+    limiter.acquire()
+    clock.now += 1
+    limiter.release(1, key="GET /servers/{name}")
+    assert limiter.limit == 8 and limiter.drops == 2
+
+
+def test_Api_adaptive_concurrency_bounds_bulk_helpers():
+    counting = Counting()
+    limiter = AdaptiveConcurrencyLimiter(initial=2, max_limit=6)
+    api = get_api(counting, limiter)
+    names = list(counting.fake.servers)
+    actions, errors = api.turn_off_servers(names)
+    assert errors == {} and len(actions) == 20
+    assert counting.peak <= 6
+    assert limiter.limit > 2
+    assert limiter.in_flight == 0
+
+    counting.peak = 0
+    results, errors = run_bulk(api.fetch_server, names, max_workers=20)
+    assert errors == {}
+    assert counting.peak <= limiter.max_limit
+
+
+def test_Api_adaptive_concurrency_backs_off_on_errors():
+    counting = Counting()
+    limiter = AdaptiveConcurrencyLimiter(initial=4)
+    api = get_api(counting, limiter)
+    counting.fake.fail_next(4, status=503)
+    results, errors = run_bulk(lambda _: api.fetch_servers(), range(4))
+    assert all(isinstance(e, ServerError) for e in errors.values())
+    assert len(errors) == 4
+    assert limiter.limit == 2 and limiter.drops == 1
+    assert Api(token="fake").concurrency is None
+    assert Api(token="fake", adaptive_concurrency=True).concurrency.limit == 4
+
+
+def take_all(path, attempts):
+    bucket = SharedTokenBucket(rate=0.001, burst=20, key="shared", path=path)
+    return sum(bucket.try_acquire() == 0 for _ in range(attempts))
+
+
+def test_SharedTokenBucket(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    clock = FakeClock()
+    first = SharedTokenBucket(rate=2, burst=3, path=path, clock=clock)
+    second = SharedTokenBucket(rate=2, burst=3, path=path, clock=clock)
+    assert [first.try_acquire(), first.try_acquire(), second.try_acquire()] == [0] * 3
+    assert first.try_acquire() == 0.5
+    clock.now += 0.5
+    assert second.try_acquire() == 0
+    other = SharedTokenBucket.for_token(
+        "other", rate=2, burst=3, path=path, clock=clock
+    )
+    assert other.key != SharedTokenBucket.for_token("token", rate=1, path=path).key
+    assert other.try_acquire() == 0
+    assert not second.acquire(timeout=0.1)
+    for bucket in (first, second, other):
+        bucket.close()
+
+
+def test_SharedTokenBucket_across_processes(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    with multiprocessing.Pool(4) as pool:
+        taken = pool.starmap(take_all, [(path, 10)] * 4)
+    assert sum(taken) == 20
@@ -0,0 +1,78 @@
+import pytest
+from httmock import HTTMock
+
+from src.ecsapi._api import Api
+from src.ecsapi._server import ServerCreateRequest
+from src.ecsapi.errors import ActionMaxRetriesExceededError, NotFoundError
+from tests.test__api import (
+    mock_server_create_response,
+    mock_server_create_plan_available_response,
+    mock_servers_fetch_response,
+    mock_action_fetch_response,
+)
+
+
+def get_api():
+    return Api(
+        token="abcde",
+        host="localhost",
+        port=8080,
+        prefix="api",
+        version=2,
+        protocol="https",
+        metrics=True,
+    )
+
+
+def test_ApiMetrics_inner_requests():
+    api = get_api()
+    with HTTMock(
+        mock_server_create_response, mock_server_create_plan_available_response
+    ):
+        api.create_server(
+            ServerCreateRequest(plan="eCS1", location="it-fr2", image="almalinux-9")
+        )
+    snapshot = api.metrics.snapshot()
+    assert snapshot["GET /plans/availables"]["requests"] == {"2xx": 1}
+    assert snapshot["POST /servers"]["requests"] == {"2xx": 1}
+    assert snapshot["POST /servers"]["bytes_sent"] > 0
+    assert snapshot["POST /servers"]["parse_seconds"]["count"] == 1
+    assert snapshot["POST /servers"]["network_seconds"]["buckets"]["+Inf"] == 1
+
+
+def test_ApiMetrics_status_and_retries():
+    api = get_api()
+    with HTTMock(mock_servers_fetch_response):
+        pytest.raises(NotFoundError, api.fetch_server, "ec12345")
+    with HTTMock(mock_action_fetch_response):
+        pytest.raises(
+            ActionMaxRetriesExceededError,
+            api.watch_action,
+            1234,
+            desired_status="not existing status",
+            fetch_every=0.001,
+            max_retry=2,
+        )
+    snapshot = api.metrics.snapshot()
+    assert snapshot["GET /servers/{name}"]["requests"] == {"4xx": 1}
+    assert snapshot["GET /actions/{id}"]["requests"] == {"2xx": 3}
+    assert snapshot["GET /actions/{id}"]["retries"] == 2
+
+
+def test_ApiMetrics_to_prometheus():
+    api = get_api()
+    with HTTMock(mock_servers_fetch_response):
+        api.fetch_servers()
+    text = api.metrics.to_prometheus()
+    assert "# TYPE ecsapi_requests_total counter" in text
+    assert (
+        'ecsapi_requests_total{endpoint="/servers",method="GET",status_class="2xx"} 1'
+        in text
+    )
+    assert (
+        'ecsapi_network_seconds_bucket{endpoint="/servers",method="GET",le="+Inf"} 1'
+        in text
+    )
+    assert 'ecsapi_parse_seconds_count{endpoint="/servers",method="GET"} 1' in text
+    api.metrics.reset()
+    assert api.metrics.snapshot() == {}
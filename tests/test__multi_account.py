@@ -0,0 +1,164 @@
+import threading
+import time
+
+from src.ecsapi import InMemoryTransport, MultiAccountApi, PooledTransport, TokenBucket
+from src.ecsapi.errors import DeadlineExceededError, UnauthorizedError
+from src.ecsapi.testing import FakeEcs
+from src.ecsapi.utils import run_bulk
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Accounts:
+    """
+    Routes every request to the ``FakeEcs`` of its token, counting the requests and
+    the requests in flight per account.
+    """
+
+    def __init__(self, **servers):
+        self.fakes = {}
+        for account, count in servers.items():
+            fake = FakeEcs(token=f"token-{account}")
+            fake.add_servers(count, notes=account)
+            self.fakes[f"token-{account}"] = fake
+        self.requests = {}
+        self.in_flight = {}
+        self.peak = {}
+        self.delay = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, method, path, params, body, headers):
+        token = headers.get("X-APITOKEN")
+        with self._lock:
+            self.requests[token] = self.requests.get(token, 0) + 1
+            self.in_flight[token] = self.in_flight.get(token, 0) + 1
+            self.peak[token] = max(self.peak.get(token, 0), self.in_flight[token])
+        try:
+            time.sleep(self.delay)
+            fake = self.fakes.get(token) or next(iter(self.fakes.values()))
+            return fake.handle(method, path, params, body, headers)
+        finally:
+            with self._lock:
+                self.in_flight[token] -= 1
+
+    def tokens(self):
+        return {token.split("-", 1)[1]: token for token in self.fakes}
+
+
+def get_multi(accounts: Accounts, **kwargs) -> MultiAccountApi:
+    return MultiAccountApi(
+        accounts.tokens(),
+        transport=InMemoryTransport(accounts),
+        host="localhost",
+        port=8080,
+        prefix="ecs",
+        version=2,
+        protocol="http",
+        **kwargs,
+    )
+
+
+def test_TokenBucket():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == 0.5
+    clock.now += 0.5
+    assert bucket.try_acquire() == 0
+    clock.now += 100
+    assert [bucket.try_acquire() for _ in range(4)][-1] == 0.5
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(timeout=0.1)
+
+
+def test_MultiAccountApi_merges_results_by_account():
+    accounts = Accounts(alpha=3, beta=2)
+    with get_multi(accounts) as multi:
+        multi.add_account("invalid", "token-invalid")
+        servers, errors = multi.fetch_servers()
+        assert isinstance(errors["invalid"], UnauthorizedError)
+        assert sorted((account, server.notes) for account, server in servers) == [
+            ("alpha", "alpha"),
+            ("alpha", "alpha"),
+            ("alpha", "alpha"),
+            ("beta", "beta"),
+            ("beta", "beta"),
+        ]
+        actions, errors = multi.fetch_actions(accounts=["alpha", "beta"])
+        assert actions == [] and errors == {}
+
+
+def test_MultiAccountApi_limits_are_per_account():
+    accounts = Accounts(alpha=1, beta=1)
+    accounts.delay = 0.02
+    # frozen, so a rate limited account gets its burst and nothing more
+    clock = FakeClock()
+    with get_multi(accounts, max_concurrency=2, clock=clock) as multi:
+        multi.add_account("beta", "token-beta", rate=5, burst=2, max_concurrency=1)
+
+        def burst(api):
+            results, errors = run_bulk(lambda _: api.fetch_servers(), range(6))
+            for error in errors.values():
+                raise error
+            return len(results)
+
+        results, errors = multi.run(burst, accounts=["alpha"])
+        assert results == {"alpha": 6} and errors == {}
+        assert accounts.peak["token-alpha"] == 2
+
+        results, errors = multi.run(burst, accounts=["beta"], max_wait=0.1)
+        assert isinstance(errors["beta"], DeadlineExceededError)
+        assert accounts.requests["token-beta"] == 2
+        assert accounts.peak["token-beta"] == 1
+
+
+def test_MultiAccountApi_slow_account_does_not_block_others():
+    accounts = Accounts(alpha=1, slow=1)
+    with get_multi(accounts, clock=FakeClock()) as multi:
+        multi.add_account("slow", "token-slow", rate=1, burst=1)
+
+        def fetch_twice(api):
+            api.fetch_servers()
+            return api.fetch_servers()
+
+        results, errors = multi.run(fetch_twice, max_wait=0.3)
+        assert list(results) == ["alpha"]
+        assert isinstance(errors["slow"], DeadlineExceededError)
+        assert accounts.requests == {"token-alpha": 2, "token-slow": 1}
+
+
+def test_MultiAccountApi_grows_the_pool_with_the_accounts():
+    with MultiAccountApi({"alpha": "a", "beta": "b"}, max_concurrency=4) as multi:
+        assert isinstance(multi.transport, PooledTransport)
+        assert multi.transport.pool_maxsize == 10
+        multi.add_account("gamma", "c", max_concurrency=4)
+        assert multi.transport.pool_maxsize == 12
+        multi.add_account("delta", "d", max_concurrency=None)
+        assert multi.transport.pool_maxsize == 22
+        # a shared pool only grows
+        multi.remove_account("delta")
+        assert multi.transport.pool_maxsize == 22
+
+    transport = InMemoryTransport(Accounts(alpha=1))
+    with MultiAccountApi({"alpha": "a"}, transport=transport) as multi:
+        multi.add_account("beta", "b", max_concurrency=20)
+        assert multi.transport is transport
+
+
+def test_MultiAccountApi_shared_rate_limit(tmp_path):
+    accounts = Accounts(alpha=1)
+    path = str(tmp_path / "limits.sqlite3")
+    with get_multi(accounts, rate=1, burst=1, shared_rate_limit=path) as first:
+        with get_multi(accounts, rate=1, burst=1, shared_rate_limit=path) as second:
+            results, errors = first.fetch_servers()
+            assert errors == {}
+            # the other instance draws from the same, now empty, budget
+            results, errors = second.fetch_servers(max_wait=0.3)
+            assert isinstance(errors["alpha"], DeadlineExceededError)
@@ -0,0 +1,126 @@
+import pytest
+from httmock import urlmatch, HTTMock
+
+from src.ecsapi._reconcile import (
+    FleetReconciler,
+    FleetSpec,
+    ReconcileActionEnum,
+    ReconcilePlan,
+)
+from src.ecsapi.errors import PlanNotAvailableError
+from tests.store import (
+    SERVERS_FETCH_RESPONSE,
+    SERVER_CREATE_RESPONSE,
+    SERVER_UPDATE_RESPONSE,
+    SERVER_FETCH_RESPONSE,
+    SERVER_DELETE_RESPONSE,
+    PLANS_AVAILABLE_FETCH_RESPONSE,
+    ACTION_FETCH_RESPONSE,
+)
+from tests.test__api import get_api
+
+calls = []
+
+
+@urlmatch(netloc=r"localhost:8080")
+def mock_fleet_response(url, request):
+    calls.append((request.method, url.path))
+    if request.method == "POST":
+        return {"status_code": 200, "content": SERVER_CREATE_RESPONSE}
+    if request.method == "PUT":
+        return {"status_code": 200, "content": SERVER_UPDATE_RESPONSE}
+    if request.method == "DELETE":
+        return {"status_code": 200, "content": SERVER_DELETE_RESPONSE}
+    if url.path.endswith("/plans/availables"):
+        return {"status_code": 200, "content": PLANS_AVAILABLE_FETCH_RESPONSE}
+    if "/actions/" in url.path:
+        return {"status_code": 200, "content": ACTION_FETCH_RESPONSE}
+    if url.path.endswith("/servers/ec200410"):
+        return {"status_code": 200, "content": SERVER_FETCH_RESPONSE}
+    return {"status_code": 200, "content": SERVERS_FETCH_RESPONSE}
+
+
+def get_spec(**kwargs):
+    server = {
+        "plan": "ECS1",
+        "location": "it-fr2",
+        "image": "ubuntu-2404",
+        "notes": "test",
+    }
+    server.update(kwargs)
+    return FleetSpec.model_validate({"servers": [server]})
+
+
+def test_FleetReconciler_plan_unchanged():
+    reconciler = FleetReconciler(get_api())
+    calls.clear()
+    with HTTMock(mock_fleet_response):
+        plan, results, errors = reconciler.reconcile(get_spec())
+    assert plan.empty
+    assert plan.unchanged == ["ec200410"]
+    assert calls == [("GET", "/api/v2/servers")]
+
+
+def test_FleetReconciler_plan():
+    reconciler = FleetReconciler(get_api())
+    with HTTMock(mock_fleet_response):
+        plan = reconciler.plan(get_spec(name="ec200410", notes="new notes"))
+        assert [c.action for c in plan.changes] == [ReconcileActionEnum.update]
+        assert plan.changes[0].fields == {"notes": "new notes"}
+        plan = reconciler.plan(get_spec(image="almalinux-9"))
+        assert plan.drifted == ["ec200410"]
+        spec = get_spec(notes="another")
+        spec.prune = True
+        plan = reconciler.plan(spec)
+        assert sorted(c.action for c in plan.changes) == [
+            ReconcileActionEnum.create,
+            ReconcileActionEnum.delete,
+        ]
+
+
+def test_FleetReconciler_apply_updates():
+    reconciler = FleetReconciler(get_api())
+    with HTTMock(mock_fleet_response):
+        plan = reconciler.plan(get_spec(name="ec200410", notes="new notes"))
+        calls.clear()
+        results, errors = reconciler.apply(plan)
+    assert errors == {}
+    assert results["ec200410"].name == "ec200410"
+    # the updates are refreshed by a single list call
+    assert calls == [("PUT", "/api/v2/servers/ec200410"), ("GET", "/api/v2/servers")]
+
+
+def test_FleetReconciler_apply():
+    reconciler = FleetReconciler(get_api())
+    spec = get_spec(notes="another", plan="eCS1")
+    spec.prune = True
+    spec.servers.append(
+        spec.servers[0].model_copy(update={"plan": "FAKEPLAN", "notes": "other"})
+    )
+    with HTTMock(mock_fleet_response):
+        plan, results, errors = reconciler.reconcile(spec, fetch_every=0.001)
+    assert results["another"].status == "completed"
+    assert results["ec200410"].status == "completed"
+    assert isinstance(errors["other"], PlanNotAvailableError)
+
+
+def test_FleetReconciler_plan_keys():
+    reconciler = FleetReconciler(get_api())
+    with HTTMock(mock_fleet_response):
+        # the api names new servers: a named spec is never created
+        plan = reconciler.plan(get_spec(name="ec299999"))
+        assert plan.empty
+        assert plan.missing == ["ec299999"]
+
+        spec = get_spec(notes="ec200410")
+        spec.prune = True
+        plan = reconciler.plan(spec)
+        assert [(c.action, c.key) for c in plan.changes] == [
+            (ReconcileActionEnum.create, "ec200410"),
+            (ReconcileActionEnum.delete, "ec200410#1"),
+        ]
+
+    with pytest.raises(ValueError):
+        FleetSpec.model_validate({"servers": [get_spec().servers[0].model_dump()] * 2})
+    with pytest.raises(ValueError):
+        reconciler.apply(ReconcilePlan(changes=plan.changes * 2))
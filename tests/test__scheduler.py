@@ -0,0 +1,178 @@
+import threading
+import time
+
+import pytest
+
+from src.ecsapi import Api, InMemoryTransport, PriorityScheduler
+from src.ecsapi.errors import DeadlineExceededError
+from src.ecsapi.testing import FakeEcs
+from src.ecsapi.utils import run_bulk
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_queued(scheduler, name, count):
+    while scheduler.snapshot()[name]["queued"] < count:
+        time.sleep(0.001)
+
+
+def queue_up(scheduler, names, order):
+    """
+    Starts a thread per priority in ``names``, in this order, each one recording its
+    turn and releasing the slot at once.
+    """
+
+    def take(name):
+        scheduler.acquire(name)
+        order.append(name)
+        scheduler.release()
+
+    threads = []
+    for count, name in enumerate(names, 1):
+        thread = threading.Thread(target=take, args=(name,))
+        thread.start()
+        threads.append(thread)
+        while sum(c["queued"] for c in scheduler.snapshot().values()) < count:
+            time.sleep(0.001)
+    return threads
+
+
+def get_api(scheduler, delay=0.0):
+    fake = FakeEcs()
+    fake.add_servers(3)
+    paths = []
+
+    def handler(method, path, params, body, headers):
+        paths.append(path)
+        time.sleep(delay)
+        return fake.handle(method, path, params, body, headers)
+
+    api = Api(
+        token="fake",
+        host="localhost",
+        port=8080,
+        prefix="ecs",
+        version=2,
+        protocol="http",
+        transport=InMemoryTransport(handler),
+        scheduler=scheduler,
+    )
+    api.paths = paths
+    return api, fake
+
+
+def test_PriorityScheduler_weighted_turns():
+    clock = FakeClock()
+    scheduler = PriorityScheduler(max_concurrency=1, clock=clock)
+    assert scheduler.acquire()
+    order = []
+    threads = queue_up(scheduler, ["background"] * 4 + ["interactive"] * 4, order)
+    clock.now += 1.5
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+    assert (
+        order
+        == ["interactive", "background"] + ["interactive"] * 3 + ["background"] * 3
+    )
+
+    snapshot = scheduler.snapshot()
+    assert snapshot["background"]["dispatched"] == 4
+    assert snapshot["background"]["wait_s"]["count"] == 4
+    assert snapshot["background"]["wait_s"]["sum"] == 6
+    assert snapshot["interactive"]["wait_s"]["buckets"]["2.5"] == 4
+    assert snapshot["interactive"]["queued"] == 0
+    with pytest.raises(ValueError):
+        scheduler.acquire("urgent")
+
+
+def test_Api_scheduler_default_priorities():
+    scheduler = PriorityScheduler()
+    api, fake = get_api(scheduler)
+    name = next(iter(fake.servers))
+    api.fetch_server(name)
+    api.fetch_server_status(name)
+    api.fetch_actions()
+    api.fetch_servers()
+    with api.priority("background"):
+        run_bulk(api.fetch_server, fake.servers)
+    dispatched = {k: v["dispatched"] for k, v in scheduler.snapshot().items()}
+    assert dispatched == {"interactive": 2, "default": 1, "background": 4}
+    assert scheduler.in_flight == 0
+
+
+def test_Api_scheduler_interactive_overtakes_background():
+    clock = FakeClock()
+    scheduler = PriorityScheduler(max_concurrency=1, clock=clock)
+    api, fake = get_api(scheduler)
+    name = next(iter(fake.servers))
+    assert scheduler.acquire()
+
+    def sweep():
+        with api.priority("background"):
+            run_bulk(lambda _: api.fetch_servers(), range(5), max_workers=5)
+
+    background = threading.Thread(target=sweep)
+    background.start()
+    wait_queued(scheduler, "background", 5)
+    interactive = threading.Thread(target=api.fetch_server_status, args=(name,))
+    interactive.start()
+    wait_queued(scheduler, "interactive", 1)
+    clock.now += 1
+    scheduler.release()
+    interactive.join()
+    background.join()
+
+    assert api.paths[0] == f"/ecs/v2/servers/{name}/status"
+    assert api.paths[1:] == ["/ecs/v2/servers"] * 5
+    snapshot = scheduler.snapshot()
+    assert snapshot["interactive"]["wait_s"]["sum"] == 1
+    assert snapshot["background"]["wait_s"]["sum"] == 5
+
+
+def test_PriorityScheduler_takes_tokens_outside_the_lock():
+    scheduler = PriorityScheduler(max_concurrency=2)
+
+    class SlowBucket:
+        def try_acquire(self, tokens=1):
+            # other threads can use the scheduler while a token is being taken
+            snapshots = []
+            other = threading.Thread(
+                target=lambda: snapshots.append(scheduler.snapshot())
+            )
+            other.start()
+            other.join(1)
+            assert snapshots and snapshots[0]["default"]["queued"] == 1
+            return 0
+
+    scheduler.bucket = SlowBucket()
+    assert scheduler.acquire()
+    assert scheduler.in_flight == 1
+
+
+def test_PriorityScheduler_timeout_with_frozen_clock():
+    clock = FakeClock()
+    scheduler = PriorityScheduler(max_concurrency=1, clock=clock)
+    assert scheduler.acquire()
+    assert not scheduler.acquire("interactive", timeout=0.05)
+    snapshot = scheduler.snapshot()
+    assert snapshot["interactive"]["expired"] == 1
+    assert snapshot["interactive"]["queued"] == 0
+
+
+def test_Api_scheduler_honours_deadline():
+    scheduler = PriorityScheduler(max_concurrency=1)
+    api, _ = get_api(scheduler)
+    assert scheduler.acquire()
+    with pytest.raises(DeadlineExceededError):
+        with api.deadline(0.05):
+            api.fetch_servers()
+    assert scheduler.snapshot()["default"]["expired"] == 1
+    scheduler.release()
+    api.fetch_servers()
@@ -0,0 +1,88 @@
+import pytest
+
+from src.ecsapi import Api, InMemoryTransport, ServerRef
+from src.ecsapi.testing import FakeEcs
+
+
+def get_api(fake: FakeEcs, calls: list) -> Api:
+    def handler(method, path, params, body, headers):
+        calls.append((method, path))
+        return fake.handle(method, path, params, body, headers)
+
+    return Api(
+        token="fake",
+        host="localhost",
+        port=8080,
+        prefix="ecs",
+        version=2,
+        protocol="http",
+        transport=InMemoryTransport(handler),
+    )
+
+
+def test_ServerRef_loads_lazily_and_caches():
+    fake, calls = FakeEcs(), []
+    name = fake.add_server(group="eg1")["name"]
+    api = get_api(fake, calls)
+    ref = api.server(name)
+    assert isinstance(ref, ServerRef)
+    assert ref.name == name
+    assert calls == []
+    assert ref.group == "eg1"
+    assert ref.status == "Booted"
+    assert calls == [("GET", f"/ecs/v2/servers/{name}")]
+    with pytest.raises(AttributeError):
+        ref.missing_attribute
+    assert api.server(name, ttl=0).plan == ref.plan
+    assert len(calls) == 2
+
+
+def test_ServerRef_ttl():
+    fake, calls = FakeEcs(), []
+    name = fake.add_server()["name"]
+    ref = get_api(fake, calls).server(name, ttl=0)
+    ref.ipv4
+    ref.ipv4
+    assert len(calls) == 2
+    ref.ttl = None
+    ref.ipv4
+    assert len(calls) == 2
+
+
+def test_ServerRef_actions():
+    fake, calls = FakeEcs(), []
+    name = fake.add_server()["name"]
+    ref = get_api(fake, calls).server(name)
+    ref.update(notes="patched")
+    assert calls == [("PUT", f"/ecs/v2/servers/{name}")]
+    assert ref.notes == "patched"
+    assert len(calls) == 2
+    ref.update(notes="local")
+    assert ref.notes == "local"
+    assert len(calls) == 3
+    action = ref.turn_off()
+    assert action.type == "power_off"
+    assert ref.stale
+    assert ref.notes == "local"
+    assert len(calls) == 5
+
+
+def test_Api_server_refs_and_refresh_servers():
+    fake, calls = FakeEcs(), []
+    names = [server["name"] for server in fake.add_servers(3, group="eg1")]
+    fake.add_server(group="eg2")
+    api = get_api(fake, calls)
+    refs = api.server_refs(group="eg1")
+    assert sorted(ref.name for ref in refs) == sorted(names)
+    assert [ref.status for ref in refs] == ["Booted"] * 3
+    assert len(calls) == 1
+
+    del fake.servers[names[0]]
+    for server in fake.servers.values():
+        server["notes"] = "refreshed"
+    missing = api.refresh_servers(refs + [api.server("ec404")])
+    assert [ref.name for ref in missing] == [names[0], "ec404"]
+    assert len(calls) == 2
+    assert [ref.notes for ref in refs[1:]] == ["refreshed"] * 2
+    assert api.refresh_servers(refs[1:], stale_only=True) == []
+    assert len(calls) == 2
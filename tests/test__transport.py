@@ -0,0 +1,191 @@
+import gzip
+import json
+import sys
+
+import pytest
+import requests
+
+from httmock import HTTMock
+
+from src.ecsapi._api import Api
+from src.ecsapi._server import ServerCreateRequest
+from src.ecsapi._transport import (
+    InMemoryTransport,
+    PooledTransport,
+    RecordingTransport,
+    ReplayTransport,
+    Transport,
+    request_key,
+)
+from src.ecsapi.errors import CassetteMismatchError, NotFoundError
+from src.ecsapi.testing import FakeEcs, FakeEcsConfig, FakeEcsServer
+from tests.test__api import mock_servers_fetch_response
+
+
+def record_session(path):
+    config = FakeEcsConfig(boot_time=0.2)
+    with FakeEcsServer(config=config) as server:
+        with RecordingTransport(str(path)) as transport:
+            api = server.api(transport=transport)
+            created, action_id = api.create_server(
+                ServerCreateRequest(plan="eCS1", location="it-fr2", image="almalinux-9")
+            )
+            api.watch_action(action_id, fetch_every=0.05)
+            with pytest.raises(NotFoundError):
+                api.fetch_server("missing")
+        return server, created
+
+
+def test_RecordingTransport(tmp_path):
+    path = tmp_path / "session.cassette"
+    record_session(path)
+    with gzip.open(path, "rt") as f:
+        header, *exchanges = [json.loads(line) for line in f]
+    assert header["version"] == 1
+    assert exchanges[0]["url"].endswith("/plans/availables")
+    assert exchanges[1]["method"] == "POST"
+    assert json.loads(exchanges[1]["body"])["plan"] == "eCS1"
+    assert exchanges[-1]["status"] == 404
+    assert all(e["duration"] >= 0 for e in exchanges)
+    assert "fake" not in path.read_bytes().decode("latin-1")
+
+
+def test_ReplayTransport(tmp_path):
+    path = tmp_path / "session.cassette"
+    server, created = record_session(path)
+
+    transport = ReplayTransport(str(path), speed=None)
+    api = server.api(transport=transport)
+    replayed, action_id = api.create_server(
+        ServerCreateRequest(plan="eCS1", location="it-fr2", image="almalinux-9")
+    )
+    assert replayed.name == created.name
+    assert api.watch_action(action_id, fetch_every=0.05).status == "completed"
+    with pytest.raises(NotFoundError):
+        api.fetch_server("missing")
+    assert transport.remaining == 0
+    with pytest.raises(CassetteMismatchError):
+        api.fetch_server("missing")
+
+
+def test_ReplayTransport_network_error(tmp_path):
+    class FailingTransport(Transport):
+        def send(self, method, url, params=None, body=None, headers=None, timeout=None):
+            raise requests.ConnectTimeout("unreachable")
+
+    path = tmp_path / "errors.cassette"
+    with RecordingTransport(str(path), FailingTransport()) as transport:
+        with pytest.raises(requests.ConnectTimeout):
+            transport.send("GET", "http://localhost/ecs/v2/servers")
+
+    transport = ReplayTransport(str(path))
+    with pytest.raises(requests.ConnectTimeout):
+        transport.send("GET", "http://localhost/ecs/v2/servers")
+
+
+def test_ReplayTransport_timeline(tmp_path, monkeypatch):
+    path = tmp_path / "timeline.cassette"
+    url = "http://localhost/ecs/v2/servers"
+    with gzip.open(path, "wt") as f:
+        f.write(json.dumps({"version": 1, "recorded_at": "2025-01-01"}) + "\n")
+        for started in (0.0, 0.0, 1.0):
+            exchange = {
+                "method": "GET",
+                "url": url,
+                "body": None,
+                "status": 200,
+                "headers": {},
+                "content": "{}",
+                "started": started,
+                "duration": 0.5,
+            }
+            f.write(json.dumps(exchange) + "\n")
+
+    now, sleeps = [10.0], []
+    monkeypatch.setattr("src.ecsapi._transport.monotonic", lambda: now[0])
+    monkeypatch.setattr("src.ecsapi._transport.sleep", sleeps.append)
+    transport = ReplayTransport(str(path), speed=2)
+    # two overlapping requests, then one sent 1s later in the recording
+    transport.send("GET", url)
+    transport.send("GET", url)
+    now[0] += 0.25
+    transport.send("GET", url)
+    assert sleeps == [0.25, 0.25, 0.5]
+
+
+def test_PooledTransport():
+    transport = PooledTransport(pool_maxsize=4)
+    api = Api(token="abcde", host="localhost", port=8080, transport=transport)
+    with HTTMock(mock_servers_fetch_response):
+        assert api.fetch_servers()
+    with FakeEcsServer() as server:
+        server.fake.add_servers(3)
+        api = server.api(transport=transport)
+        for _ in range(5):
+            assert len(api.fetch_servers()) == 3
+    transport.close()
+
+
+def test_request_key():
+    url = "http://localhost:8080/ecs/v2/servers/ec200001?page=2"
+    assert request_key("get", url) == "GET /ecs/v2/servers/ec200001"
+
+    keys = []
+    fake = FakeEcs()
+    fake.add_servers(1)
+
+    def handler(method, path, params, body, headers):
+        keys.append(request_key(method, path))
+        return fake.handle(method, path, params, body, headers)
+
+    api = Api(token="fake", host="localhost", transport=InMemoryTransport(handler))
+    api.fetch_server_status(next(iter(fake.servers)))
+    assert keys == ["GET /servers/{name}/status"]
+
+
+def test_InMemoryTransport():
+    fake = FakeEcs(token="abcde")
+    fake.add_servers(2, group="eg1")
+    api = Api(token="abcde", host="localhost", transport=InMemoryTransport(fake.handle))
+    assert len(api.fetch_servers()) == 2
+    api.fetch_actions(resource="ec200000")
+    with pytest.raises(NotFoundError):
+        api.fetch_server("missing")
+
+
+def test_InMemoryTransport_tuple_handler():
+    calls = []
+
+    def handler(method, path, params, body, headers):
+        calls.append((method, path, params))
+        return 200, {"Content-Type": "application/json"}, b'{"status": "ok"}'
+
+    api = Api(token="abcde", host="localhost", transport=InMemoryTransport(handler))
+    api.delete_ssh_key(1)
+    assert calls == [("DELETE", "/ecs/v2/sshkeys/1", {})]
+
+
+def test_HttpxTransport_fallback(monkeypatch):
+    pytest.importorskip("httpx")
+    from src.ecsapi._transport import HttpxTransport
+
+    with FakeEcsServer() as server:
+        server.fake.add_servers(2)
+        transport = HttpxTransport()
+        api = server.api(transport=transport)
+        assert len(api.fetch_servers()) == 2
+        with pytest.raises(NotFoundError):
+            api.fetch_server("missing")
+        transport.close()
+
+    monkeypatch.setitem(sys.modules, "h2", None)
+    assert HttpxTransport().http2 is False
+
+
+def test_HttpxTransport_connection_error():
+    pytest.importorskip("httpx")
+    from src.ecsapi._transport import HttpxTransport
+
+    api = Api(token="abcde", host="127.0.0.1", port=1, transport=HttpxTransport())
+    with pytest.raises(requests.ConnectionError):
+        api.fetch_servers()
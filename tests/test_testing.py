@@ -0,0 +1,188 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.ecsapi._server import ServerCreateRequest
+from src.ecsapi.errors import NotFoundError, ServerError, ClientError
+from src.ecsapi.testing import FakeEcs, FakeEcsConfig, FakeEcsServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def get_fake(**config):
+    return FakeEcs(config=FakeEcsConfig(**config), clock=FakeClock(), seed=1)
+
+
+def create_server(fake: FakeEcs, **body):
+    body = dict({"plan": "eCS1", "location": "it-fr2", "image": "ubuntu-2404"}, **body)
+    response = fake.handle("POST", "/ecs/v2/servers", body=body)
+    assert response.status_code == 200
+    return response
+
+
+def test_FakeEcs_server_boots():
+    fake = get_fake(boot_time=10)
+    created = json.loads(create_server(fake).content)
+    name, action_id = created["server"]["name"], created["action_id"]
+    assert fake.servers[name]["status"] == "Booting"
+
+    fake.advance(5)
+    assert fake.servers[name]["progress"] == 50
+    assert fake.actions[action_id]["status"] == "in-progress"
+
+    fake.advance(5)
+    assert fake.servers[name]["status"] == "Booted"
+    assert fake.actions[action_id]["status"] == "completed"
+
+
+def test_FakeEcs_completes_due_actions():
+    fake = get_fake(boot_time=10)
+    slow = json.loads(create_server(fake).content)
+    fake.config.boot_time = 2
+    fast = json.loads(create_server(fake).content)
+    fake._clock.now += 4
+
+    servers = json.loads(fake.handle("GET", "/ecs/v2/servers").content)["server"]
+    progress = {server["name"]: server["progress"] for server in servers}
+    assert progress == {slow["server"]["name"]: 40, fast["server"]["name"]: 100}
+    action = fake.handle("GET", f"/ecs/v2/actions/{slow['action_id']}")
+    assert json.loads(action.content)["action"]["progress"] == 40
+    assert fake.actions[fast["action_id"]]["status"] == "completed"
+    assert list(fake._jobs) == [slow["action_id"]]
+
+
+def test_FakeEcs_delete_server():
+    fake = get_fake(delete_time=1)
+    name = fake.add_server()["name"]
+    response = fake.handle("DELETE", f"/ecs/v2/servers/{name}")
+    assert response.status_code == 200
+    assert fake.servers[name]["status"] == "Deleting"
+    assert fake.handle("DELETE", f"/ecs/v2/servers/{name}").status_code == 400
+    fake.advance(1)
+    assert name not in fake.servers
+    assert fake.handle("GET", f"/ecs/v2/servers/{name}").status_code == 404
+
+
+def test_FakeEcs_power_actions():
+    fake = get_fake(action_time=1)
+    name = fake.add_server()["name"]
+    fake.handle("POST", f"/ecs/v2/servers/{name}/actions", body={"type": "power_off"})
+    fake.advance(1)
+    assert fake._power[name] == "STOPPED"
+    response = fake.handle("GET", f"/ecs/v2/servers/{name}/status")
+    assert b"STOPPED" in response.content
+
+
+def test_FakeEcs_action_failure_rate():
+    fake = get_fake(boot_time=1, action_failure_rate=1)
+    create_server(fake)
+    fake.advance(1)
+    (name,) = fake.servers
+    assert fake.servers[name]["status"] == "Fail"
+    (action,) = fake.actions.values()
+    assert action["status"] == "failed"
+
+
+def test_FakeEcs_invalid_requests():
+    fake = get_fake()
+    body = {"plan": "eCS99", "location": "it-fr2", "image": "ubuntu-2404"}
+    assert fake.handle("POST", "/ecs/v2/servers", body=body).status_code == 400
+    assert fake.handle("GET", "/ecs/v2/unknown").status_code == 404
+    assert fake.handle("GET", "/other/v2/servers").status_code == 404
+
+
+def test_FakeEcs_token():
+    fake = FakeEcs(token="secret")
+    assert fake.handle("GET", "/ecs/v2/servers").status_code == 401
+    response = fake.handle("GET", "/ecs/v2/servers", headers={"X-APITOKEN": "secret"})
+    assert response.status_code == 200
+
+
+def test_FakeEcs_fail_next():
+    fake = get_fake()
+    fake.fail_next(2, status=503)
+    assert fake.handle("GET", "/ecs/v2/servers").status_code == 503
+    assert fake.handle("GET", "/ecs/v2/servers").status_code == 503
+    assert fake.handle("GET", "/ecs/v2/servers").status_code == 200
+
+
+def test_FakeEcs_error_rate():
+    fake = get_fake(error_rate=1, error_statuses=[502])
+    assert fake.handle("GET", "/ecs/v2/servers").status_code == 502
+    fake.config.error_rate = 0
+    assert fake.handle("GET", "/ecs/v2/servers").status_code == 200
+
+
+def test_FakeEcs_throttle():
+    fake = get_fake(throttle_rate=2, throttle_burst=3)
+    statuses = [fake.handle("GET", "/ecs/v2/servers").status_code for _ in range(5)]
+    assert statuses == [200, 200, 200, 429, 429]
+    response = fake.handle("GET", "/ecs/v2/servers")
+    assert response.headers["Retry-After"] == "0.500"
+    # the clock of the fake refills the budget
+    fake.advance(1)
+    statuses = [fake.handle("GET", "/ecs/v2/servers").status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+
+
+def test_FakeEcs_latency():
+    fake = get_fake(latency=0.02, jitter=0.01)
+    started = time.perf_counter()
+    fake.handle("GET", "/ecs/v2/servers")
+    assert time.perf_counter() - started >= 0.02
+
+
+def test_FakeEcsServer_api():
+    with FakeEcsServer(config=FakeEcsConfig(boot_time=0.2, delete_time=0)) as server:
+        api = server.api()
+        created, action_id = api.create_server(
+            ServerCreateRequest(plan="eCS1", location="it-fr2", image="almalinux-9")
+        )
+        assert created.status == "Booting"
+        assert api.watch_action(action_id, fetch_every=0.05).status == "completed"
+        assert api.fetch_server(created.name).status == "Booted"
+
+        server.fake.fail_next(status=500)
+        with pytest.raises(ServerError):
+            api.fetch_servers()
+
+        api.update_server(created.name, notes="updated", group="eg1")
+        assert api.fetch_servers()[0].notes == "updated"
+        assert api.turn_off_server(created.name).type == "power_off"
+        assert api.can_create_plan("eCS1", "it-fr2")
+        assert api.fetch_regions_available("eCS1")
+        assert api.fetch_images_basics()
+        assert api.fetch_plans()
+
+        template, _ = api.create_template(server=created.name)
+        assert api.fetch_template(template.id).name == template.name
+        script = api.create_script("title", "content").script
+        assert api.update_script(script.id, "new", None, None).title == "new"
+        api.delete_script(script.id)
+        with pytest.raises(NotFoundError):
+            api.fetch_script(script.id)
+        assert api.create_ssh_key("ssh-ed25519 AAAA", "alex").label == "alex"
+
+        api.delete_server(created.name)
+        with pytest.raises(NotFoundError):
+            api.fetch_server(created.name)
+        with pytest.raises(ClientError):
+            api.create_ssh_key("", "empty")
+
+
+def test_FakeEcsServer_concurrency():
+    with FakeEcsServer() as server:
+        server.fake.add_servers(20)
+        api = server.api()
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            counts = list(pool.map(lambda _: len(api.fetch_servers()), range(200)))
+        assert counts == [20] * 200
+        assert server.fake.requests == 200